@@ -0,0 +1,75 @@
+"""
+冷启动导入耗时基准测试
+
+每次都启动一个全新的 Python 进程, 测量导入核心包(以及兼容模块)所需的时间,
+并检查导入过程中是否加载了 PyQt5.
+
+用法:
+    python benchmarks/bench_import.py [--runs 20]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 名称 -> 在子进程中执行的导入语句
+CASES = {
+    'python (空解释器)': 'pass',
+    'import sqltranslator': 'import sqltranslator',
+    'sqltranslator.SQLInterpreter': 'import sqltranslator; sqltranslator.SQLInterpreter; sqltranslator.sql_parser',
+    'import sql_processor (兼容)': 'import sql_processor',
+}
+
+# 子进程内执行: 导入并报告是否加载了 Qt
+_PROBE = "{stmt}\nimport sys\nprint(any(m.startswith('PyQt5') for m in sys.modules))"
+
+
+def measure(stmt, runs):
+    """返回 (每次耗时毫秒列表, 是否加载了Qt)"""
+    timings = []
+    qt_loaded = False
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(stmt=stmt)],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+        qt_loaded = qt_loaded or out.stdout.strip() == 'True'
+    return timings, qt_loaded
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='冷启动导入耗时基准测试')
+    arg_parser.add_argument('--runs', type=int, default=20, help='每项测量的进程启动次数')
+    arg_parser.add_argument('--json', action='store_true', help='以 JSON 格式输出')
+    args = arg_parser.parse_args()
+
+    report = {}
+    for name, stmt in CASES.items():
+        timings, qt_loaded = measure(stmt, args.runs)
+        report[name] = {
+            'median_ms': round(statistics.median(timings), 2),
+            'min_ms': round(min(timings), 2),
+            'max_ms': round(max(timings), 2),
+            'qt_loaded': qt_loaded,
+        }
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    baseline = report['python (空解释器)']['median_ms']
+    print(f"{'场景':<34}{'中位数(ms)':>12}{'额外开销(ms)':>14}  Qt")
+    for name, r in report.items():
+        print(f"{name:<34}{r['median_ms']:>12.2f}{r['median_ms'] - baseline:>14.2f}  {'是' if r['qt_loaded'] else '否'}")
+
+
+if __name__ == '__main__':
+    main()
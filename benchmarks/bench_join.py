@@ -0,0 +1,91 @@
+"""
+宽表连接基准测试: 测量耗时、内存峰值与 GC 次数
+
+建立三张宽表(每张 --columns 列), 执行只投影少数几列的三表连接,
+用 tracemalloc 记录执行期间的内存峰值, 用 gc.get_stats 统计垃圾回收次数.
+
+用法:
+    python benchmarks/bench_join.py [--rows 5000] [--columns 30] [--runs 5]
+"""
+
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqltranslator import SQLInterpreter, sql_lexer, sql_parser  # noqa: E402
+
+QUERIES = {
+    '三表连接投影两列': "SELECT a.c1, c.c2 FROM a, b, c WHERE a.id = b.a_id AND b.id = c.b_id;",
+    '三表连接 COUNT(*)': "SELECT COUNT(*) AS n FROM a JOIN b ON a.id = b.a_id JOIN c ON b.id = c.b_id;",
+    '左外连接投影两列': "SELECT a.c1, b.c2 FROM a LEFT JOIN b ON a.id = b.a_id;",
+}
+
+
+def build_database(rows, columns):
+    db = SQLInterpreter()
+    extra = ', '.join(f"c{i} INT" for i in range(1, columns))
+    db.execute(sql_parser(sql_lexer(
+        f"CREATE TABLE a (id INT PRIMARY KEY, {extra});"
+        f"CREATE TABLE b (id INT PRIMARY KEY, a_id INT, {extra});"
+        f"CREATE TABLE c (id INT PRIMARY KEY, b_id INT, {extra});"
+    )))
+    filler = list(range(1, columns))
+    for i in range(rows):
+        db.insert_row('a', [i] + filler)
+        db.insert_row('b', [i, i // 2] + filler)
+        db.insert_row('c', [i, i] + filler)
+    return db
+
+
+def measure(db, sql, runs):
+    statement = sql_parser(sql_lexer(sql))
+    timings, peaks, collections = [], [], []
+    for _ in range(runs):
+        gc.collect()
+        before = sum(s['collections'] for s in gc.get_stats())
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = db.execute(statement)[-1]
+        timings.append((time.perf_counter() - start) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024 / 1024)
+        tracemalloc.stop()
+        collections.append(sum(s['collections'] for s in gc.get_stats()) - before)
+        if result[0] == 'error':
+            raise Exception(result[1])
+    return {
+        'rows': len(result[1]),
+        'median_ms': round(statistics.median(timings), 2),
+        'peak_mb': round(statistics.median(peaks), 2),
+        'gc_collections': statistics.median(collections),
+    }
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='宽表连接基准测试')
+    arg_parser.add_argument('--rows', type=int, default=5000, help='每张表的行数')
+    arg_parser.add_argument('--columns', type=int, default=30, help='每张表的列数')
+    arg_parser.add_argument('--runs', type=int, default=5, help='每条查询的执行次数')
+    arg_parser.add_argument('--json', action='store_true', help='以 JSON 格式输出')
+    args = arg_parser.parse_args()
+
+    db = build_database(args.rows, args.columns)
+    report = {name: measure(db, sql, args.runs) for name, sql in QUERIES.items()}
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+
+    print(f"{'查询':<20}{'结果行数':>10}{'中位数(ms)':>12}{'内存峰值(MB)':>14}{'GC次数':>8}")
+    for name, r in report.items():
+        print(f"{name:<20}{r['rows']:>10}{r['median_ms']:>12.2f}{r['peak_mb']:>14.2f}{r['gc_collections']:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""
+查询服务器压力测试: 测量 QPS 与延迟分位数
+
+在后台线程中启动服务器（或连接已有服务器）, 多个客户端线程通过连接池
+在指定时长内不断发送查询, 最后统计吞吐量与 p50/p95/p99 延迟.
+
+用法:
+    python benchmarks/bench_server.py [--clients 16] [--duration 5] [--rows 10000]
+    python benchmarks/bench_server.py --connect 127.0.0.1:15432 --query "SELECT ...;"
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqltranslator.client import ConnectionPool  # noqa: E402
+from sqltranslator.server import SQLServer  # noqa: E402
+
+DEFAULT_QUERIES = [
+    "SELECT * FROM bench WHERE id = {id};",
+    "SELECT COUNT(*) AS n FROM bench WHERE age > 50;",
+    "SELECT name, age FROM bench WHERE age = {age} LIMIT 20;",
+]
+
+
+def start_background_server(rows, batch_size, workers):
+    """在后台线程的事件循环中启动服务器, 返回 (server, port)"""
+    server = SQLServer(batch_size=batch_size, workers=workers)
+    db = server.db
+    from sqltranslator import sql_lexer, sql_parser
+    db.execute(sql_parser(sql_lexer(
+        "CREATE TABLE bench (id INT PRIMARY KEY, name VARCHAR(20), age INT);")))
+    table = db.tables['bench']
+    for i in range(rows):
+        db.insert_row('bench', [i, f"user{i % 100}", i % 80])
+
+    ready = threading.Event()
+    loop = asyncio.new_event_loop()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(server.start('127.0.0.1', 0))
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return server, server.addresses[0][1], len(table['data'])
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def run_load(pool, queries, clients, duration, rows):
+    """多个客户端线程持续发送查询, 返回 (延迟列表秒, 错误数, 实际耗时)"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(seed):
+        local = []
+        local_errors = 0
+        n = seed
+        while time.perf_counter() < deadline:
+            sql = queries[n % len(queries)].format(id=n % max(rows, 1), age=n % 80)
+            n += clients
+            start = time.perf_counter()
+            try:
+                results = pool.execute(sql)
+                if any(isinstance(r, tuple) and r[0] == 'error' for r in results):
+                    local_errors += 1
+            except Exception:
+                local_errors += 1
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return latencies, errors[0], time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='查询服务器压力测试')
+    arg_parser.add_argument('--clients', type=int, default=16, help='并发客户端线程数')
+    arg_parser.add_argument('--pool-size', type=int, default=None, help='连接池大小（默认等于客户端数）')
+    arg_parser.add_argument('--duration', type=float, default=5.0, help='压测时长（秒）')
+    arg_parser.add_argument('--rows', type=int, default=10000, help='内置服务器的测试表行数')
+    arg_parser.add_argument('--workers', type=int, default=4, help='内置服务器的执行线程数')
+    arg_parser.add_argument('--batch-size', type=int, default=500, help='内置服务器每帧的行数')
+    arg_parser.add_argument('--connect', help='连接已有服务器 host:port, 而不是启动内置服务器')
+    arg_parser.add_argument('--query', action='append', help='自定义查询（可多次指定）')
+    arg_parser.add_argument('--json', action='store_true', help='以 JSON 格式输出')
+    args = arg_parser.parse_args()
+
+    if args.connect:
+        host, port = args.connect.rsplit(':', 1)
+        port = int(port)
+        rows = args.rows
+    else:
+        host = '127.0.0.1'
+        _, port, rows = start_background_server(args.rows, args.batch_size, args.workers)
+
+    queries = args.query or DEFAULT_QUERIES
+    with ConnectionPool(size=args.pool_size or args.clients, host=host, port=port) as pool:
+        latencies, errors, elapsed = run_load(pool, queries, args.clients, args.duration, rows)
+
+    latencies.sort()
+    report = {
+        'clients': args.clients,
+        'requests': len(latencies),
+        'errors': errors,
+        'qps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'mean_ms': round(statistics.mean(latencies) * 1000, 3) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for key, value in report.items():
+            print(f"{key:>10}: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+"""
+标准负载基准测试: 生成指定规模的测试数据, 测量各类语句的吞吐量与延迟分位数, 并与基线比较
+
+生成三张表(规模由 --rows 指定, 1 万 ~ 1000 万行):
+    users  (id, name, age, city)       --rows 行
+    orders (id, user_id, amount, status) --rows 行, 每个用户平均一单
+    items  (id, order_id, product, qty)  --rows 行, 每个订单平均一项
+数据由固定种子的随机数生成, 同样的参数每次得到同样的数据.
+
+每种负载重复执行若干次, 每次都完整经过 sql_lexer -> sql_parser -> SQLInterpreter.execute;
+lex / parse 两项只测量词法分析和语法分析本身. 轻量负载(按主键查找/修改)执行 --ops 次,
+扫描类负载执行 --heavy-ops 次.
+
+--save-baseline 把结果保存为基线文件, --baseline 与已保存的基线比较:
+中位延迟比基线慢超过 --threshold(默认 20%)的负载记为回归, 此时进程以状态码 1 退出.
+基线只在同一台机器、同样的 --rows 下比较才有意义.
+
+用法:
+    python benchmarks/bench_suite.py [--rows 10000] [--ops 200] [--heavy-ops 10] [--json]
+    python benchmarks/bench_suite.py --save-baseline baseline.json
+    python benchmarks/bench_suite.py --baseline baseline.json [--threshold 0.2]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqltranslator import SQLInterpreter, sql_lexer, sql_parser  # noqa: E402
+
+CITIES = ['北京', '上海', '广州', '深圳', '杭州', '成都', '武汉', '西安']
+STATUSES = ['new', 'paid', 'shipped', 'done']
+PRODUCTS = [f"product{i}" for i in range(50)]
+AGES = 80
+
+
+# ---------------------- 测试数据 ----------------------
+def build_database(rows, seed=42):
+    """生成 users / orders / items 三张表, 返回 (解释器, 建表耗时秒)"""
+    rnd = random.Random(seed)
+    db = SQLInterpreter()
+    db.execute(sql_parser(sql_lexer(
+        "CREATE TABLE users (id INT PRIMARY KEY, name VARCHAR(20), age INT, city VARCHAR(10) DICTIONARY);"
+        "CREATE TABLE orders (id INT PRIMARY KEY, user_id INT, amount INT, status VARCHAR(10) DICTIONARY);"
+        "CREATE TABLE items (id INT PRIMARY KEY, order_id INT, product VARCHAR(20) DICTIONARY, qty INT);"
+    )))
+    start = time.perf_counter()
+    for i in range(rows):
+        db.insert_row('users', [i, f"user{i}", rnd.randrange(AGES), rnd.choice(CITIES)])
+    for i in range(rows):
+        db.insert_row('orders', [i, rnd.randrange(rows), rnd.randrange(1000), rnd.choice(STATUSES)])
+    for i in range(rows):
+        db.insert_row('items', [i, rnd.randrange(rows), rnd.choice(PRODUCTS), rnd.randrange(1, 10)])
+    db.analyze()
+    return db, time.perf_counter() - start
+
+
+# ---------------------- 负载 ----------------------
+# 名称 -> (是否轻量, 生成一次操作的 SQL 的函数 f(rnd, rows, state))
+# state 在负载之间共享, 记录批量插入的主键, DELETE 删除这些行而不是原有的数据
+def _point_lookup(rnd, rows, state):
+    return f"SELECT * FROM users WHERE id = {rnd.randrange(rows)};"
+
+
+def _range_scan(rnd, rows, state):
+    low = rnd.randrange(AGES - 2)
+    return f"SELECT id, age FROM users WHERE age >= {low} AND age <= {low + 2};"
+
+
+def _like_filter(rnd, rows, state):
+    return f"SELECT id, name FROM users WHERE name LIKE 'user{rnd.randrange(1, 10)}%7';"
+
+
+def _group_by(rnd, rows, state):
+    return "SELECT city, COUNT(*) AS n, AVG(age) AS avg_age FROM users GROUP BY city;"
+
+
+def _join_2(rnd, rows, state):
+    return ("SELECT users.name, orders.amount FROM users JOIN orders ON users.id = orders.user_id "
+            f"WHERE users.age = {rnd.randrange(AGES)};")
+
+
+def _join_3(rnd, rows, state):
+    return ("SELECT users.name, items.product, items.qty FROM users "
+            "JOIN orders ON users.id = orders.user_id JOIN items ON orders.id = items.order_id "
+            f"WHERE users.age = {rnd.randrange(AGES)};")
+
+
+def _order_limit(rnd, rows, state):
+    return f"SELECT id, amount FROM orders WHERE status = '{rnd.choice(STATUSES)}' ORDER BY amount DESC LIMIT 10;"
+
+
+def _bulk_insert(rnd, rows, state):
+    statements = []
+    for _ in range(state['batch']):
+        key = state['next_id']
+        state['next_id'] += 1
+        state['inserted'].append(key)
+        statements.append(f"INSERT INTO orders VALUES ({key}, {rnd.randrange(rows)}, {rnd.randrange(1000)}, 'new');")
+    return ' '.join(statements)
+
+
+def _update(rnd, rows, state):
+    return f"UPDATE orders SET amount = amount + 1 WHERE id = {rnd.randrange(rows)};"
+
+
+def _delete(rnd, rows, state):
+    if not state['inserted']:
+        return None
+    return f"DELETE FROM orders WHERE id = {state['inserted'].pop()};"
+
+
+WORKLOADS = {
+    'point_lookup': (True, _point_lookup),
+    'range_scan': (False, _range_scan),
+    'like_filter': (False, _like_filter),
+    'group_by': (False, _group_by),
+    'join_2': (False, _join_2),
+    'join_3': (False, _join_3),
+    'order_by_limit': (False, _order_limit),
+    'bulk_insert': (True, _bulk_insert),
+    'update': (True, _update),
+    'delete': (True, _delete),
+}
+
+FRONTEND_SAMPLE = [_point_lookup, _range_scan, _like_filter, _group_by, _join_3, _order_limit, _update]
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def summarize(latencies, elapsed, statements_per_op=1):
+    latencies = sorted(latencies)
+    return {
+        'ops': len(latencies),
+        'statements_per_op': statements_per_op,
+        'ops_per_s': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'max_ms': round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+def measure_frontend(rows, ops, seed):
+    """单独测量词法分析与语法分析"""
+    rnd = random.Random(seed)
+    state = {'inserted': []}
+    sqls = [FRONTEND_SAMPLE[i % len(FRONTEND_SAMPLE)](rnd, rows, state) for i in range(ops)]
+    report = {}
+
+    latencies = []
+    start = time.perf_counter()
+    tokens = []
+    for sql in sqls:
+        t0 = time.perf_counter()
+        tokens.append(sql_lexer(sql))
+        latencies.append(time.perf_counter() - t0)
+    report['lex'] = summarize(latencies, time.perf_counter() - start)
+
+    latencies = []
+    start = time.perf_counter()
+    for token_list in tokens:
+        t0 = time.perf_counter()
+        sql_parser(token_list)
+        latencies.append(time.perf_counter() - t0)
+    report['parse'] = summarize(latencies, time.perf_counter() - start)
+    return report
+
+
+def measure_workload(db, name, rows, ops, state, seed):
+    _, make_sql = WORKLOADS[name]
+    rnd = random.Random(f"{seed}-{name}")
+    latencies = []
+    statements = 1
+    start = time.perf_counter()
+    for _ in range(ops):
+        sql = make_sql(rnd, rows, state)
+        if sql is None:
+            break
+        t0 = time.perf_counter()
+        results = db.execute(sql_parser(sql_lexer(sql)))
+        latencies.append(time.perf_counter() - t0)
+        statements = len(results)
+        for result in results:
+            if isinstance(result, tuple) and result[0] == 'error':
+                raise Exception(f"{name}: {result[1]}\n{sql}")
+    return summarize(latencies, time.perf_counter() - start, statements)
+
+
+def run_suite(args):
+    db, load_s = build_database(args.rows, args.seed)
+    state = {'next_id': args.rows, 'inserted': [], 'batch': args.batch}
+    selected = args.workload or list(WORKLOADS)
+    results = {}
+    if not args.workload:
+        results.update(measure_frontend(args.rows, args.ops, args.seed))
+    for name in selected:
+        light, _ = WORKLOADS[name]
+        ops = args.ops if light else args.heavy_ops
+        if name == 'delete':  # 删除批量插入的行, 每次一行
+            ops = min(ops, len(state['inserted']))
+        results[name] = measure_workload(db, name, args.rows, ops, state, args.seed)
+    return {
+        'meta': {
+            'rows': args.rows,
+            'seed': args.seed,
+            'load_s': round(load_s, 3),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+        },
+        'workloads': results,
+    }
+
+
+# ---------------------- 与基线比较 ----------------------
+def compare(report, baseline, threshold):
+    """返回 [(负载名, 基线 p50, 当前 p50, 变化比例, 是否回归)]
+
+    任一方执行 0 次(未运行)的负载不参与比较, 见 not_run.
+    """
+    rows = []
+    for name, current in report['workloads'].items():
+        base = baseline['workloads'].get(name)
+        if base is None or not base['p50_ms'] or not current['ops'] or not base['ops']:
+            continue
+        change = current['p50_ms'] / base['p50_ms'] - 1
+        rows.append((name, base['p50_ms'], current['p50_ms'], change, change > threshold))
+    return rows
+
+
+def not_run(report, baseline):
+    """返回本次或基线中执行 0 次的负载名"""
+    names = []
+    for name, current in report['workloads'].items():
+        base = baseline['workloads'].get(name)
+        if base is not None and (not current['ops'] or not base['ops']):
+            names.append(name)
+    return names
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description='标准负载基准测试')
+    arg_parser.add_argument('--rows', type=int, default=10000, help='每张表的行数(1 万 ~ 1000 万)')
+    arg_parser.add_argument('--ops', type=int, default=200, help='轻量负载(主键查找/插入/修改)的执行次数')
+    arg_parser.add_argument('--heavy-ops', type=int, default=10, help='扫描、聚合、连接类负载的执行次数')
+    arg_parser.add_argument('--batch', type=int, default=100, help='bulk_insert 每次执行的 INSERT 语句数')
+    arg_parser.add_argument('--seed', type=int, default=42, help='随机数种子')
+    arg_parser.add_argument('--workload', action='append', choices=list(WORKLOADS),
+                            help='只运行指定的负载(可多次指定)')
+    arg_parser.add_argument('--baseline', help='与之比较的基线文件(JSON)')
+    arg_parser.add_argument('--save-baseline', help='把本次结果保存为基线文件')
+    arg_parser.add_argument('--threshold', type=float, default=0.2, help='中位延迟变慢超过该比例记为回归')
+    arg_parser.add_argument('--json', action='store_true', help='以 JSON 格式输出')
+    args = arg_parser.parse_args()
+
+    report = run_suite(args)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        comparison = compare(report, baseline, args.threshold)
+        regressions = [name for name, *_, regressed in comparison if regressed]
+        report['baseline'] = {
+            'file': args.baseline,
+            'rows': baseline['meta']['rows'],
+            'threshold': args.threshold,
+            'changes': {name: round(change, 3) for name, _, _, change, _ in comparison},
+            'regressions': regressions,
+            'not_run': not_run(report, baseline),
+        }
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({'meta': report['meta'], 'workloads': report['workloads']}, f, ensure_ascii=False, indent=2)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        meta = report['meta']
+        print(f"数据规模: 每张表 {meta['rows']} 行, 生成耗时 {meta['load_s']:.2f} s")
+        print(f"{'负载':<16}{'次数':>8}{'次/秒':>12}{'p50(ms)':>12}{'p95(ms)':>12}{'p99(ms)':>12}{'最大(ms)':>12}")
+        for name, r in report['workloads'].items():
+            print(f"{name:<16}{r['ops']:>8}{r['ops_per_s']:>12.1f}{r['p50_ms']:>12.3f}"
+                  f"{r['p95_ms']:>12.3f}{r['p99_ms']:>12.3f}{r['max_ms']:>12.3f}")
+        if args.baseline:
+            info = report['baseline']
+            if info['rows'] != meta['rows']:
+                print(f"\n警告: 基线的数据规模({info['rows']} 行)与本次不同, 比较结果仅供参考")
+            print(f"\n与基线 {args.baseline} 比较(中位延迟):")
+            for name, base_ms, current_ms, change, regressed in compare(report, baseline, args.threshold):
+                flag = '  <-- 回归' if regressed else ''
+                print(f"{name:<16}{base_ms:>12.3f}{current_ms:>12.3f}{change * 100:>+10.1f}%{flag}")
+            for name in info['not_run']:
+                print(f"{name:<16}{'未运行(0 次), 不参与比较':>12}")
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
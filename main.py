@@ -1,20 +1,67 @@
+import re
 import sys
+import time
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QTextEdit, QTableWidget, QTableWidgetItem, QPushButton,
-    QMessageBox, QTreeWidget, QTreeWidgetItem, QSplitter,
+    QMessageBox, QTreeWidget, QTreeWidgetItem, QTreeWidgetItemIterator, QSplitter,
     QTabWidget, QLabel, QStatusBar, QAction, QMenuBar, QToolBar,
     QLineEdit, QComboBox, QFileDialog, QDialog, QFormLayout,
-    QHeaderView, QInputDialog, QAbstractItemView, QFrame, QGroupBox, QMenu
+    QHeaderView, QInputDialog, QAbstractItemView, QFrame, QGroupBox, QMenu, QTableView, QDockWidget
 )
 from PyQt5.QtGui import QFont, QColor, QIcon, QSyntaxHighlighter, QTextCharFormat, QBrush
-from PyQt5.QtCore import Qt, QRegExp, QTimer, pyqtSignal
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QAbstractTableModel, QModelIndex, QThread
+from collections import OrderedDict
 
-from sql_processor import SQLInterpreter, sql_lexer, sql_parser
+from sqltranslator import SQLInterpreter, sql_lexer, sql_parser, KEYWORDS, OPERATORS
+from sqltranslator.control import ExecutionControl
+from sqltranslator.functions import FUNCTIONS as SCALAR_FUNCTIONS
+from sqltranslator.metrics import MetricsHook
 
 
 # ===== SQL语法高亮 =====
 class SQLHighlighter(QSyntaxHighlighter):
+    """
+    每行只用一个组合正则从左到右扫描一遍, 按匹配到的分组决定格式;
+    单词匹配后查表区分关键字/函数, 关键字和操作符取自词法分析器的 KEYWORDS / OPERATORS.
+    正则在类上只编译一次, 输入时的耗时只与当前行的长度有关, 与脚本总长度无关
+    """
+    # 词法分析器尚不支持、但常见的关键字
+    EXTRA_KEYWORDS = {
+        'ALTER', 'ADD', 'INDEX', 'RIGHT', 'FULL', 'UNION', 'ALL', 'WITH',
+        'EXISTS', 'CASE', 'WHEN', 'THEN', 'ELSE', 'END', 'IS',
+        'DEFAULT', 'CHECK', 'REFERENCES', 'FOREIGN', 'PRIVILEGES', 'GRANT',
+        'REVOKE', 'TRUNCATE', 'COMMENT', 'USE', 'DATABASE', 'SHOW', 'TABLES',
+        'DESCRIBE', 'OPTIMIZE', 'BACKUP', 'RESTORE',
+    }
+    FUNCTIONS = {
+        'COUNT', 'SUM', 'AVG', 'MIN', 'MAX', 'CONCAT', 'SUBSTRING', 'LENGTH',
+        'UPPER', 'LOWER', 'TRIM', 'REPLACE', 'ROUND', 'CEIL', 'FLOOR', 'NOW',
+        'DATE', 'YEAR', 'MONTH', 'DAY', 'HOUR', 'MINUTE', 'SECOND', 'DATEDIFF', 'TIMESTAMPDIFF', 'IFNULL', 'COALESCE', 'NULLIF',
+        'IF', 'CASE', 'EXTRACT', 'CAST', 'CONVERT', 'GROUP_CONCAT', 'RAND',
+        'SHA1', 'MD5', 'LEFT', 'RIGHT', 'POSITION', 'FORMAT', 'STR_TO_DATE',
+        'DATE_FORMAT', 'CURRENT_DATE', 'CURRENT_TIME', 'CURRENT_TIMESTAMP'
+    } | set(SCALAR_FUNCTIONS)  # 解释器支持的标量函数
+    EXTRA_OPERATORS = ['%', '|', '&', '^', '~', '<<', '>>']
+    IN_COMMENT = 1  # 块状态: 本行结束时仍在 /* */ 注释中
+
+    _token_pattern = None
+
+    @classmethod
+    def token_pattern(cls):
+        """组合正则, 首次使用时编译; 较长的操作符排在前面, 保证最长匹配"""
+        if cls._token_pattern is None:
+            operators = sorted(set(OPERATORS) | set(cls.EXTRA_OPERATORS), key=len, reverse=True)
+            cls._token_pattern = re.compile('|'.join([
+                r'(?P<comment>--.*)',
+                r'(?P<block_comment>/\*)',
+                r'(?P<string>\'[^\']*\'|"[^"]*")',
+                r'(?P<word>[A-Za-z_]\w*)',
+                r'(?P<number>\b\d+\b)',
+                '(?P<operator>' + '|'.join(re.escape(op) for op in operators) + ')',
+            ]))
+        return cls._token_pattern
+
     def __init__(self, parent=None):
         super().__init__(parent)
 
@@ -44,106 +91,93 @@ class SQLHighlighter(QSyntaxHighlighter):
         function_format.setForeground(QColor(139, 69, 19))
         function_format.setFontWeight(QFont.Bold)
 
-        # 规则列表
-        self.highlightingRules = []
-
-        # 关键字规则
-        keywords = [
-            'SELECT', 'FROM', 'WHERE', 'CREATE', 'TABLE', 'INSERT', 'INTO',
-            'VALUES', 'DELETE', 'UPDATE', 'SET', 'INT', 'VARCHAR', 'PRIMARY',
-            'KEY', 'NOT', 'NULL', 'AND', 'OR', 'AS', 'DISTINCT', 'ORDER', 'BY',
-            'ASC', 'DESC', 'LIKE', 'IN', 'BETWEEN', 'LIMIT', 'GROUP', 'HAVING',
-            'UNIQUE', 'ALTER', 'ADD', 'DROP', 'INDEX', 'VIEW', 'JOIN', 'LEFT',
-            'RIGHT', 'FULL', 'OUTER', 'INNER', 'ON', 'UNION', 'ALL', 'WITH',
-            'EXISTS', 'CASE', 'WHEN', 'THEN', 'ELSE', 'END', 'IS', 'NULL', 'NOT',
-            'DEFAULT', 'CHECK', 'REFERENCES', 'FOREIGN', 'PRIVILEGES', 'GRANT',
-            'REVOKE', 'TRUNCATE', 'COMMENT', 'USE', 'DATABASE', 'SHOW', 'TABLES',
-            'DESCRIBE', 'EXPLAIN', 'ANALYZE', 'OPTIMIZE', 'BACKUP', 'RESTORE',
-        ]
-        for keyword in keywords:
-            pattern = QRegExp(rf'\b{keyword}\b', Qt.CaseInsensitive)
-            self.highlightingRules.append((pattern, keyword_format))
-
-        # 函数规则
-        functions = [
-            'COUNT', 'SUM', 'AVG', 'MIN', 'MAX', 'CONCAT', 'SUBSTRING', 'LENGTH',
-            'UPPER', 'LOWER', 'TRIM', 'REPLACE', 'ROUND', 'CEIL', 'FLOOR', 'NOW',
-            'DATE', 'YEAR', 'MONTH', 'DAY', 'HOUR', 'MINUTE','SECOND', 'DATEDIFF', 'TIMESTAMPDIFF', 'IFNULL', 'COALESCE', 'NULLIF',
-            'IF', 'CASE', 'EXTRACT', 'CAST', 'CONVERT', 'GROUP_CONCAT', 'RAND',
-            'SHA1', 'MD5', 'LEFT', 'RIGHT', 'POSITION', 'FORMAT', 'STR_TO_DATE',
-            'DATE_FORMAT', 'CURRENT_DATE', 'CURRENT_TIME', 'CURRENT_TIMESTAMP'
-        ]
-        for function in functions:
-            pattern = QRegExp(rf'\b{function}\b', Qt.CaseInsensitive)
-            self.highlightingRules.append((pattern, function_format))
-
-        # 字符串规则
-        string_pattern = QRegExp(r'(\'[^\']*\'|\"[^\"]*\")')
-        self.highlightingRules.append((string_pattern, string_format))
-
-        # 数字规则
-        number_pattern = QRegExp(r'\b\d+\b')
-        self.highlightingRules.append((number_pattern, number_format))
-
-        # 注释规则
-        comment_pattern = QRegExp(r'--[^\n]*')
-        self.highlightingRules.append((comment_pattern, comment_format))
-
-        # 新增多行注释格式（复用comment_format）
-        self.multi_line_comment_format = comment_format
-
-        # 多行注释正则表达式模式
-        self.comment_start = QRegExp(r"/\*")
-        self.comment_end = QRegExp(r"\*/")
-
-        # 操作符规则
-        operators = ['=', '<>', '!=', '<', '<=', '=<', '>', '>=', '=>', '+', '-', '*', '/', ',', '(', ')', ';', '.', '[', ']', '%', '|', '&', '^', '~', '<<', '>>']
-        for operator in operators:
-            pattern = QRegExp(rf'\{operator}')
-            self.highlightingRules.append((pattern, operator_format))
+        # 分组名 -> 格式
+        self.formats = {
+            'comment': comment_format,
+            'string': string_format,
+            'number': number_format,
+            'operator': operator_format,
+        }
+        self.comment_format = comment_format
+
+        # 单词(大写) -> 格式, 同时是函数名的关键字(COUNT、LEFT 等)按函数显示
+        self.word_formats = dict.fromkeys(KEYWORDS | self.EXTRA_KEYWORDS, keyword_format)
+        self.word_formats.update(dict.fromkeys(self.FUNCTIONS, function_format))
+
+        self.pattern = self.token_pattern()
 
     def highlightBlock(self, text):
-        for pattern, format in self.highlightingRules:
-            expression = QRegExp(pattern)
-            index = expression.indexIn(text)
-            while index >= 0:
-                length = expression.matchedLength()
-                self.setFormat(index, length, format)
-                index = expression.indexIn(text, index + length)
-
-        # 处理多行注释
         self.setCurrentBlockState(0)
+        pos = 0
+        if self.previousBlockState() == self.IN_COMMENT:
+            pos = self._block_comment(text, 0, 0)
 
-        start_index = 0
-        if self.previousBlockState() != 1:
-            start_index = self.comment_start.indexIn(text)
-
-        while start_index >= 0:
-            end_index = self.comment_end.indexIn(text, start_index)
-            if end_index == -1:  # 注释跨越多行
-                comment_length = len(text) - start_index
-                self.setCurrentBlockState(1)
-                self.setFormat(start_index, comment_length, self.multi_line_comment_format)
+        while 0 <= pos < len(text):
+            match = self.pattern.search(text, pos)
+            if match is None:
                 break
-            else:  # 完整注释块
-                comment_length = end_index - start_index + self.comment_end.matchedLength()
-                self.setFormat(start_index, comment_length, self.multi_line_comment_format)
-                start_index = self.comment_start.indexIn(text, start_index + comment_length)
+            kind = match.lastgroup
+            start, pos = match.span()
+            if kind == 'block_comment':
+                pos = self._block_comment(text, start, pos)
+                continue
+            if kind == 'word':
+                fmt = self.word_formats.get(match.group().upper())
+                if fmt is None:  # 普通标识符
+                    continue
+            else:
+                fmt = self.formats[kind]
+            self.setFormat(start, pos - start, fmt)
+
+    def _block_comment(self, text, start, search_from):
+        """
+        标记从 start 开始的 /* */ 注释, 返回注释之后的位置;
+        本行内没有结束符时标记到行尾, 设置块状态并返回 -1
+        """
+        end = text.find('*/', search_from)
+        if end == -1:
+            self.setFormat(start, len(text) - start, self.comment_format)
+            self.setCurrentBlockState(self.IN_COMMENT)
+            return -1
+        self.setFormat(start, end + 2 - start, self.comment_format)
+        return end + 2
 
 
 # ===== 表数据编辑对话框 =====
 class EditTableDialog(QDialog):
-    def __init__(self, table_name, table_data, columns, db, parent=None):
+    """
+    编辑过程中记录修改过的单元格、删除的行和新增的行, 保存时只把这些变化
+    通过 SQLInterpreter.apply_changes 一次性提交, 不再逐行比较整个表格
+    """
+    PAGE_SIZE = 200  # 每次滚动到底部时加载的行数
+    ROW_ROLE = Qt.UserRole  # 第一列单元格上的行标识: 已加载行在 table_data 中的下标, 或 NEW_ROW
+    NEW_ROW = -1
+
+    def __init__(self, table_name, db, parent=None):
         super().__init__(parent)
         self.setWindowTitle(f"编辑表: {table_name}")
         self.setMinimumSize(800, 600)
 
         self.table_name = table_name
-        self.table_data = table_data
-        self.columns = columns
+        self.table_data = []  # 已加载的原始行
+        self.row_items = {}  # table_data 下标 -> 该行第一列的单元格(行号会随增删变化, 单元格不变)
+        self.dirty = {}  # table_data 下标 -> 修改过的列号集合
+        self.deleted = set()  # 被删除的已加载行的 table_data 下标
+        self.columns = list(db.tables[table_name]['columns'])
         self.db = db
+        self.total_rows = db.get_table_row_count(table_name)
+        self.writable = True  # 后台执行SQL期间不能保存, 见 set_writable
 
         self.init_ui()
+        self.load_more()
+
+    def set_writable(self, writable):
+        """后台线程执行SQL期间禁止保存: 保存会与其共用会话和事务, 或在界面线程中等待其表锁"""
+        if writable == self.writable:
+            return
+        self.writable = writable
+        self.save_changes_btn.setEnabled(writable)
+        self.status_label.setText("SQL执行结束, 可以保存" if writable else "正在执行SQL, 结束后才能保存")
 
     def init_ui(self):
         layout = QVBoxLayout(self)
@@ -154,13 +188,10 @@ class EditTableDialog(QDialog):
         self.table_widget.setHorizontalHeaderLabels(self.columns)
         self.table_widget.setEditTriggers(QTableWidget.AllEditTriggers)
         self.table_widget.setAlternatingRowColors(True)
-
-        # 填充数据
-        self.table_widget.setRowCount(len(self.table_data))
-        for row_idx, row_data in enumerate(self.table_data):
-            for col_idx, col_name in enumerate(self.columns):
-                item = QTableWidgetItem(str(row_data.get(col_name, "")))
-                self.table_widget.setItem(row_idx, col_idx, item)
+        # 滚动到底部时加载下一页
+        self.table_widget.verticalScrollBar().valueChanged.connect(self.on_scroll)
+        # 记录用户修改过的单元格
+        self.table_widget.itemChanged.connect(self.on_item_changed)
 
         # 调整列宽
         self.table_widget.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
@@ -192,14 +223,60 @@ class EditTableDialog(QDialog):
         layout.addLayout(btn_layout)
         layout.addWidget(self.status_label)
 
+    def on_scroll(self, value):
+        if value >= self.table_widget.verticalScrollBar().maximum() - 5:
+            self.load_more()
+
+    def load_more(self):
+        """加载下一页数据, 插入在已加载的行之后、用户新增的行之前"""
+        loaded = len(self.table_data)
+        if loaded >= self.total_rows:
+            return
+        page = self.db.get_table_page(self.table_name, loaded, self.PAGE_SIZE)
+        if not page:
+            self.total_rows = loaded  # 加载期间有行被删除
+            return
+        # 用户新增的行都在表格末尾
+        insert_at = self.table_widget.rowCount()
+        while insert_at > 0 and self._is_added_row(insert_at - 1):
+            insert_at -= 1
+        self.table_widget.blockSignals(True)  # 填充数据不算修改
+        for row_offset, row_data in enumerate(page):
+            row_idx = insert_at + row_offset
+            self.table_widget.insertRow(row_idx)
+            for col_idx, col_name in enumerate(self.columns):
+                item = QTableWidgetItem(str(row_data.get(col_name, "")))
+                self.table_widget.setItem(row_idx, col_idx, item)
+            row_item = self.table_widget.item(row_idx, 0)
+            row_item.setData(self.ROW_ROLE, loaded + row_offset)
+            self.row_items[loaded + row_offset] = row_item
+        self.table_widget.blockSignals(False)
+        self.table_data.extend(page)
+        self.status_label.setText(f"已加载 {len(self.table_data)} / {self.total_rows} 行")
+
+    def _row_id(self, row_idx):
+        item = self.table_widget.item(row_idx, 0)
+        return item.data(self.ROW_ROLE) if item else None
+
+    def _is_added_row(self, row_idx):
+        return self._row_id(row_idx) == self.NEW_ROW
+
+    def on_item_changed(self, item):
+        row_id = self._row_id(item.row())
+        if row_id is not None and row_id != self.NEW_ROW:
+            self.dirty.setdefault(row_id, set()).add(item.column())
+
     def add_row(self):
         row_idx = self.table_widget.rowCount()
         self.table_widget.insertRow(row_idx)
 
         # 初始化新行的值
+        self.table_widget.blockSignals(True)
         for col_idx in range(self.table_widget.columnCount()):
             item = QTableWidgetItem("")
             self.table_widget.setItem(row_idx, col_idx, item)
+        self.table_widget.item(row_idx, 0).setData(self.ROW_ROLE, self.NEW_ROW)  # 标记为新增行
+        self.table_widget.blockSignals(False)
 
         # 滚动到新行
         self.table_widget.scrollToBottom()
@@ -219,11 +296,19 @@ class EditTableDialog(QDialog):
 
         if reply == QMessageBox.Yes:
             for row in selected_rows:
+                row_id = self._row_id(row)
+                if row_id is not None and row_id != self.NEW_ROW:
+                    self.deleted.add(row_id)
+                    self.dirty.pop(row_id, None)
+                    self.row_items.pop(row_id, None)
                 self.table_widget.removeRow(row)
 
             self.status_label.setText(f"已删除 {len(selected_rows)} 行")
 
     def save_changes(self):
+        if not self.writable:
+            QMessageBox.information(self, "信息", "正在执行SQL, 请等待执行结束后再保存")
+            return
         try:
             # 获取表的主键
             table = self.db.tables[self.table_name]
@@ -233,48 +318,42 @@ class EditTableDialog(QDialog):
                 QMessageBox.warning(self, "警告", f"表 '{self.table_name}' 没有主键，无法保存更改")
                 return
 
-            # 收集当前数据
-            current_data = {}
-            for row_idx in range(self.table_widget.rowCount()):
-                row = {}
-                for col_idx, col_name in enumerate(self.columns):
-                    item = self.table_widget.item(row_idx, col_idx)
-                    row[col_name] = item.text() if item else ""
-
-                # 使用主键作为键
-                primary_key_value = row[primary_key]
-                if primary_key_value:
-                    if primary_key_value in current_data:  # 检查是否发生主键冲突
-                        QMessageBox.warning(self, "错误修改", f"主键 '{primary_key_value}' 的记录已存在! 发生主键冲突!")
-                        return
-                    current_data[primary_key_value] = row
-
-            # 找出已删除的行(或已经修改主键值的行)
-            original_pks = {str(row[primary_key]): row for row in self.table_data if primary_key in row}
-            deleted_pks = [pk for pk in original_pks if pk not in current_data]
-
-            # 执行删除操作
-            for pk in deleted_pks:
-                self.db.delete_row(self.table_name, pk)
-
-            # 处理列更新和新增
-            for pk, row in current_data.items():
-                if pk in original_pks:
-                    # 更新行
-                    original_row = original_pks[pk]
-                    updates = {}
-
-                    for col_name, value in row.items():
-                        if str(original_row.get(col_name, "")) != value:
-                            updates[col_name] = value  # 若有不一致的列数据, 则更新此记录的列信息, 更新为用户输入的数据
-
-                    if updates:  # 更新!
-                        self.db.update_row(self.table_name, pk, updates)
-                else:
-                    # 新增行
-                    self.db.insert_row(self.table_name, list(row.values()))
+            # 删除的行
+            deleted = [self.table_data[row_id][primary_key] for row_id in sorted(self.deleted)]
+
+            # 修改过的行: 只比较修改过的单元格, 改回原值的不算修改
+            updated = []
+            for row_id, col_ids in self.dirty.items():
+                row_idx = self.row_items[row_id].row()
+                original_row = self.table_data[row_id]
+                updates = {}
+                for col_idx in sorted(col_ids):
+                    col_name = self.columns[col_idx]
+                    value = self.table_widget.item(row_idx, col_idx).text()
+                    if str(original_row.get(col_name, "")) != value:
+                        updates[col_name] = value
+                if updates:
+                    updated.append((original_row[primary_key], updates))
+
+            # 新增的行(都在表格末尾), 主键为空的行忽略
+            inserted = []
+            pk_col = self.columns.index(primary_key)
+            row_idx = self.table_widget.rowCount() - 1
+            while row_idx >= 0 and self._is_added_row(row_idx):
+                values = [self.table_widget.item(row_idx, col_idx).text() for col_idx in range(len(self.columns))]
+                if values[pk_col]:
+                    inserted.append(values)
+                row_idx -= 1
+            inserted.reverse()
+
+            if not (deleted or updated or inserted):
+                QMessageBox.information(self, "信息", "没有需要保存的更改")
+                return
+
+            # 一次提交全部更改, 任一行失败时全部不生效
+            self.db.apply_changes(self.table_name, deleted, updated, inserted)
 
-            QMessageBox.information(self, "成功", "所有更改已保存")
+            QMessageBox.information(self, "成功", f"已保存更改: 删除 {len(deleted)} 行, 更新 {len(updated)} 行, 新增 {len(inserted)} 行")
             self.accept()
 
         except Exception as e:
@@ -340,19 +419,142 @@ class TableStructureDialog(QDialog):
         columns_group.setLayout(columns_layout)
         layout.addWidget(columns_group)
 
+        # 创建分组框显示列统计信息(查询计划器使用, 执行 ANALYZE 可刷新)
+        stats_group = QGroupBox("统计信息")
+        stats_layout = QVBoxLayout()
+
+        self.stats_table = QTableWidget()
+        self.stats_table.setColumnCount(5)
+        self.stats_table.setHorizontalHeaderLabels(["列名", "不同值(估计)", "NULL比例", "最小值", "最大值"])
+        self.stats_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.stats_table.setAlternatingRowColors(True)
+
+        _, column_stats = self.db.get_table_stats(self.table_name)
+        self.stats_table.setRowCount(len(column_stats))
+        for row_idx, col_stats in enumerate(column_stats):
+            for col_idx, key in enumerate(('column', 'distinct', 'null_frac', 'min', 'max')):
+                value = col_stats[key]
+                self.stats_table.setItem(row_idx, col_idx, QTableWidgetItem("" if value is None else str(value)))
+
+        self.stats_table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.stats_table.horizontalHeader().setStretchLastSection(True)
+
+        stats_layout.addWidget(self.stats_table)
+        stats_group.setLayout(stats_layout)
+        layout.addWidget(stats_group)
+
         # 关闭按钮
         self.close_btn = QPushButton("关闭")
         self.close_btn.clicked.connect(self.close)
         layout.addWidget(self.close_btn, alignment=Qt.AlignRight)
 
 
+# ===== 结果表格模型 =====
+class ResultTableModel(QAbstractTableModel):
+    """
+    只读表格模型: 直接读取解释器返回的结果行(字典列表), 不为每个单元格创建控件,
+    视图只向模型查询可见区域内的单元格, 几十万行的结果也能立即显示
+    """
+
+    def __init__(self, columns, rows, parent=None):
+        super().__init__(parent)
+        self.columns = columns
+        self.rows = rows
+        self.total_rows = len(rows)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.total_rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section]
+        return str(section + 1)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        row = self.row(index.row())
+        if row is None:
+            return None
+        return str(row.get(self.columns[index.column()], ""))
+
+    def row(self, row_idx):
+        return self.rows[row_idx]
+
+
+def show_model(view, model, sample_rows=200):
+    """
+    把模型显示在 QTableView 中. 列宽按表头和前 sample_rows 行估算, 不像
+    resizeColumnsToContents 那样遍历全部行; 行高固定, 滚动时不必逐行测量
+    """
+    view.setModel(model)
+    view.setAlternatingRowColors(True)
+    vertical_header = view.verticalHeader()
+    vertical_header.setSectionResizeMode(QHeaderView.Fixed)
+    vertical_header.setDefaultSectionSize(view.fontMetrics().height() + 8)
+
+    metrics = view.fontMetrics()
+    sample = min(model.rowCount(), sample_rows)
+    for col_idx in range(model.columnCount()):
+        texts = [model.headerData(col_idx, Qt.Horizontal)]
+        texts.extend(model.data(model.index(row_idx, col_idx)) or "" for row_idx in range(sample))
+        width = max(metrics.width(text) for text in texts) + 24
+        view.setColumnWidth(col_idx, min(width, 400))
+
+    view.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+    view.horizontalHeader().setStretchLastSection(True)
+
+
+# ===== 分页读取表数据的模型 =====
+class TablePageModel(ResultTableModel):
+    """
+    行数取自解释器, 单元格所在的页在显示时才读取(get_table_page),
+    只保留最近访问的 MAX_PAGES 页, 浏览千万行的表也只占用几页的内存
+    """
+    PAGE_SIZE = 500
+    MAX_PAGES = 8
+
+    def __init__(self, db, table_name, parent=None):
+        super().__init__(list(db.tables[table_name]['columns']), [], parent)
+        self.db = db
+        self.table_name = table_name
+        self.total_rows = db.get_table_row_count(table_name)
+        self.pages = OrderedDict()  # 页号 -> 行列表, 按最近访问排序
+
+    def row(self, row_idx):
+        page = self._page(row_idx // self.PAGE_SIZE)
+        row_offset = row_idx % self.PAGE_SIZE
+        if row_offset >= len(page):  # 打开对话框后有行被删除
+            return None
+        return page[row_offset]
+
+    def _page(self, number):
+        page = self.pages.get(number)
+        if page is None:
+            page = self.db.get_table_page(self.table_name, number * self.PAGE_SIZE, self.PAGE_SIZE)
+            self.pages[number] = page
+            if len(self.pages) > self.MAX_PAGES:
+                self.pages.popitem(last=False)
+        else:
+            self.pages.move_to_end(number)
+        return page
+
+
 # ===== 表数据预览对话框 =====
 class TableDataPreviewDialog(QDialog):
-    def __init__(self, table_name, table_data, db, parent=None):
+    def __init__(self, table_name, db, parent=None):
         super().__init__(parent)
         self.data_table = None
+        self.model = None
         self.table_name = table_name
         self.db = db
+        self.writable = True
+        self.edit_dialog = None  # 打开中的编辑对话框
         self._init_base_ui()  # 初始化基础布局
         self.refresh_data()  # 初始化加载数据
         self.setMinimumSize(800, 600)
@@ -383,73 +585,262 @@ class TableDataPreviewDialog(QDialog):
         """初始化表格控件（可重用）"""
         if self.data_table:
             self.data_table.deleteLater()
-        self.data_table = QTableWidget()
+        self.data_table = QTableView()
         self.data_layout.addWidget(self.data_table)
-        self.data_table.setSortingEnabled(True)
 
     def update_table(self):
         """核心数据更新方法"""
         self._init_table()  # 重建表格控件
-        table_data = self.table_data
-        if not table_data:
+        if not self.model.total_rows:
             self._show_empty_state()
             return
 
-        # 更新表格结构
-        columns = list(table_data[0].keys())
-        self.data_table.setColumnCount(len(columns))
-        self.data_table.setHorizontalHeaderLabels(columns)
-        self.data_table.setRowCount(len(table_data))
-
-        # 填充数据
-        for row_idx, row in enumerate(table_data):
-            for col_idx, col in enumerate(columns):
-                item = QTableWidgetItem(str(row.get(col, "")))
-                self.data_table.setItem(row_idx, col_idx, item)
-
-        # 保持原有交互状态
-        self.data_table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
-        self.data_table.horizontalHeader().setStretchLastSection(True)
+        # 只显示模型, 数据在滚动到相应位置时才按页读取
+        show_model(self.data_table, self.model)
+        self.data_group.setTitle(f"{self.table_name} (共 {self.model.total_rows} 行)")
 
     def refresh_data(self):
-        """优化后的刷新逻辑"""
+        """重新读取行数, 丢弃已缓存的页"""
         try:
-            self.table_data = self.db.get_table_data(self.table_name)
+            self.model = TablePageModel(self.db, self.table_name, self)
             self.update_table()  # 仅更新表格内容
         except Exception as e:
             QMessageBox.critical(self, "错误", f"刷新失败: {str(e)}")
 
     def edit_data(self):
-        if not self.table_data:
+        if not self.model or not self.model.total_rows:
             QMessageBox.information(self, "信息", "表中没有数据可编辑")
             return
 
-        # 获取列名
-        columns = list(self.table_data[0].keys()) if self.table_data else []
-
         # 打开编辑对话框
-        edit_dialog = EditTableDialog(self.table_name, self.table_data, columns, self.db, self)
-        if edit_dialog.exec_():
-            self.refresh_data()
+        self.edit_dialog = EditTableDialog(self.table_name, self.db, self)
+        self.edit_dialog.set_writable(self.writable)
+        try:
+            if self.edit_dialog.exec_():
+                self.refresh_data()
+        finally:
+            self.edit_dialog = None
+
+    def on_busy_changed(self, busy):
+        """后台线程执行SQL期间禁用编辑, 见 AdvancedSQLInterpreterGUI.busy_changed"""
+        self.writable = not busy
+        self.edit_btn.setEnabled(self.writable)
+        if self.edit_dialog is not None:
+            self.edit_dialog.set_writable(self.writable)
 
     def _show_empty_state(self):
         """空数据状态处理"""
-        self.data_table.setColumnCount(1)
-        self.data_table.setHorizontalHeaderLabels(["信息"])
-        self.data_table.setRowCount(1)
-        self.data_table.setItem(0, 0, QTableWidgetItem("表中没有数据"))
+        self.data_group.setTitle(self.table_name)
+        empty = QTableWidget(1, 1)
+        empty.setHorizontalHeaderLabels(["信息"])
+        empty.setItem(0, 0, QTableWidgetItem("表中没有数据"))
+        self.data_table.deleteLater()
+        self.data_table = empty
+        self.data_layout.addWidget(self.data_table)
+
+
+# ===== 后台执行线程 =====
+class QueryWorker(QThread):
+    """
+    在后台线程中解析并执行SQL, 界面线程不被长时间运行的查询阻塞;
+    每条语句执行完即发出 result_ready, cancel() 在扫描的下一批行之前生效
+    """
+    result_ready = pyqtSignal(int, object)  # 语句序号, 执行结果
+    progress = pyqtSignal(int, int)  # 已完成的语句数, 已扫描的行数
+    failed = pyqtSignal(str)  # 词法/语法分析错误
+    PROGRESS_INTERVAL = 0.1  # 进度信号的最小间隔(秒)
+
+    def __init__(self, db, sql, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.sql = sql
+        self.control = ExecutionControl(self._on_progress, self._on_result)
+        self._last_progress = 0.0
+        self.error = None
+
+    def run(self):
+        try:
+            self.db.run_sql(self.sql, control=self.control)
+        except Exception as e:  # 词法/语法错误, 语句执行错误在结果中返回
+            self.error = str(e)
+            self.failed.emit(self.error)
+
+    def cancel(self):
+        self.control.cancel()
+
+    def _on_progress(self, control):
+        now = time.perf_counter()
+        if now - self._last_progress >= self.PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.progress.emit(control.statements_done, control.rows_scanned)
+
+    def _on_result(self, index, result):
+        self.result_ready.emit(index, result)
+        self.progress.emit(self.control.statements_done, self.control.rows_scanned)
+
+
+# ===== 执行指标 =====
+class SignalMetricsHook(MetricsHook):
+    """把每批语句的执行指标通过信号转发到界面线程"""
+
+    def __init__(self, signal):
+        self.signal = signal
+
+    def on_batch(self, batch):
+        self.signal.emit(batch)
+
+
+class MetricsPanel(QDockWidget):
+    """最近执行的语句的耗时与扫描行数, 双击查看 cProfile 报告"""
+    MAX_ROWS = 200
+    COLUMNS = ["语句", "总耗时(ms)", "计划(ms)", "执行(ms)", "扫描行数", "过滤行数",
+               "返回行数", "索引命中", "内存峰值(KB)", "错误"]
+
+    def __init__(self, parent=None):
+        super().__init__("执行指标", parent)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.itemDoubleClicked.connect(self.show_profile)
+        self.setWidget(self.table)
+
+    def add_batch(self, batch):
+        ms = lambda seconds: f"{seconds * 1000:.3f}"
+        for metrics in batch.statements:
+            peak = "" if metrics.peak_bytes is None else f"{metrics.peak_bytes / 1024:.1f}"
+            values = [f"{metrics.index + 1}. {metrics.statement_type}", ms(metrics.total),
+                      ms(metrics.phases.get('plan', 0.0)), ms(metrics.phases.get('execute', 0.0)),
+                      metrics.rows_scanned, metrics.rows_filtered, metrics.rows_returned,
+                      metrics.index_hits, peak, metrics.error or ""]
+            self.table.insertRow(0)  # 最新的在最上面
+            for col, value in enumerate(values):
+                item = QTableWidgetItem(str(value))
+                if col == 0:
+                    item.setData(Qt.UserRole, metrics.profile)
+                self.table.setItem(0, col, item)
+        while self.table.rowCount() > self.MAX_ROWS:
+            self.table.removeRow(self.table.rowCount() - 1)
+
+    def show_profile(self, item):
+        profile = self.table.item(item.row(), 0).data(Qt.UserRole)
+        if not profile:
+            QMessageBox.information(self, "性能分析", "该语句没有 cProfile 报告, 请在\"查询\"菜单中开启 CPU 分析后重新执行")
+            return
+        dialog = QDialog(self)
+        dialog.setWindowTitle("cProfile 报告")
+        dialog.resize(900, 500)
+        text = QTextEdit()
+        text.setReadOnly(True)
+        text.setFont(QFont("Consolas", 9))
+        text.setPlainText(profile)
+        layout = QVBoxLayout(dialog)
+        layout.addWidget(text)
+        dialog.exec_()
+
+
+class SlowQueryDialog(QDialog):
+    """慢查询汇总: 按总耗时排序的规范化 SQL, 选中一行显示最近一次的执行计划和指标"""
+    COLUMNS = ["SQL", "次数", "总耗时(ms)", "平均(ms)", "最大(ms)", "扫描行数"]
+
+    def __init__(self, slow_log, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"慢查询 (阈值 {slow_log.threshold_ms:g} ms)")
+        self.setMinimumSize(900, 500)
+        self.slow_log = slow_log
+        self.entries = []
+
+        layout = QVBoxLayout(self)
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.currentCellChanged.connect(self.show_entry)
+
+        self.detail = QTextEdit()
+        self.detail.setReadOnly(True)
+        self.detail.setFont(QFont("Consolas", 9))
+
+        splitter = QSplitter(Qt.Vertical)
+        splitter.addWidget(self.table)
+        splitter.addWidget(self.detail)
+        layout.addWidget(splitter)
+
+        btn_layout = QHBoxLayout()
+        refresh_btn = QPushButton("刷新")
+        refresh_btn.clicked.connect(self.refresh)
+        clear_btn = QPushButton("清空")
+        clear_btn.clicked.connect(self.clear)
+        btn_layout.addWidget(refresh_btn)
+        btn_layout.addWidget(clear_btn)
+        btn_layout.addStretch()
+        layout.addLayout(btn_layout)
+
+        self.refresh()
+
+    def refresh(self):
+        self.entries = self.slow_log.top()
+        self.table.setRowCount(len(self.entries))
+        for row_idx, entry in enumerate(self.entries):
+            values = [entry['sql'], entry['count'], entry['total_ms'], entry['mean_ms'],
+                      entry['max_ms'], entry['rows_scanned']]
+            for col_idx, value in enumerate(values):
+                self.table.setItem(row_idx, col_idx, QTableWidgetItem(str(value)))
+        self.detail.clear()
+
+    def clear(self):
+        self.slow_log.clear()
+        self.refresh()
+
+    def show_entry(self, row_idx, *args):
+        if not 0 <= row_idx < len(self.entries):
+            return
+        last = self.entries[row_idx]['last']
+        lines = [last['sql'], ""]
+        if last['plan']:
+            lines.extend(last['plan'])
+            lines.append("")
+        for key in ('time', 'total_ms', 'phases_ms', 'rows_scanned', 'rows_filtered', 'rows_returned',
+                    'index_hits', 'peak_bytes', 'error'):
+            lines.append(f"{key}: {last[key]}")
+        self.detail.setPlainText("\n".join(lines))
 
 
 # ===== 增强版SQL解释器图形界面 =====
 class AdvancedSQLInterpreterGUI(QMainWindow):
+    db_changed = pyqtSignal(object)  # 解释器的变更事件, 跨线程转发到界面线程
+    metrics_ready = pyqtSignal(object)  # 每批语句的执行指标(BatchMetrics)
+    busy_changed = pyqtSignal(bool)  # 后台线程开始/结束执行SQL, 执行期间禁用数据库浏览器中的写操作
+    SLOW_QUERY_MS = 100  # 慢查询阈值
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("高级SQL解释器")
         self.setGeometry(100, 100, 1200, 800)
 
         self.db = SQLInterpreter()
+        self.worker = None  # 正在执行SQL的后台线程
+        self.table_items = {}  # 表名 -> 数据库浏览器中的表节点
+        self.pending_changes = []  # 尚未应用到数据库浏览器的变更事件
         self.init_ui()
 
+        # 数据库浏览器按变更事件增量更新, 事件攒 100ms 后统一应用
+        self.browser_timer = QTimer(self)
+        self.browser_timer.setSingleShot(True)
+        self.browser_timer.setInterval(100)
+        self.browser_timer.timeout.connect(self.apply_db_changes)
+        self.db_changed.connect(self.on_db_changed)
+        self.db.add_listener(self.db_changed.emit)
+
+        self.metrics_ready.connect(self.on_metrics)
+        self.db.add_hook(SignalMetricsHook(self.metrics_ready))
+        self.db.enable_slow_log(threshold_ms=self.SLOW_QUERY_MS)  # 只在内存中汇总, 不写文件
+
     def init_ui(self):
         # 创建菜单栏
         self.create_menu_bar()
@@ -474,15 +865,31 @@ class AdvancedSQLInterpreterGUI(QMainWindow):
         self.setStatusBar(self.status_bar)
         self.status_label = QLabel("就绪")
         self.status_bar.addWidget(self.status_label)
+        self.metrics_label = QLabel()  # 上一批语句的耗时
+        self.status_bar.addPermanentWidget(self.metrics_label)
+
+        # 执行指标面板, 默认隐藏, 在"查询"菜单中打开
+        self.metrics_panel = MetricsPanel(self)
+        self.addDockWidget(Qt.BottomDockWidgetArea, self.metrics_panel)
+        self.metrics_panel.hide()
+        self.query_menu.addSeparator()
+        self.query_menu.addAction(self.metrics_panel.toggleViewAction())
 
         # 执行按钮
         self.execute_btn = QPushButton("执行 SQL")
         self.execute_btn.setIcon(QIcon.fromTheme("system-run"))
         self.execute_btn.clicked.connect(self.execute_sql)
 
+        # 取消按钮, 执行期间可用
+        self.cancel_btn = QPushButton("取消")
+        self.cancel_btn.setIcon(QIcon.fromTheme("process-stop"))
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_sql)
+
         # 按钮区域
         btn_layout = QHBoxLayout()
         btn_layout.addWidget(self.execute_btn)
+        btn_layout.addWidget(self.cancel_btn)
         btn_layout.addStretch()
 
         # 结果区域
@@ -552,6 +959,19 @@ class AdvancedSQLInterpreterGUI(QMainWindow):
         execute_action.triggered.connect(self.execute_sql)
         query_menu.addAction(execute_action)
 
+        self.memory_action = QAction("记录内存峰值", self, checkable=True)
+        self.memory_action.toggled.connect(self.update_profiling)
+        query_menu.addAction(self.memory_action)
+
+        self.cpu_action = QAction("CPU 分析(cProfile)", self, checkable=True)
+        self.cpu_action.toggled.connect(self.update_profiling)
+        query_menu.addAction(self.cpu_action)
+        self.query_menu = query_menu
+
+        slow_action = QAction("慢查询汇总", self)
+        slow_action.triggered.connect(self.show_slow_queries)
+        query_menu.addAction(slow_action)
+
         # 数据库菜单
         db_menu = menu_bar.addMenu("数据库")
 
@@ -617,56 +1037,92 @@ class AdvancedSQLInterpreterGUI(QMainWindow):
             self.status_label.setText("错误: SQL语句为空")
             return
 
-        try:
-            self.status_label.setText("正在执行...")
-            self.status_bar.repaint()
-
-            # 解析和执行
-            tokens = sql_lexer(sql)
-            ast = sql_parser(tokens)
-            results = self.db.execute(ast)
-
-            # 清空现有结果并重新渲染
-            while self.result_tabs.count() > 0:
-                self.result_tabs.removeTab(0)
-
-            for i, result in enumerate(results):
-                if isinstance(result, tuple) and result[0] == 'select':
-                    self.display_result(result[1], f"查询结果 { i +1}")
-                elif isinstance(result, tuple) and result[0] == 'error':
-                    self.display_error(result[1])
-                else:
-                    self.display_message(result)
-
-            # 更新数据库浏览器
-            self.update_db_browser()
-            self.status_label.setText("执行完成")
+        if self.worker is not None:
+            self.status_label.setText("上一次执行尚未结束")
+            return
 
-        except Exception as e:
-            self.display_error(f"执行错误: {str(e)}")
-            self.status_label.setText(f"错误: {str(e)}")
+        # 清空现有结果, 每条语句执行完后立即显示其结果
+        while self.result_tabs.count() > 0:
+            self.result_tabs.removeTab(0)
+
+        self.status_label.setText("正在执行...")
+        self.execute_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+
+        # 在后台线程中解析和执行
+        self.worker = QueryWorker(self.db, sql, self)
+        self.worker.result_ready.connect(self.on_statement_result)
+        self.worker.progress.connect(self.on_execution_progress)
+        self.worker.failed.connect(self.on_execution_failed)
+        self.worker.finished.connect(self.on_execution_finished)
+        self.worker.start()
+        self.busy_changed.emit(True)
+
+    def cancel_sql(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            self.cancel_btn.setEnabled(False)
+            self.status_label.setText("正在取消...")
+
+    def on_statement_result(self, index, result):
+        if isinstance(result, tuple) and result[0] == 'select':
+            self.display_result(result[1], f"查询结果 {index + 1}")
+        elif isinstance(result, tuple) and result[0] == 'error':
+            self.display_error(result[1])
+        else:
+            self.display_message(result)
+
+    def on_execution_progress(self, statements_done, rows_scanned):
+        self.status_label.setText(f"正在执行... 已完成 {statements_done} 条语句, 已扫描 {rows_scanned} 行")
+
+    def on_execution_failed(self, msg):
+        self.display_error(f"执行错误: {msg}")
+
+    def on_execution_finished(self):
+        control, error = self.worker.control, self.worker.error
+        self.worker.deleteLater()
+        self.worker = None
+        self.execute_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+        self.busy_changed.emit(False)
+
+        if error is not None:
+            self.status_label.setText(f"错误: {error}")
+        elif control.cancelled:
+            self.status_label.setText(f"已取消, 完成 {control.statements_done} 条语句")
+        else:
+            self.status_label.setText(f"执行完成, 共 {control.statements_done} 条语句, 扫描 {control.rows_scanned} 行")
+
+    def show_slow_queries(self):
+        SlowQueryDialog(self.db.slow_log, self).exec_()
+
+    def update_profiling(self):
+        self.db.enable_profiling(self.memory_action.isChecked(), self.cpu_action.isChecked())
+
+    def on_metrics(self, batch):
+        scanned = sum(metrics.rows_scanned for metrics in batch.statements)
+        returned = sum(metrics.rows_returned for metrics in batch.statements)
+        phases = ", ".join(f"{name} {seconds * 1000:.1f}" for name, seconds in batch.phases.items())
+        self.metrics_label.setText(
+            f"耗时 {batch.total * 1000:.1f} ms" + (f" ({phases})" if phases else "")
+            + f", 扫描 {scanned} 行, 返回 {returned} 行")
+        self.metrics_panel.add_batch(batch)
+
+    def closeEvent(self, event):
+        """关闭窗口前取消并等待正在执行的SQL"""
+        if self.worker is not None:
+            self.worker.cancel()
+            self.worker.wait()
+        super().closeEvent(event)
 
     def display_result(self, data, tab_name="结果"):
         """通用结果显示方法"""
-        table_widget = QTableWidget()
-        table_widget.setEditTriggers(QTableWidget.NoEditTriggers)
-        table_widget.setAlternatingRowColors(True)
-
-        if data:
-            # 获取列名
-            columns = list(data[0].keys()) if isinstance(data[0], dict) else []
-            table_widget.setColumnCount(len(columns))
-            table_widget.setHorizontalHeaderLabels(columns)
-
-            # 设置表格内容
-            table_widget.setRowCount(len(data))
-            for row_idx, row_data in enumerate(data):
-                for col_idx, col_name in enumerate(columns):
-                    item = QTableWidgetItem(str(row_data.get(col_name, "")))
-                    table_widget.setItem(row_idx, col_idx, item)
-
-            # 调整列宽以适应内容
-            table_widget.resizeColumnsToContents()
+        table_widget = QTableView()
+        table_widget.setEditTriggers(QAbstractItemView.NoEditTriggers)
+
+        # 获取列名
+        columns = list(data[0].keys()) if data and isinstance(data[0], dict) else []
+        show_model(table_widget, ResultTableModel(columns, data if columns else [], table_widget))
 
         self.result_tabs.addTab(table_widget, tab_name)
         self.result_tabs.setCurrentWidget(table_widget)
@@ -693,46 +1149,129 @@ class AdvancedSQLInterpreterGUI(QMainWindow):
         self.result_tabs.removeTab(index)
 
     def update_db_browser(self):
-        """更新数据库浏览器"""
+        """完整重建数据库浏览器(初始化和手动刷新时使用), 保留各节点的展开状态"""
+        first_build = self.db_browser.topLevelItemCount() == 0
+        expanded = set()
+        iterator = QTreeWidgetItemIterator(self.db_browser)
+        while iterator.value():
+            item = iterator.value()
+            if item.isExpanded():
+                expanded.add(self._browser_key(item))
+            iterator += 1
+
         self.db_browser.clear()
+        self.table_items = {}
+        self.pending_changes = []  # 重建时读取的就是当前状态, 尚未应用的事件作废
 
         # 添加数据库节点
-        db_item = QTreeWidgetItem([f"main ({len(self.db.tables)} 张表)"])
-        db_item.setData(0, Qt.UserRole, {"type": "database", "name": "main"})
-        self.db_browser.addTopLevelItem(db_item)
+        self.db_item = QTreeWidgetItem()
+        self.db_item.setData(0, Qt.UserRole, {"type": "database", "name": "main"})
+        self.db_browser.addTopLevelItem(self.db_item)
 
         # 添加表节点
         for table_name in sorted(self.db.tables.keys()):
-            table = self.db.tables[table_name]
-            table_item = QTreeWidgetItem([f"{table_name} ({len(table['data'])} 条记录)"])
-            table_item.setData(0, Qt.UserRole, {"type": "table", "name": table_name})
-
-            # 添加列子节点
-            columns_item = QTreeWidgetItem(["列"])
-            columns_item.setData(0, Qt.UserRole, {"type": "columns", "table": table_name})
-
-            for col_name, col_data in table['columns'].items():
-                col_item = QTreeWidgetItem([f"{col_name} ({col_data['type']})"])
-                col_item.setData(0, Qt.UserRole, {"type": "column", "table": table_name, "name": col_name})
-                columns_item.addChild(col_item)
-
-            table_item.addChild(columns_item)
-
-            # 添加索引子节点（当前简化实现，实际需要解析索引信息）
-            indexes_item = QTreeWidgetItem(["索引"])
-            indexes_item.setData(0, Qt.UserRole, {"type": "indexes", "table": table_name})
-
-            # 如果有主键，添加为主键索引
-            if table['primary_key']:
-                pk_item = QTreeWidgetItem([f"PRIMARY ({table['primary_key']})"])
-                pk_item.setData(0, Qt.UserRole, {"type": "index", "table": table_name, "name": "PRIMARY"})
-                indexes_item.addChild(pk_item)
-
-            table_item.addChild(indexes_item)
-
-            db_item.addChild(table_item)
-
-        self.db_browser.expandAll()
+            self.db_item.addChild(self._make_table_item(table_name))
+        self._update_db_item_text()
+
+        if first_build:
+            self.db_browser.expandAll()
+        else:
+            iterator = QTreeWidgetItemIterator(self.db_browser)
+            while iterator.value():
+                item = iterator.value()
+                item.setExpanded(self._browser_key(item) in expanded)
+                iterator += 1
+
+    def _browser_key(self, item):
+        """节点在重建前后不变的标识"""
+        item_data = item.data(0, Qt.UserRole) or {}
+        return item_data.get("type"), item_data.get("table"), item_data.get("name")
+
+    def _make_table_item(self, table_name):
+        """创建表节点及其列、索引子节点"""
+        table = self.db.tables[table_name]
+        table_item = QTreeWidgetItem()
+        table_item.setData(0, Qt.UserRole, {"type": "table", "name": table_name})
+        self.table_items[table_name] = table_item
+        self._set_table_row_count(table_item, len(table['data']))
+        self._fill_table_item(table_item, table_name, table)
+        return table_item
+
+    def _fill_table_item(self, table_item, table_name, table):
+        # 添加列子节点
+        columns_item = QTreeWidgetItem(["列"])
+        columns_item.setData(0, Qt.UserRole, {"type": "columns", "table": table_name})
+
+        for col_name, col_data in table['columns'].items():
+            col_item = QTreeWidgetItem([f"{col_name} ({col_data['type']})"])
+            col_item.setData(0, Qt.UserRole, {"type": "column", "table": table_name, "name": col_name})
+            columns_item.addChild(col_item)
+
+        table_item.addChild(columns_item)
+
+        # 添加索引子节点（当前简化实现，实际需要解析索引信息）
+        indexes_item = QTreeWidgetItem(["索引"])
+        indexes_item.setData(0, Qt.UserRole, {"type": "indexes", "table": table_name})
+
+        # 如果有主键，添加为主键索引
+        if table['primary_key']:
+            pk_item = QTreeWidgetItem([f"PRIMARY ({table['primary_key']})"])
+            pk_item.setData(0, Qt.UserRole, {"type": "index", "table": table_name, "name": "PRIMARY"})
+            indexes_item.addChild(pk_item)
+
+        table_item.addChild(indexes_item)
+
+    def _set_table_row_count(self, table_item, count):
+        table_item.setData(0, Qt.UserRole + 1, count)
+        table_item.setText(0, f"{table_item.data(0, Qt.UserRole)['name']} ({count} 条记录)")
+
+    def _update_db_item_text(self):
+        self.db_item.setText(0, f"main ({len(self.table_items)} 张表)")
+
+    def on_db_changed(self, event):
+        """解释器的变更事件(可能来自执行线程), 攒一批后统一应用到数据库浏览器"""
+        self.pending_changes.append(event)
+        if not self.browser_timer.isActive():
+            self.browser_timer.start()
+
+    def apply_db_changes(self):
+        """只修改受影响的节点, 其余节点及其展开状态不变"""
+        changes, self.pending_changes = self.pending_changes, []
+        row_deltas = {}
+        for event in changes:
+            table_name = event['table']
+            if event['type'] == 'rows':
+                row_deltas[table_name] = row_deltas.get(table_name, 0) + event['delta']
+            elif event['type'] == 'dropped':
+                row_deltas.pop(table_name, None)
+                table_item = self.table_items.pop(table_name, None)
+                if table_item is not None:
+                    self.db_item.removeChild(table_item)
+            elif event['type'] == 'created':
+                row_deltas.pop(table_name, None)
+                if table_name in self.table_items or table_name not in self.db.tables:
+                    continue
+                table_item = self._make_table_item(table_name)
+                # 按表名顺序插入
+                names = sorted(self.table_items)
+                self.db_item.insertChild(names.index(table_name), table_item)
+                table_item.setExpanded(True)
+                for i in range(table_item.childCount()):
+                    table_item.child(i).setExpanded(True)
+            elif event['type'] == 'altered':
+                table_item = self.table_items.get(table_name)
+                if table_item is not None and table_name in self.db.tables:
+                    expanded = [table_item.child(i).isExpanded() for i in range(table_item.childCount())]
+                    table_item.takeChildren()
+                    self._fill_table_item(table_item, table_name, self.db.tables[table_name])
+                    for i, is_expanded in enumerate(expanded[:table_item.childCount()]):
+                        table_item.child(i).setExpanded(is_expanded)
+
+        for table_name, delta in row_deltas.items():
+            table_item = self.table_items.get(table_name)
+            if table_item is not None and delta:
+                self._set_table_row_count(table_item, table_item.data(0, Qt.UserRole + 1) + delta)
+        self._update_db_item_text()
 
     def show_db_context_menu(self, position):
         """显示数据库浏览器的右键菜单"""
@@ -763,6 +1302,7 @@ class AdvancedSQLInterpreterGUI(QMainWindow):
             menu.addSeparator()
 
             drop_table_action = menu.addAction("删除表")
+            drop_table_action.setEnabled(self.worker is None)  # 执行SQL期间不能删除表
             drop_table_action.triggered.connect(lambda: self.drop_table(item_data['name']))
 
         elif item_data['type'] == 'column':
@@ -786,9 +1326,13 @@ class AdvancedSQLInterpreterGUI(QMainWindow):
     def view_table_data(self, table_name):
         """查看表数据"""
         try:
-            table_data = self.db.get_table_data(table_name)
-            dialog = TableDataPreviewDialog(table_name, table_data, self.db, self)
-            dialog.exec_()
+            dialog = TableDataPreviewDialog(table_name, self.db, self)
+            dialog.on_busy_changed(self.worker is not None)
+            self.busy_changed.connect(dialog.on_busy_changed)
+            try:
+                dialog.exec_()
+            finally:
+                self.busy_changed.disconnect(dialog.on_busy_changed)
         except Exception as e:
             QMessageBox.critical(self, "错误", f"查看表数据失败: {str(e)}")
 
@@ -824,6 +1368,9 @@ class AdvancedSQLInterpreterGUI(QMainWindow):
 
     def drop_table(self, table_name):
         """删除表"""
+        if self.worker is not None:  # 与执行中的语句共用会话, 且会在界面线程中等待表锁
+            self.status_label.setText("正在执行SQL, 请等待执行结束后再删除表")
+            return
         reply = QMessageBox.question(
             self, "确认删除",
             f"确定要删除表 '{table_name}' 吗？此操作将永久删除所有数据！",
@@ -836,10 +1383,7 @@ class AdvancedSQLInterpreterGUI(QMainWindow):
                 sql = f"DROP TABLE {table_name};"
                 tokens = sql_lexer(sql)
                 ast = sql_parser(tokens)
-                results = self.db.execute(ast)
-
-                # 更新数据库浏览器
-                self.update_db_browser()
+                results = self.db.execute(ast)  # 数据库浏览器由 TABLE_DROPPED 事件更新
 
                 # 显示结果
                 if results and isinstance(results[0], str):
@@ -907,6 +1451,11 @@ class AdvancedSQLInterpreterGUI(QMainWindow):
             "- CREATE TABLE (PRIMARY KEY/NOT NULL/UNIQUE)\n"
             "- INSERT/SELECT/UPDATE/DELETE\n"
             "- WHERE/ORDER BY/LIMIT/GROUP BY/HAVING\n"
+            "- 事务 (BEGIN/COMMIT/ROLLBACK)\n"
+            "- 查询计划 (EXPLAIN / EXPLAIN ANALYZE / ANALYZE)\n"
+            "- 表连接 (INNER JOIN / LEFT JOIN / JOIN ... USING)\n"
+            "- 字典编码的 VARCHAR 列 (DICTIONARY)\n"
+            "- 物化视图 (CREATE / REFRESH / DROP MATERIALIZED VIEW)\n"
             "- 聚合函数 (COUNT/SUM/AVG/MIN/MAX)\n"
             "- 基本表达式和运算符\n\n"
             "界面功能:\n"
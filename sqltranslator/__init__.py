@@ -0,0 +1,33 @@
+"""
+SQL 解释器核心包（纯 Python, 不依赖任何 GUI 库）
+
+子模块按需加载: 仅 ``import sqltranslator`` 不会导入词法/语法/解释器模块,
+首次访问 ``sqltranslator.sql_lexer`` 等属性时才真正加载, 以缩短启动时间.
+"""
+
+import importlib
+
+# 对外导出的名称 -> 所在子模块
+_EXPORTS = {
+    'sql_lexer': 'lexer',
+    'sql_parser': 'parser',
+    'SQLInterpreter': 'interpreter',
+    'KEYWORDS': 'lexer',
+    'OPERATORS': 'lexer',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    """延迟导入 (PEP 562)"""
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value  # 缓存, 之后的访问不再经过 __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
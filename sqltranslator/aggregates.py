@@ -0,0 +1,143 @@
+"""
+聚合函数累加器
+
+每个分组、每个聚合函数各持有一个累加器, 逐行调用 add(value), 最后调用 result().
+NULL 值不参与聚合(COUNT(*) 除外); DISTINCT 聚合只累加第一次出现的值.
+SUM/AVG 把值转换为浮点数, 存在无法转换的值时结果为 NULL;
+MIN/MAX 能转换为数字时按数值比较, 否则按原值比较.
+"""
+
+AGGREGATE_FUNCTIONS = ('COUNT', 'SUM', 'AVG', 'MIN', 'MAX')
+
+
+def is_aggregate(col):
+    """SELECT 列是否为聚合函数"""
+    return isinstance(col, dict) and col.get('name') in AGGREGATE_FUNCTIONS
+
+
+def aggregate_name(col):
+    """聚合函数在结果中的列名: 别名, 或 FUNC(arg)"""
+    if col.get('alias'):
+        return col['alias']
+    arg = f"DISTINCT {col['arg']}" if col.get('distinct') else col['arg']
+    return f"{col['name']}({arg})"
+
+
+class _Accumulator:
+    __slots__ = ('seen',)
+
+    def __init__(self, distinct=False):
+        self.seen = set() if distinct else None
+
+    def add(self, value):
+        if value is None:
+            return
+        if self.seen is not None:
+            if value in self.seen:
+                return
+            self.seen.add(value)
+        self._add(value)
+
+
+class CountStar:
+    """COUNT(*): 统计行数"""
+    __slots__ = ('count',)
+
+    def __init__(self, distinct=False):
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+
+    def result(self):
+        return self.count
+
+
+class Count(_Accumulator):
+    __slots__ = ('count',)
+
+    def __init__(self, distinct=False):
+        super().__init__(distinct)
+        self.count = 0
+
+    def _add(self, value):
+        self.count += 1
+
+    def result(self):
+        return self.count
+
+
+class Sum(_Accumulator):
+    __slots__ = ('total', 'count', 'invalid')
+
+    def __init__(self, distinct=False):
+        super().__init__(distinct)
+        self.total = 0.0
+        self.count = 0
+        self.invalid = False
+
+    def _add(self, value):
+        try:
+            self.total += float(value)
+            self.count += 1
+        except (TypeError, ValueError):
+            self.invalid = True
+
+    def result(self):
+        if self.invalid or not self.count:
+            return None
+        return self.total
+
+
+class Avg(Sum):
+    __slots__ = ()
+
+    def result(self):
+        if self.invalid or not self.count:
+            return None
+        return self.total / self.count
+
+
+class Min(_Accumulator):
+    __slots__ = ('number', 'raw', 'numeric')
+
+    def __init__(self, distinct=False):
+        super().__init__(distinct)
+        self.number = None  # 数值比较的当前结果
+        self.raw = None  # 原值比较的当前结果
+        self.numeric = True  # 所有值都能转换为数字
+
+    def _better(self, a, b):
+        return a < b
+
+    def _add(self, value):
+        if self.raw is None or self._better(value, self.raw):
+            self.raw = value
+        if self.numeric:
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                self.numeric = False
+                return
+            if self.number is None or self._better(number, self.number):
+                self.number = number
+
+    def result(self):
+        return self.number if self.numeric else self.raw
+
+
+class Max(Min):
+    __slots__ = ()
+
+    def _better(self, a, b):
+        return a > b
+
+
+_ACCUMULATORS = {'SUM': Sum, 'AVG': Avg, 'MIN': Min, 'MAX': Max, 'COUNT': Count}
+
+
+def accumulator_factory(col):
+    """返回为某个聚合列创建累加器的函数"""
+    distinct = col.get('distinct', False)
+    cls = CountStar if col['name'] == 'COUNT' and col['arg'] == '*' else _ACCUMULATORS[col['name']]
+    return lambda: cls(distinct)
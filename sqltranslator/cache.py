@@ -0,0 +1,102 @@
+"""
+SELECT 查询结果缓存(可选, 见 SQLInterpreter.enable_result_cache)
+
+缓存项以规范化后的语法树为键, 并记下查询读取的每张表当时的版本号(table['version']).
+表的每次修改(见 transaction.py)都会取一个新的版本号, 查找时版本号与当前不一致的缓存项即失效.
+版本号在执行查询之前读取, 查询期间并发提交的修改只会让缓存项提前失效, 不会返回过期结果.
+按结果占用的内存估计值做 LRU 淘汰, 总量不超过 max_bytes.
+只缓存不在显式事务中、且读取的表都没有被其他事务修改的查询(此时读到的就是已提交的数据).
+"""
+
+import sys
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+def statement_key(node):
+    """语法树 -> 可哈希的键: 字典按键排序, 列表转为元组"""
+    if isinstance(node, dict):
+        return tuple(sorted((key, statement_key(value)) for key, value in node.items()))
+    if isinstance(node, list):
+        return tuple(statement_key(item) for item in node)
+    return node
+
+
+def _result_size(columns, rows):
+    """结果占用内存的估计值(字节)"""
+    size = sys.getsizeof(rows) + sum(sys.getsizeof(name) for name in columns)
+    for values in rows:
+        size += sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)
+    return size
+
+
+class ResultCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # 键 -> (版本号, 列名, 行元组列表, 字节数), 按最近使用排序
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0  # 因表被修改而失效的次数(计入 misses)
+        self.evictions = 0
+
+    def lookup(self, key, versions):
+        """
+        :param versions: 查询读取的各表当前的版本号
+        :return: 结果行(新建的字典列表, 调用方可以修改), 未命中时返回 None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != versions:
+                self._remove(key)
+                self.stale += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        columns = entry[1]
+        return [dict(zip(columns, values)) for values in entry[2]]
+
+    def store(self, key, versions, rows):
+        """保存查询结果; 版本号必须在执行查询之前读取"""
+        columns = list(rows[0]) if rows else []
+        values = [tuple(row.values()) for row in rows]
+        size = _result_size(columns, values)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (versions, columns, values, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        self.bytes -= self._entries.pop(key)[3]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """命中率等统计信息"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'stale': self.stale,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,255 @@
+"""
+命令行 / 批处理入口（无界面）
+
+用法:
+    python -m sqltranslator run script.sql [--format table|csv|jsonl] [--timing] [--stop-on-error]
+    python -m sqltranslator serve [--host 127.0.0.1] [--port 15432] [--unix PATH] [--init script.sql]
+两个命令都可以用 --slow-log PATH [--slow-threshold-ms N] [--slow-sample R] 开启慢查询日志(见 slowlog.py).
+
+查询结果写入标准输出（或 --output 指定的文件）, 执行状态与耗时写入标准错误,
+因此可以直接把结果重定向到文件或管道中供后续程序处理.
+存在执行失败的语句时退出码为 1.
+"""
+
+import argparse
+import csv
+import json
+import sys
+import time
+
+from .lexer import sql_lexer, split_statements
+from .parser import sql_parser
+from .interpreter import SQLInterpreter
+from .slowlog import DEFAULT_THRESHOLD_MS
+
+
+# ---------------------- 结果输出格式 ----------------------
+def _columns_of(rows):
+    """按首次出现顺序收集所有列名"""
+    columns = {}
+    for row in rows:
+        for col in row:
+            columns.setdefault(col, None)
+    return list(columns)
+
+
+def _cell(value):
+    return '' if value is None else str(value)
+
+
+def write_table(rows, out):
+    """输出为对齐的文本表格"""
+    if not rows:
+        out.write('(0 行)\n\n')
+        return
+    columns = _columns_of(rows)
+    headers = [_cell(col) for col in columns]
+    cells = [[_cell(row.get(col)) for col in columns] for row in rows]
+    widths = [max(len(h), *(len(r[i]) for r in cells)) for i, h in enumerate(headers)]
+
+    def line(values):
+        return ' | '.join(v.ljust(w) for v, w in zip(values, widths)).rstrip() + '\n'
+
+    out.write(line(headers))
+    out.write('-+-'.join('-' * w for w in widths) + '\n')
+    for r in cells:
+        out.write(line(r))
+    out.write(f'({len(rows)} 行)\n\n')
+
+
+def write_csv(rows, out):
+    """输出为 CSV（每个结果集带表头, 结果集之间空一行）"""
+    if not rows:
+        return
+    columns = _columns_of(rows)
+    writer = csv.writer(out)
+    writer.writerow([_cell(col) for col in columns])
+    for row in rows:
+        writer.writerow([_cell(row.get(col)) for col in columns])
+    out.write('\n')
+
+
+def write_jsonl(rows, out):
+    """输出为 JSON Lines（每行一个 JSON 对象）"""
+    for row in rows:
+        out.write(json.dumps(row, ensure_ascii=False, default=str) + '\n')
+
+
+FORMATTERS = {
+    'table': write_table,
+    'csv': write_csv,
+    'jsonl': write_jsonl,
+}
+
+
+# ---------------------- 批量执行 ----------------------
+def run_script(db, chunks, out, fmt='table', timing=False, stop_on_error=False, log=sys.stderr):
+    """
+    逐条流式执行 SQL 脚本
+    :param db: SQLInterpreter 实例
+    :param chunks: 可迭代的 SQL 文本块（如打开的文件）
+    :param out: 查询结果输出流
+    :param fmt: 输出格式, FORMATTERS 中的键
+    :param timing: 是否输出每条语句各阶段的耗时
+    :param stop_on_error: 遇到第一条失败的语句时停止执行
+    :param log: 状态信息输出流
+    :return: 失败的语句数
+    """
+    write_rows = FORMATTERS[fmt]
+    errors = 0
+    executed = 0
+    total_start = time.perf_counter()
+
+    for line_no, text in split_statements(chunks):
+        t0 = time.perf_counter()
+        try:
+            tokens = sql_lexer(text)
+            if not tokens:  # 只有注释或空白
+                continue
+            t1 = time.perf_counter()
+            ast = sql_parser(tokens)
+            t2 = time.perf_counter()
+            results = db.execute(ast, batch=db.new_batch(text, tokens, t1 - t0, t2 - t1))
+            t3 = time.perf_counter()
+        except Exception as e:  # 词法/语法错误
+            results = [('error', str(e))]
+            t1 = t2 = t3 = time.perf_counter()
+
+        executed += 1
+        failed = False
+        for result in results:
+            if isinstance(result, tuple) and result[0] == 'select':
+                write_rows(result[1], out)
+                status = f"返回 {len(result[1])} 行"
+            elif isinstance(result, tuple) and result[0] == 'error':
+                failed = True
+                status = f"错误: {result[1]}"
+            else:
+                status = str(result)
+
+            if timing:
+                status += (f"  (词法 {(t1 - t0) * 1000:.3f} ms, 语法 {(t2 - t1) * 1000:.3f} ms,"
+                           f" 执行 {(t3 - t2) * 1000:.3f} ms)")
+            log.write(f"[{executed}] 第{line_no}行: {status}\n")
+
+        if failed:
+            errors += 1
+            if stop_on_error:
+                log.write("遇到错误, 停止执行\n")
+                break
+
+    if db.session.txn is not None:
+        db.rollback()
+        log.write("脚本结束时事务尚未提交, 已回滚\n")
+
+    if timing:
+        log.write(f"共执行 {executed} 条语句, 失败 {errors} 条,"
+                  f" 总耗时 {(time.perf_counter() - total_start) * 1000:.3f} ms\n")
+        if db.result_cache is not None:
+            stats = db.result_cache.stats()
+            log.write(f"结果缓存: 命中 {stats['hits']} 次, 未命中 {stats['misses']} 次"
+                      f" (其中失效 {stats['stale']} 次), 命中率 {stats['hit_rate']:.1%},"
+                      f" {stats['entries']} 项 / {stats['bytes'] / 1024:.1f} KB\n")
+    out.flush()
+    return errors
+
+
+def write_slow_summary(slow_log, log=sys.stderr, n=5):
+    """慢查询汇总: 慢语句数和总耗时最多的前 n 条"""
+    log.write(f"慢查询: {slow_log.slow} 条 (阈值 {slow_log.threshold_ms} ms)\n")
+    for item in slow_log.top(n):
+        log.write(f"  {item['total_ms']:.3f} ms / {item['count']} 次  {item['sql']}\n")
+
+
+# ---------------------- 命令行参数 ----------------------
+def _enable_slow_log(db, args):
+    if args.slow_log:
+        db.enable_slow_log(args.slow_log, args.slow_threshold_ms, args.slow_sample)
+
+
+def _cmd_run(args):
+    db = SQLInterpreter()
+    if args.result_cache:
+        db.enable_result_cache(int(args.result_cache * 1024 * 1024))
+    _enable_slow_log(db, args)
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        if args.file == '-':
+            errors = run_script(db, sys.stdin, out, args.format, args.timing, args.stop_on_error)
+        else:
+            with open(args.file, 'r', encoding=args.encoding) as f:
+                errors = run_script(db, f, out, args.format, args.timing, args.stop_on_error)
+        if db.slow_log is not None:
+            write_slow_summary(db.slow_log)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        db.disable_slow_log()
+    return 1 if errors else 0
+
+
+def _cmd_serve(args):
+    import asyncio
+    import os
+    from .server import SQLServer
+
+    server = SQLServer(batch_size=args.batch_size, workers=args.workers)
+    if args.result_cache:
+        server.db.enable_result_cache(int(args.result_cache * 1024 * 1024))
+    if args.init:  # 启动前执行初始化脚本（建表、导入数据等）
+        with open(args.init, 'r', encoding='utf-8') as f, open(os.devnull, 'w') as devnull:
+            run_script(server.db, f, devnull)
+    _enable_slow_log(server.db, args)  # 初始化脚本不计入慢查询
+
+    where = args.unix or f"{args.host}:{args.port}"
+    sys.stderr.write(f"SQL 服务器已启动, 监听 {where}\n")
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.db.disable_slow_log()
+    return 0
+
+
+def _add_slow_log_arguments(parser):
+    parser.add_argument('--slow-log', metavar='PATH', help='开启慢查询日志, 写入此文件(JSON 行)')
+    parser.add_argument('--slow-threshold-ms', type=float, default=DEFAULT_THRESHOLD_MS, metavar='N',
+                        help='耗时不低于 N 毫秒的语句记为慢查询')
+    parser.add_argument('--slow-sample', type=float, default=1.0, metavar='R',
+                        help='慢语句写入日志文件的比例(0~1)')
+
+
+def build_arg_parser():
+    arg_parser = argparse.ArgumentParser(prog='python -m sqltranslator', description='SQL 解释器命令行工具')
+    subparsers = arg_parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='执行 SQL 脚本文件')
+    run_parser.add_argument('file', help="SQL 脚本路径, '-' 表示从标准输入读取")
+    run_parser.add_argument('-f', '--format', choices=sorted(FORMATTERS), default='table', help='查询结果输出格式')
+    run_parser.add_argument('-o', '--output', help='查询结果输出文件（默认标准输出）')
+    run_parser.add_argument('--encoding', default='utf-8', help='脚本文件编码')
+    run_parser.add_argument('--timing', action='store_true', help='输出每条语句的词法/语法/执行耗时')
+    run_parser.add_argument('--stop-on-error', action='store_true', help='遇到失败的语句时立即停止')
+    run_parser.add_argument('--result-cache', type=float, metavar='MB', help='开启查询结果缓存, 指定内存上限(MB)')
+    _add_slow_log_arguments(run_parser)
+    run_parser.set_defaults(func=_cmd_run)
+
+    from .protocol import DEFAULT_HOST, DEFAULT_PORT
+    serve_parser = subparsers.add_parser('serve', help='启动本地查询服务器')
+    serve_parser.add_argument('--host', default=DEFAULT_HOST, help='TCP 监听地址')
+    serve_parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='TCP 监听端口')
+    serve_parser.add_argument('--unix', help='改为监听此路径的 Unix socket')
+    serve_parser.add_argument('--init', help='启动前执行的 SQL 脚本')
+    serve_parser.add_argument('--batch-size', type=int, default=500, help='每帧返回的最大行数')
+    serve_parser.add_argument('--workers', type=int, default=4, help='执行语句的线程数')
+    serve_parser.add_argument('--result-cache', type=float, metavar='MB', help='开启查询结果缓存, 指定内存上限(MB)')
+    _add_slow_log_arguments(serve_parser)
+    serve_parser.set_defaults(func=_cmd_serve)
+
+    return arg_parser
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,150 @@
+"""
+查询服务器的 Python 客户端（阻塞 socket）
+
+    pool = ConnectionPool(size=8)
+    results = pool.execute("SELECT * FROM users;")
+
+execute() 的返回格式与 SQLInterpreter.execute 一致:
+查询为 ('select', rows), 失败为 ('error', 信息), 其余为提示字符串.
+显式事务需要在同一个连接上提交:
+
+    with pool.connection() as conn:
+        conn.execute("BEGIN; INSERT ...;")
+        conn.execute("COMMIT;")
+
+归还时仍未结束的事务会被回滚(见 protocol.py).
+"""
+
+import queue
+import socket
+import threading
+from contextlib import contextmanager
+
+from .protocol import DEFAULT_HOST, DEFAULT_PORT, encode_frame, recv_frame
+
+
+class Connection:
+    """到查询服务器的单个连接（非线程安全, 多线程请使用 ConnectionPool）"""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None, timeout=None):
+        if path:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.settimeout(timeout)
+            self.sock.connect(path)
+        else:
+            self.sock = socket.create_connection((host, port), timeout=timeout)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.closed = False
+        self.in_transaction = False  # 最近一次请求结束时会话中是否有未结束的事务
+
+    def iter_execute(self, sql):
+        """
+        发送 SQL 并逐帧产出服务器响应（不等待全部结果）
+        :return: 生成器, 产出 protocol.py 中定义的响应帧, 不包含 done 帧
+        """
+        self.sock.sendall(encode_frame({'sql': sql}))
+        while True:
+            frame = recv_frame(self.sock)
+            if frame['type'] == 'done':
+                self.in_transaction = frame.get('in_transaction', False)
+                return
+            yield frame
+
+    def execute(self, sql):
+        """执行 SQL 并收集全部结果"""
+        results = []
+        rows = []
+        for frame in self.iter_execute(sql):
+            kind = frame['type']
+            if kind == 'rows':
+                rows.extend(frame['rows'])
+            elif kind == 'end':
+                results.append(('select', rows))
+                rows = []
+            elif kind == 'error':
+                results.append(('error', frame['message']))
+            else:
+                results.append(frame['message'])
+        return results
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ConnectionPool:
+    """线程安全的连接池: 按需建立连接, 最多 size 个, 用尽时阻塞等待"""
+
+    def __init__(self, size=4, **conn_kwargs):
+        self.size = size
+        self.conn_kwargs = conn_kwargs
+        self._idle = queue.LifoQueue()  # 后进先出, 优先复用最近使用的连接
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    def _acquire(self, timeout=None):
+        if self._closed:
+            raise Exception("连接池已关闭")
+        if not self._slots.acquire(timeout=timeout):
+            raise TimeoutError("等待可用连接超时")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                return Connection(**self.conn_kwargs)
+            except Exception:
+                self._slots.release()
+                raise
+
+    def _release(self, conn, broken=False):
+        if not broken and not self._closed and conn.in_transaction:
+            # 借用者没有结束事务: 不回滚的话下一个借用者会在该事务中执行, 事务还一直持有表的写锁
+            try:
+                conn.execute("ROLLBACK;")
+            except Exception:
+                broken = True
+            else:
+                broken = conn.in_transaction
+        if broken or self._closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """借出一个连接, 用完自动归还; 使用中出现异常的连接会被丢弃, 未结束的事务在归还时回滚"""
+        conn = self._acquire(timeout)
+        try:
+            yield conn
+        except BaseException:
+            # 异常可能发生在读取响应的中途, 连接上可能残留未读的帧, 不能再复用
+            self._release(conn, broken=True)
+            raise
+        else:
+            self._release(conn)
+
+    def execute(self, sql):
+        with self.connection() as conn:
+            return conn.execute(sql)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,105 @@
+"""
+并发控制: 表级写锁 + 写时复制(copy-on-write)快照
+
+约定:
+- 已发布到 table['data'] 中的行元组本身不可变(见 rows.py).
+  UPDATE 会构建新的行元组, 并且只在事务私有的行列表中原地替换(见 transaction.py),
+  DELETE 会构建新的行列表, 提交时才对其他会话可见.
+- INSERT 只在列表末尾追加, 不影响已有元素.
+- 同一张表的写操作通过该表的写锁串行化, 锁的所有者是事务, 直到提交或回滚才释放;
+  不同表之间互不影响, 没有全局锁.
+- 读操作不加锁: 开始时记下 table['data'] 列表及其长度(TableSnapshot),
+  之后无论写操作如何提交, 读到的都是这一时刻的完整一致的数据.
+  其他事务正在修改的表, 读取的是该事务开始修改前的快照 table['committed'].
+"""
+
+import threading
+from itertools import count, islice
+
+_versions = count(1)
+
+
+class TableLock:
+    """
+    表写锁: 按所有者(事务)计数的可重入锁
+    与 threading.RLock 不同, 加锁和释放可以发生在不同线程中
+    (查询服务器中同一事务的多条语句可能由不同的工作线程执行)
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self.owner = None  # 当前持有者, None 表示空闲
+        self._count = 0
+
+    def acquire(self, owner, timeout=None):
+        """加锁, 超时返回 False"""
+        with self._cond:
+            if self.owner is owner:
+                self._count += 1
+                return True
+            if not self._cond.wait_for(lambda: self.owner is None, timeout):
+                return False
+            self.owner = owner
+            self._count = 1
+            return True
+
+    def release(self, owner):
+        with self._cond:
+            if self.owner is not owner:
+                raise RuntimeError('释放了不属于自己的表锁')
+            self._count -= 1
+            if self._count == 0:
+                self.owner = None
+                self._cond.notify_all()
+
+
+def new_table_lock():
+    """新建表时调用, 返回该表的写锁"""
+    return TableLock()
+
+
+def next_version():
+    """
+    表数据的新版本号(table['version']), 建表和每次修改时获取
+    所有表共用一个递增序列, 删除后重建的同名表也不会与旧表的版本号重复
+    """
+    return next(_versions)
+
+
+class TableSnapshot:
+    """表数据在某一时刻的只读视图（不复制行列表）"""
+    __slots__ = ('rows', 'size')
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.size = len(rows)  # 之后追加的行不可见
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
+
+    def __iter__(self):
+        return islice(self.rows, self.size)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.size)
+            return self.rows[start:stop:step]
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError('snapshot index out of range')
+        return self.rows[index]
+
+
+def take_snapshot(table, txn=None):
+    """
+    获取表数据的一致性快照
+    :param txn: 读取方所在的事务; 表正被其他事务修改时返回修改前的快照
+    """
+    committed = table.get('committed')
+    if committed is not None and table['lock'].owner is not txn:
+        return committed
+    return TableSnapshot(table['data'])
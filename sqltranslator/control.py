@@ -0,0 +1,72 @@
+"""
+语句执行的取消与进度
+
+调用方(如图形界面的执行线程)创建 ExecutionControl 传给 SQLInterpreter.execute:
+- 扫描算子每读取 BATCH_SIZE 行检查一次取消标记, 已取消时抛出 QueryCancelled;
+  写语句在隐式事务或保存点中执行, 取消时与其他失败一样回滚本语句的修改;
+- 每批行读取后调用 on_progress(control), 每条语句执行完后调用 on_result(序号, 结果),
+  回调在执行语句的线程中调用.
+cancel() 可以在任意线程中调用.
+计数(扫描行数、扫描条件匹配的行数、索引查找次数)和阶段耗时同时用于执行指标(见 metrics.py).
+"""
+
+import threading
+from itertools import islice
+
+BATCH_SIZE = 1024
+
+
+class QueryCancelled(Exception):
+    """执行被 ExecutionControl.cancel() 取消"""
+
+    def __init__(self):
+        super().__init__("执行已取消")
+
+
+class ExecutionControl:
+    def __init__(self, on_progress=None, on_result=None):
+        self.on_progress = on_progress
+        self.on_result = on_result
+        self.statements_done = 0
+        self.rows_scanned = 0
+        self.rows_matched = 0  # 扫描中满足扫描条件的行数
+        self.index_hits = 0  # 通过索引定位行的次数
+        self.phases = {}  # 当前语句各阶段耗时(秒), 由执行指标取走
+        self.plan = None  # 当前 SELECT 语句的物理计划, 同上
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def check(self):
+        if self._cancelled.is_set():
+            raise QueryCancelled()
+
+    def batches(self, rows):
+        """按批转发 rows, 每批之前检查取消标记并报告进度"""
+        it = iter(rows)
+        while True:
+            batch = list(islice(it, BATCH_SIZE))
+            if not batch:
+                return
+            self.check()
+            self.rows_scanned += len(batch)
+            if self.on_progress is not None:
+                self.on_progress(self)
+            yield from batch
+
+    def add_phase(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def take_phases(self):
+        phases, self.phases = self.phases, {}
+        return phases
+
+    def statement_done(self, index, result):
+        self.statements_done += 1
+        if self.on_result is not None:
+            self.on_result(index, result)
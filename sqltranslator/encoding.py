@@ -0,0 +1,61 @@
+"""
+VARCHAR 列的字典编码
+
+建表时带 DICTIONARY 选项的 VARCHAR 列(如 product VARCHAR(20) DICTIONARY)在行元组中
+只保存整数编码, 每个不同的字符串在该列的字典中只存一份. 适合取值种类少的列.
+- 等值/不等条件比较编码, 不比较字符串;
+- LIKE 对每个字典项只匹配一次, 结果按编码缓存;
+- GROUP BY 按编码分组.
+字典只追加不删除: 写操作在持有表写锁时编码新值, 回滚后多出的字典项不影响结果;
+读操作随时可以按编码解码. NULL 不编码, 行中仍为 None.
+"""
+
+DICTIONARY = 'DICTIONARY'
+
+
+class ColumnDictionary:
+    """列字典: 编码 -> 字符串(values), 字符串 -> 编码(codes)"""
+    __slots__ = ('values', 'codes')
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, value):
+        """返回值的编码, 新值加入字典"""
+        if value is None:
+            return None
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)  # 先追加再发布编码, 读到编码时一定能解码
+            self.codes[value] = code
+        return code
+
+    def lookup(self, value):
+        """值的编码, 字典中没有时返回 None"""
+        return self.codes.get(value)
+
+    def decode(self, code):
+        return None if code is None else self.values[code]
+
+
+def build_dictionaries(table):
+    """为带 DICTIONARY 选项的列建立空字典: 列名 -> ColumnDictionary"""
+    return {col_name: ColumnDictionary() for col_name, col_def in table['columns'].items()
+            if DICTIONARY in col_def['constraints']}
+
+
+def decoding_getter(getter, dictionary):
+    """把取编码的函数包装为取字符串的函数"""
+    if dictionary is None:
+        return getter
+    values = dictionary.values
+
+    def decoded(row):
+        code = getter(row)
+        return None if code is None else values[code]
+    return decoded
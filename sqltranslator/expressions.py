@@ -0,0 +1,365 @@
+"""
+表达式: 算术运算、函数调用和 CASE
+
+语法树由 parser.py 中的 parse_expression 生成(Pratt 解析, 优先级: 一元负号 > * / > + -, 同级左结合):
+- {'type': 'literal', 'value': 值}
+- {'type': 'column', 'name': 列名}, 列名可以带 '表别名.' 前缀
+- {'type': 'unary', 'op': 'MINUS', 'operand': 子表达式}
+- {'type': 'binary', 'op': 'PLUS' | 'MINUS' | 'ASTERISK' | 'SLASH', 'left': 子表达式, 'right': 子表达式}
+- {'type': 'call', 'name': 函数名(大写), 'args': [子表达式, ...]}, 函数见 functions.py
+- {'type': 'case', 'whens': [{'when': 条件, 'then': 子表达式}, ...], 'else': 子表达式或 None},
+  条件与 WHERE 条件格式相同; CASE x WHEN v THEN ... 解析为条件 x = v
+- {'type': 'aggregate', 'name': 聚合函数名, 'arg': 列名或 '*', 'distinct': bool}, 只能用于 SELECT 列表和 HAVING,
+  取值由 getter_of.aggregate 提供(见 planner._GroupAccess)
+用于 SELECT 列表中的表达式列、WHERE / HAVING 条件的操作数和 UPDATE SET 的右侧.
+compile_expression 在执行前把语法树编译为 row -> 值 的闭包, 列引用解析为直接取值的函数,
+不含列的子表达式在编译时求值. 任一操作数为 NULL 时结果为 NULL, 除数为零时报错.
+compile_batch 编译为 行列表 -> 值列表 的函数, 逐列计算: 没有 NULL 的列直接用 map 调用运算符,
+SELECT 列表中的表达式列按批计算(见 operators.Project).
+"""
+
+import operator
+
+from .aggregates import aggregate_name
+from .functions import lookup
+
+BINDING_POWER = {'PLUS': 10, 'MINUS': 10, 'ASTERISK': 20, 'SLASH': 20}  # 二元运算符, 越大越先结合
+UNARY_POWER = 30
+SYMBOLS = {'PLUS': '+', 'MINUS': '-', 'ASTERISK': '*', 'SLASH': '/'}
+EXPRESSION_TYPES = ('literal', 'column', 'unary', 'binary', 'call', 'case', 'aggregate')
+
+
+def _divide(a, b):
+    if b == 0:
+        raise Exception("除数不能为零")
+    return a / b
+
+
+ARITHMETIC = {'PLUS': operator.add, 'MINUS': operator.sub, 'ASTERISK': operator.mul, 'SLASH': _divide}
+
+
+def is_expression(value):
+    return isinstance(value, dict) and value.get('type') in EXPRESSION_TYPES
+
+
+def literal(value):
+    return {'type': 'literal', 'value': value}
+
+
+def expression_columns(expr):
+    """表达式引用的列名列表; CASE 条件中的字符串操作数可能是字面量, 也一并列出"""
+    kind = expr['type']
+    if kind == 'column':
+        return [expr['name']]
+    if kind == 'unary':
+        return expression_columns(expr['operand'])
+    if kind == 'binary':
+        return expression_columns(expr['left']) + expression_columns(expr['right'])
+    if kind == 'call':
+        return [name for arg in expr['args'] for name in expression_columns(arg)]
+    if kind == 'case':
+        names = []
+        for branch in expr['whens']:
+            names.extend(_condition_columns(branch['when']))
+            names.extend(expression_columns(branch['then']))
+        if expr['else'] is not None:
+            names.extend(expression_columns(expr['else']))
+        return names
+    return []
+
+
+def _condition_columns(condition):
+    if 'logical_op' in condition:
+        return _condition_columns(condition['left']) + _condition_columns(condition['right'])
+    names = []
+    for operand in (condition['left'], condition['right']):
+        if is_expression(operand):
+            names.extend(expression_columns(operand))
+        elif isinstance(operand, str):
+            names.append(operand)
+    return names
+
+
+def is_constant(expr):
+    """表达式是否不含列引用(CASE 总是按非常量处理)"""
+    kind = expr['type']
+    if kind == 'literal':
+        return True
+    if kind == 'unary':
+        return is_constant(expr['operand'])
+    if kind == 'binary':
+        return is_constant(expr['left']) and is_constant(expr['right'])
+    if kind == 'call':
+        return all(is_constant(arg) for arg in expr['args'])
+    return False
+
+
+def contains_aggregate(expr):
+    """表达式中是否有聚合函数"""
+    kind = expr['type']
+    if kind == 'aggregate':
+        return True
+    if kind == 'unary':
+        return contains_aggregate(expr['operand'])
+    if kind == 'binary':
+        return contains_aggregate(expr['left']) or contains_aggregate(expr['right'])
+    if kind == 'call':
+        return any(contains_aggregate(arg) for arg in expr['args'])
+    if kind == 'case':
+        return any(_condition_has_aggregate(branch['when']) or contains_aggregate(branch['then'])
+                   for branch in expr['whens']) or (expr['else'] is not None and contains_aggregate(expr['else']))
+    return False
+
+
+def _condition_has_aggregate(condition):
+    if 'logical_op' in condition:
+        return _condition_has_aggregate(condition['left']) or _condition_has_aggregate(condition['right'])
+    return any(is_expression(operand) and contains_aggregate(operand)
+               for operand in (condition['left'], condition['right']))
+
+
+def format_expression(expr, power=0):
+    """表达式的文本形式(只在需要时加括号), 用作 SELECT 结果的列名和 EXPLAIN 输出"""
+    kind = expr['type']
+    if kind == 'literal':
+        value = expr['value']
+        return 'NULL' if value is None else repr(value) if isinstance(value, str) else str(value)
+    if kind == 'column':
+        return expr['name']
+    if kind == 'aggregate':
+        return aggregate_name(expr)
+    if kind == 'unary':
+        return '-' + format_expression(expr['operand'], UNARY_POWER)
+    if kind == 'call':
+        return f"{expr['name']}({', '.join(format_expression(arg) for arg in expr['args'])})"
+    if kind == 'case':
+        parts = ['CASE']
+        for branch in expr['whens']:
+            parts.append(f"WHEN {_format_condition(branch['when'])} THEN {format_expression(branch['then'])}")
+        if expr['else'] is not None:
+            parts.append(f"ELSE {format_expression(expr['else'])}")
+        parts.append('END')
+        return ' '.join(parts)
+    own = BINDING_POWER[expr['op']]
+    text = (f"{format_expression(expr['left'], own)} {SYMBOLS[expr['op']]} "
+            f"{format_expression(expr['right'], own + 1)}")
+    return f"({text})" if own < power else text
+
+
+def _format_condition(condition):
+    from .planner import OP_SYMBOLS  # planner 依赖本模块, 在用到时再导入
+
+    if 'logical_op' in condition:
+        return (f"({_format_condition(condition['left'])} {condition['logical_op']} "
+                f"{_format_condition(condition['right'])})")
+    left, right = condition['left'], condition['right']
+    left = format_expression(left) if is_expression(left) else left
+    right = format_expression(right) if is_expression(right) else repr(right) if isinstance(right, str) else right
+    return f"{left} {OP_SYMBOLS.get(condition['op'], condition['op'])} {right}"
+
+
+def _apply(op, a, b):
+    if a is None or b is None:
+        return None
+    try:
+        return ARITHMETIC[op](a, b)
+    except TypeError:
+        raise Exception(f"运算符 {SYMBOLS[op]} 不支持 {type(a).__name__} 和 {type(b).__name__} 类型的操作数")
+
+
+def constant_value(expr):
+    """不含列引用的表达式的值(如 INSERT 的值); 含列引用时报错"""
+    kind = expr['type']
+    if kind == 'literal':
+        return expr['value']
+    if kind == 'column':
+        raise Exception(f"此处只能使用常量, 得到列 '{expr['name']}'")
+    if kind == 'unary':
+        return _apply('MINUS', 0, constant_value(expr['operand']))
+    if kind == 'call':
+        function, strict = lookup(expr['name'], len(expr['args']))
+        values = [constant_value(arg) for arg in expr['args']]
+        return None if strict and None in values else function(*values)
+    if kind == 'case':
+        raise Exception("此处只能使用常量, 得到 CASE 表达式")
+    if kind == 'aggregate':
+        raise Exception(f"此处只能使用常量, 得到聚合函数 {aggregate_name(expr)}")
+    return _apply(expr['op'], constant_value(expr['left']), constant_value(expr['right']))
+
+
+def compile_expression(expr, scope, getter_of):
+    """
+    表达式 -> row -> 值 的闭包
+    :param scope: planner.Scope, 把列名解析为 (别名, 列名)
+    :param getter_of: (别名, 列名) -> 从行中取值的函数, 见 planner.row_getter / layout_getter
+    """
+    if is_constant(expr):
+        value = constant_value(expr)
+        return lambda row: value
+    kind = expr['type']
+    if kind == 'column':
+        return _column_getter(expr['name'], scope, getter_of)
+    if kind == 'call':
+        return _compile_call(expr, scope, getter_of)
+    if kind == 'case':
+        return _compile_case(expr, scope, getter_of)
+    if kind == 'aggregate':
+        return _aggregate_getter(expr, getter_of)
+    if kind == 'unary':
+        operand = compile_expression(expr['operand'], scope, getter_of)
+
+        def negate(row):
+            value = operand(row)
+            return None if value is None else _apply('MINUS', 0, value)
+        return negate
+
+    op = expr['op']
+    function = ARITHMETIC[op]
+    left = compile_expression(expr['left'], scope, getter_of)
+    if is_constant(expr['right']):  # 常见的 列 op 常量, 右侧不必每行调用
+        b = constant_value(expr['right'])
+        if b is None:
+            return lambda row: None
+
+        def evaluate(row):
+            a = left(row)
+            if a is None:
+                return None
+            try:
+                return function(a, b)
+            except TypeError:
+                return _apply(op, a, b)  # 生成错误信息
+        return evaluate
+
+    right = compile_expression(expr['right'], scope, getter_of)
+
+    def evaluate(row):
+        a, b = left(row), right(row)
+        if a is None or b is None:
+            return None
+        try:
+            return function(a, b)
+        except TypeError:
+            return _apply(op, a, b)
+    return evaluate
+
+
+def _column_getter(name, scope, getter_of):
+    resolved = scope.resolve(name)
+    if resolved is None:
+        raise Exception(f"列 '{name}' 不存在")
+    return getter_of(*resolved)
+
+
+def _aggregate_getter(expr, getter_of):
+    aggregate = getattr(getter_of, 'aggregate', None)
+    if aggregate is None:
+        raise Exception(f"聚合函数 {aggregate_name(expr)} 只能用于 SELECT 列表和 HAVING 子句")
+    return aggregate(expr)
+
+
+def _compile_call(expr, scope, getter_of):
+    function, strict = lookup(expr['name'], len(expr['args']))
+    args = [compile_expression(arg, scope, getter_of) for arg in expr['args']]
+    if not strict:
+        return lambda row: function(*[arg(row) for arg in args])
+    if len(args) == 1:
+        arg = args[0]
+
+        def evaluate(row):
+            value = arg(row)
+            return None if value is None else function(value)
+        return evaluate
+
+    def evaluate(row):
+        values = [arg(row) for arg in args]
+        return None if None in values else function(*values)
+    return evaluate
+
+
+def _compile_case(expr, scope, getter_of):
+    from .planner import compile_condition  # planner 依赖本模块, 在用到时再导入
+
+    branches = [(compile_condition(branch['when'], scope, getter_of),
+                 compile_expression(branch['then'], scope, getter_of)) for branch in expr['whens']]
+    otherwise = compile_expression(expr['else'], scope, getter_of) if expr['else'] is not None else None
+
+    def evaluate(row):
+        for when, then in branches:
+            if when(row):
+                return then(row)
+        return None if otherwise is None else otherwise(row)
+    return evaluate
+
+
+# ---------------------- 按批计算 ----------------------
+_BATCH_ARITHMETIC = {'PLUS': operator.add, 'MINUS': operator.sub, 'ASTERISK': operator.mul,
+                     'SLASH': operator.truediv}
+
+
+def compile_batch(expr, scope, getter_of):
+    """
+    表达式 -> 行列表 -> 值列表 的函数, 与 compile_expression 的结果逐行相同.
+    每个子表达式对整批行计算出一列值; 列中没有 NULL 时运算符和函数直接由 map 作用于整列
+    """
+    kind = expr['type']
+    if is_constant(expr):
+        value = constant_value(expr)
+        return lambda rows: [value] * len(rows)
+    if kind == 'column':
+        getter = _column_getter(expr['name'], scope, getter_of)
+        return lambda rows: list(map(getter, rows))
+    if kind in ('case', 'aggregate'):  # 逐行计算
+        evaluate_row = compile_expression(expr, scope, getter_of)
+        return lambda rows: list(map(evaluate_row, rows))
+    if kind == 'unary':
+        operand = compile_batch(expr['operand'], scope, getter_of)
+
+        def negate(rows):
+            values = operand(rows)
+            if None in values:
+                return [None if value is None else _apply('MINUS', 0, value) for value in values]
+            return _vector('MINUS', operator.sub, [0] * len(values), values)
+        return negate
+    if kind == 'call':
+        function, strict = lookup(expr['name'], len(expr['args']))
+        args = [compile_batch(arg, scope, getter_of) for arg in expr['args']]
+
+        def call(rows):
+            columns = [arg(rows) for arg in args]
+            if strict and any(None in column for column in columns):
+                return [None if None in values else function(*values) for values in zip(*columns)]
+            return list(map(function, *columns))
+        return call
+
+    op = expr['op']
+    function = _BATCH_ARITHMETIC[op]
+    left = compile_batch(expr['left'], scope, getter_of)
+    if is_constant(expr['right']):
+        b = constant_value(expr['right'])
+
+        def evaluate(rows):
+            values = left(rows)
+            if b is None:
+                return [None] * len(values)
+            if None in values:
+                return [_apply(op, a, b) for a in values]
+            return _vector(op, function, values, [b] * len(values))
+        return evaluate
+
+    right = compile_batch(expr['right'], scope, getter_of)
+
+    def evaluate(rows):
+        a, b = left(rows), right(rows)
+        if None in a or None in b:
+            return [_apply(op, x, y) for x, y in zip(a, b)]
+        return _vector(op, function, a, b)
+    return evaluate
+
+
+def _vector(op, function, a, b):
+    """整列运算, a 和 b 是等长的列表; 出错时逐个计算以得到与逐行计算相同的错误信息"""
+    try:
+        return list(map(function, a, b))
+    except (TypeError, ZeroDivisionError):
+        return [_apply(op, x, y) for x, y in zip(a, b)]
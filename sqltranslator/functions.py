@@ -0,0 +1,135 @@
+"""
+标量函数
+
+表达式(见 expressions.py)中可以调用的内置函数, 函数名不区分大小写:
+- 字符串: UPPER, LOWER, LENGTH, TRIM, LTRIM, RTRIM, SUBSTRING/SUBSTR(s, 起始[, 长度]), REPLACE, CONCAT
+- 数学: ABS, ROUND(x[, 小数位]), FLOOR, CEIL/CEILING, SQRT, POWER/POW, MOD, SIGN, GREATEST, LEAST
+- NULL 处理: COALESCE, IFNULL, NULLIF
+除 NULL 处理函数外, 任一参数为 NULL 时结果为 NULL(不调用函数).
+字符串位置从 1 开始; ROUND 四舍五入(远离零); MOD 结果的符号与被除数相同; SQRT 负数的结果为 NULL.
+"""
+
+import math
+from decimal import ROUND_HALF_UP, Decimal
+
+
+def _text(value):
+    return value if isinstance(value, str) else str(value)
+
+
+def _number(name, value):
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise Exception(f"函数 {name} 要求数字参数, 得到 '{value}'")
+
+
+def _substring(s, start, length=None):
+    s = _text(s)
+    start = int(_number('SUBSTRING', start))
+    if start > 0:
+        begin = start - 1
+    elif start < 0:  # 负数从末尾数起
+        begin = max(len(s) + start, 0)
+    else:
+        return ''
+    if length is None:
+        return s[begin:]
+    length = int(_number('SUBSTRING', length))
+    return s[begin:begin + length] if length > 0 else ''
+
+
+def _round(x, digits=0):
+    x, digits = _number('ROUND', x), int(_number('ROUND', digits))
+    rounded = Decimal(str(x)).quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP)
+    return int(rounded) if isinstance(x, int) else float(rounded)
+
+
+def _sqrt(x):
+    x = _number('SQRT', x)
+    return None if x < 0 else math.sqrt(x)
+
+
+def _power(x, y):
+    try:
+        return math.pow(_number('POWER', x), _number('POWER', y))
+    except (OverflowError, ValueError):
+        raise Exception(f"POWER({x}, {y}) 超出范围")
+
+
+def _mod(a, b):
+    a, b = _number('MOD', a), _number('MOD', b)
+    if b == 0:
+        raise Exception("除数不能为零")
+    result = math.fmod(a, b)
+    return int(result) if isinstance(a, int) and isinstance(b, int) else result
+
+
+def _sign(x):
+    x = _number('SIGN', x)
+    return (x > 0) - (x < 0)
+
+
+def _extreme(choose):
+    """GREATEST / LEAST: 都能转换为数字时按数值比较, 否则按文本比较(与聚合函数 MIN/MAX 一致)"""
+    def function(*values):
+        try:
+            keys = [float(value) for value in values]
+        except (TypeError, ValueError):
+            keys = [_text(value) for value in values]
+        return values[keys.index(choose(keys))]
+    return function
+
+
+def _coalesce(*values):
+    for value in values:
+        if value is not None:
+            return value
+    return None
+
+
+# 函数名 -> (实现, 最少参数个数, 最多参数个数(None 表示不限), 是否严格: 参数为 NULL 时直接返回 NULL)
+FUNCTIONS = {
+    'UPPER': (lambda s: _text(s).upper(), 1, 1, True),
+    'LOWER': (lambda s: _text(s).lower(), 1, 1, True),
+    'LENGTH': (lambda s: len(_text(s)), 1, 1, True),
+    'TRIM': (lambda s: _text(s).strip(), 1, 1, True),
+    'LTRIM': (lambda s: _text(s).lstrip(), 1, 1, True),
+    'RTRIM': (lambda s: _text(s).rstrip(), 1, 1, True),
+    'SUBSTRING': (_substring, 2, 3, True),
+    'SUBSTR': (_substring, 2, 3, True),
+    'REPLACE': (lambda s, old, new: _text(s).replace(_text(old), _text(new)), 3, 3, True),
+    'CONCAT': (lambda *values: ''.join(_text(value) for value in values), 1, None, True),
+    'ABS': (lambda x: abs(_number('ABS', x)), 1, 1, True),
+    'ROUND': (_round, 1, 2, True),
+    'FLOOR': (lambda x: math.floor(_number('FLOOR', x)), 1, 1, True),
+    'CEIL': (lambda x: math.ceil(_number('CEIL', x)), 1, 1, True),
+    'CEILING': (lambda x: math.ceil(_number('CEILING', x)), 1, 1, True),
+    'SQRT': (_sqrt, 1, 1, True),
+    'POWER': (_power, 2, 2, True),
+    'POW': (_power, 2, 2, True),
+    'MOD': (_mod, 2, 2, True),
+    'SIGN': (_sign, 1, 1, True),
+    'GREATEST': (_extreme(max), 1, None, True),
+    'LEAST': (_extreme(min), 1, None, True),
+    'COALESCE': (_coalesce, 1, None, False),
+    'IFNULL': (_coalesce, 2, 2, False),
+    'NULLIF': (lambda a, b: None if a == b else a, 2, 2, False),
+}
+
+
+def lookup(name, count):
+    """
+    :return: (实现, 是否严格)
+    函数不存在或参数个数不对时报错
+    """
+    spec = FUNCTIONS.get(name.upper())
+    if spec is None:
+        raise Exception(f"未知函数: {name}")
+    function, least, most, strict = spec
+    if count < least or most is not None and count > most:
+        expected = str(least) if least == most else f"{least} 到 {most}" if most else f"至少 {least}"
+        raise Exception(f"函数 {name.upper()} 需要 {expected} 个参数, 得到 {count} 个")
+    return function, strict
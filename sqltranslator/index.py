@@ -0,0 +1,118 @@
+"""
+哈希索引（主键与 UNIQUE 列自动建立）
+
+索引保存 列值 -> 行在 table['data'] 中的位置; offset 是该列在行元组中的下标.
+NULL 不进入索引（多个 NULL 不违反唯一约束, 查找 NULL 也不走索引）.
+
+索引随写操作在事务中同步维护(见 transaction.py), 回滚时一并恢复.
+读操作只有在快照就是当前行列表时才能使用索引(见 probe), 否则退化为扫描快照.
+索引按需缓存按键值排序的位置列表(见 sorted_positions), 供归并连接按键顺序读取;
+缓存带版本号, 索引被修改后自动失效.
+"""
+
+
+def sort_key(value):
+    """不同类型的值也能排序的键: 数字在前, 字符串其次, 其他类型按 repr"""
+    if isinstance(value, (int, float)):
+        return 0, value
+    if isinstance(value, str):
+        return 1, value
+    return 2, repr(value)
+
+
+class HashIndex:
+    """唯一哈希索引"""
+    __slots__ = ('column', 'offset', 'map', 'version', '_sorted')
+
+    def __init__(self, column, offset):
+        self.column = column
+        self.offset = offset
+        self.map = {}
+        self.version = 0  # 每次修改加一, 用于判断排序缓存是否有效
+        self._sorted = None  # (版本号, 按键值排序的位置列表)
+
+    def __len__(self):
+        return len(self.map)
+
+    def lookup(self, value):
+        """返回值所在行的位置, 不存在返回 None"""
+        if value is None:
+            return None
+        return self.map.get(value)
+
+    def add(self, value, pos):
+        if value is not None:
+            self.map[value] = pos
+            self.version += 1
+
+    def remove(self, value, pos):
+        if value is not None and self.map.get(value) == pos:
+            del self.map[value]
+            self.version += 1
+
+    def sorted_positions(self):
+        """按键值升序排列的行位置(不含 NULL), 索引未修改时复用上次的结果"""
+        version = self.version
+        cached = self._sorted
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        items = list(self.map.items())  # 先复制, 排序期间写事务修改索引不会影响本次结果
+        items.sort(key=lambda item: sort_key(item[0]))
+        positions = [pos for _, pos in items]
+        self._sorted = (version, positions)
+        return positions
+
+    def conflicts(self, value, pos=None):
+        """值是否已被 pos 以外的行占用（唯一性检查）"""
+        found = self.lookup(value)
+        return found is not None and found != pos
+
+
+def indexed_columns(table):
+    """需要建立索引的列: 主键和 UNIQUE 列"""
+    return [col_name for col_name, col_def in table['columns'].items()
+            if col_name == table['primary_key'] or 'UNIQUE' in col_def['constraints']]
+
+
+def build_indexes(table, data=None):
+    """为 data(默认 table['data']) 重新构建全部索引"""
+    data = table['data'] if data is None else data
+    indexes = {}
+    for col_name in indexed_columns(table):
+        offset = table['offsets'][col_name]
+        index = HashIndex(col_name, offset)
+        for pos, row in enumerate(data):
+            index.add(row[offset], pos)
+        indexes[col_name] = index
+    return indexes
+
+
+def probe(table, snapshot, column, value):
+    """
+    读操作通过索引查找快照中的行
+    :return: 匹配的行列表; 索引不可用于该快照时返回 None, 调用方应改为扫描
+    """
+    index = table['indexes'].get(column)
+    if index is None or table['data'] is not snapshot.rows:
+        return None  # 快照是其他事务修改前的旧列表, 索引已不对应
+    pos = index.lookup(value)
+    if table['data'] is not snapshot.rows:
+        return None  # 查找期间有写事务替换了行列表
+    if pos is None or pos >= snapshot.size:
+        return []  # 快照之后追加的行不可见
+    return [snapshot.rows[pos]]
+
+
+def ordered_rows(table, snapshot, column):
+    """
+    按索引列升序读取快照中的行(不含该列为 NULL 的行)
+    :return: 行的迭代器; 索引不可用于该快照时返回 None, 调用方应自行排序
+    """
+    index = table['indexes'].get(column)
+    if index is None or table['data'] is not snapshot.rows:
+        return None
+    positions = index.sorted_positions()
+    if table['data'] is not snapshot.rows:
+        return None  # 读取索引期间有写事务替换了行列表
+    rows, size = snapshot.rows, snapshot.size
+    return (rows[pos] for pos in positions if pos < size)
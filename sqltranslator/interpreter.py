@@ -0,0 +1,865 @@
+"""SQL 解释器: 语义分析 + 解释执行"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from .cache import DEFAULT_MAX_BYTES, ResultCache, statement_key
+from .concurrency import new_table_lock, next_version, take_snapshot
+from .control import ExecutionControl, QueryCancelled
+from .index import build_indexes
+from .lexer import sql_lexer
+from .metrics import BatchMetrics, StatementMetrics, capture, normalize_statements
+from .operators import ExecutionContext
+from .parser import sql_parser
+from .planner import Scope, execute_plan, explain, match_positions, plan_select, plan_tables, row_getter
+from .encoding import DICTIONARY, build_dictionaries
+from .expressions import compile_expression
+from .slowlog import DEFAULT_THRESHOLD_MS, SlowQueryLog
+from .rows import RowView, column_offsets, row_view, stored_value
+from .stats import TableStats, build_stats
+from .transaction import Session, Transaction
+from .views import MaterializedView
+
+
+# 变更事件类型(见 SQLInterpreter.add_listener)
+TABLE_CREATED = 'created'
+TABLE_DROPPED = 'dropped'
+TABLE_ALTERED = 'altered'  # 列或索引定义改变; 目前没有会修改表结构的语句, 预留给 ALTER TABLE
+ROWS_CHANGED = 'rows'
+
+# ===== SQL解释器 语义分析+解释执行 =====
+
+class SQLInterpreter:
+    def __init__(self):
+        self.tables = {}  # 表结构存储
+        self.views = {}  # 物化视图: 视图名 -> MaterializedView
+        self.current_db = "main"  # 支持多数据库扩展
+        self._catalog_lock = threading.Lock()  # 仅保护建表/删表, 不影响数据读写
+        self.session = Session()  # 默认会话（GUI/命令行）
+        self.lock_timeout = 10.0  # 等待其他事务释放表写锁的最长秒数
+        self.result_cache = None  # 查询结果缓存, 默认关闭, 见 enable_result_cache
+        self.listeners = []  # 变更事件回调, 见 add_listener
+        self._row_counts = {}  # 表名 -> 上次通知时的行数, 有回调时才维护
+        self._events_lock = threading.Lock()
+        self.hooks = []  # 执行指标钩子, 见 add_hook
+        self.trace_memory = False  # 见 enable_profiling
+        self.profile_cpu = False
+        self.slow_log = None  # 见 enable_slow_log
+
+    def execute(self, ast, session=None, control=None, batch=None):
+        """
+        解释器执行入口
+        :param ast: 语法树（语句列表）
+        :param session: 执行语句的会话, 默认使用 self.session
+        :param control: ExecutionControl(见 control.py), 用于取消执行、报告进度和逐条返回结果;
+                        取消后当前语句返回错误, 其余语句不再执行
+        :param batch: run_sql 传入的 BatchMetrics(已记录词法/语法分析耗时), 仅在注册了钩子时使用
+        """
+        session = session or self.session
+        hooks = list(self.hooks)
+        if hooks:  # 收集执行指标, 扫描计数来自 ExecutionControl
+            control = control or ExecutionControl()
+            batch = batch or BatchMetrics()
+            batch_start = time.perf_counter()
+        results = []
+        for index, statement in enumerate(ast):  # 支持批量执行多个SQL语句
+            cancelled = False
+            metrics = None
+            if hooks:
+                metrics = StatementMetrics(index, statement)
+                if index < len(batch.statement_sql):
+                    metrics.sql = batch.statement_sql[index]
+                counters = (control.rows_scanned, control.rows_matched, control.index_hits)
+                control.take_phases()
+                control.plan = None
+                start = time.perf_counter()
+            try:
+                if control is not None:
+                    control.check()
+                if metrics is None:
+                    results.append(self._execute_statement(statement, session, control))
+                else:
+                    with capture(metrics, self.trace_memory, self.profile_cpu):
+                        results.append(self._execute_statement(statement, session, control))
+            except QueryCancelled as e:
+                results.append(('error', str(e)))
+                cancelled = True
+            except Exception as e:
+                results.append(('error', str(e)))
+            if metrics is not None:
+                self._finish_metrics(metrics, results[-1], control, counters, start, hooks)
+                batch.statements.append(metrics)
+            if control is not None:
+                control.statement_done(index, results[-1])
+            if cancelled:
+                break
+        if hooks:
+            batch.total += time.perf_counter() - batch_start
+            for hook in hooks:
+                hook.on_batch(batch)
+        return results
+
+    def run_sql(self, sql, session=None, control=None):
+        """
+        对一段 SQL 文本做词法分析、语法分析并执行; 注册了钩子时整批的 lex / parse 耗时记入 BatchMetrics.
+        词法/语法错误直接抛出异常
+        """
+        start = time.perf_counter()
+        tokens = sql_lexer(sql)
+        lexed = time.perf_counter()
+        ast = sql_parser(tokens)
+        parsed = time.perf_counter()
+        return self.execute(ast, session, control, self.new_batch(sql, tokens, lexed - start, parsed - lexed))
+
+    def new_batch(self, sql, tokens, lex_time=0.0, parse_time=0.0):
+        """
+        一批语句的 BatchMetrics(含规范化的 SQL 文本), 没有注册钩子时返回 None.
+        自行做词法/语法分析的调用方(如命令行)把它传给 execute, 慢查询日志才有 SQL 文本
+        """
+        if not self.hooks:
+            return None
+        batch = BatchMetrics(sql)
+        batch.phases = {'lex': lex_time, 'parse': parse_time}
+        batch.statement_sql = normalize_statements(tokens)
+        batch.total = lex_time + parse_time
+        return batch
+
+    def _execute_statement(self, statement, session, control):
+        """执行一条语句, 返回其结果"""
+        # 根据AST类型分发处理
+        if statement['type'] == 'create_table':
+            self._check_no_transaction(session)
+            self._create_table(statement)
+            self._notify(TABLE_CREATED, statement['name'])
+            return "表创建成功"
+        elif statement['type'] == 'insert':
+            with self._write_transaction(session) as txn:
+                self._insert(statement, txn)
+            return "插入成功"
+        elif statement['type'] == 'select':
+            result = self._select(statement, session, control)
+            return ('select', result)
+        elif statement['type'] == 'explain':
+            query = statement['statement']
+            tables = self._query_tables(query, session.txn)
+            return ('select', explain(query, tables, session.txn, statement['analyze'], control))
+        elif statement['type'] == 'delete':
+            with self._write_transaction(session) as txn:
+                self._delete(statement, txn, control)
+            return "删除成功"
+        elif statement['type'] == 'update':
+            with self._write_transaction(session) as txn:
+                self._update(statement, txn, control)
+            return "更新成功"
+        elif statement['type'] == 'drop_table':
+            self._check_no_transaction(session)
+            self._drop_table(statement, session)
+            self._notify(TABLE_DROPPED, statement['name'])
+            return "表删除成功"
+        elif statement['type'] == 'create_view':
+            self._check_no_transaction(session, 'CREATE MATERIALIZED VIEW')
+            self._create_view(statement, session)
+            return "物化视图创建成功"
+        elif statement['type'] == 'refresh_view':
+            self._check_no_transaction(session, 'REFRESH MATERIALIZED VIEW')
+            count = self.refresh_view(statement['name'], session)
+            return f"物化视图已刷新, 共 {count} 行"
+        elif statement['type'] == 'drop_view':
+            self._check_no_transaction(session, 'DROP MATERIALIZED VIEW')
+            self._drop_view(statement, session)
+            return "物化视图删除成功"
+        elif statement['type'] == 'analyze':
+            count = self.analyze(statement['table'], session)
+            return f"已更新 {count} 张表的统计信息"
+        elif statement['type'] == 'begin':
+            self.begin(session)
+            return "事务已开始"
+        elif statement['type'] == 'commit':
+            self.commit(session)
+            return "事务已提交"
+        elif statement['type'] == 'rollback':
+            self.rollback(session)
+            return "事务已回滚"
+        else:
+            raise Exception(f"不支持的语句类型: {statement['type']}")
+
+    # ---------------------- 执行指标 ----------------------
+    def add_hook(self, hook):
+        """注册执行指标钩子(见 metrics.py 的 MetricsHook)"""
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
+
+    def enable_profiling(self, memory=False, cpu=False):
+        """
+        为每条语句额外记录内存分配峰值(tracemalloc) / cProfile 报告, 只在注册了钩子时生效;
+        两者都会明显拖慢执行, 只在排查问题时开启
+        """
+        self.trace_memory = memory
+        self.profile_cpu = cpu
+
+    def enable_slow_log(self, path=None, threshold_ms=DEFAULT_THRESHOLD_MS, sample_rate=1.0, **options):
+        """
+        开启慢查询日志(见 slowlog.py), 已开启时先关闭原来的; 返回 SlowQueryLog, 可用其 top() 查看汇总.
+        options 传给 SlowQueryLog: max_bytes, backup_count, top_n
+        """
+        self.disable_slow_log()
+        self.slow_log = SlowQueryLog(path, threshold_ms, sample_rate, **options)
+        self.add_hook(self.slow_log)
+        return self.slow_log
+
+    def disable_slow_log(self):
+        if self.slow_log is not None:
+            self.remove_hook(self.slow_log)
+            self.slow_log.close()
+            self.slow_log = None
+
+    def _finish_metrics(self, metrics, result, control, counters, start, hooks):
+        metrics.total = time.perf_counter() - start
+        phases = control.take_phases()
+        phases['execute'] = max(0.0, metrics.total - sum(phases.values()))
+        metrics.phases = phases
+        metrics.plan = control.plan
+        metrics.rows_scanned = control.rows_scanned - counters[0]
+        metrics.rows_filtered = metrics.rows_scanned - (control.rows_matched - counters[1])
+        metrics.index_hits = control.index_hits - counters[2]
+        if isinstance(result, tuple) and result[0] == 'select':
+            metrics.rows_returned = len(result[1])
+        elif isinstance(result, tuple) and result[0] == 'error':
+            metrics.error = result[1]
+        for hook in hooks:
+            hook.on_statement(metrics)
+
+    # ---------------------- 变更事件 ----------------------
+    def add_listener(self, callback):
+        """
+        注册变更事件回调 callback(event), 供图形界面等增量更新显示.
+        event 为字典: {'type': 事件类型, 'table': 表名, 'delta': 行数变化(仅 ROWS_CHANGED)};
+        写语句成功后(隐式事务提交后、显式事务中语句结束后)以及 ROLLBACK 后, 对行数有变化的表发出 ROWS_CHANGED.
+        回调在执行语句的线程中调用.
+        """
+        with self._events_lock:
+            if not self.listeners:
+                self._row_counts = {name: len(table['data']) for name, table in self.tables.items()}
+            self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._events_lock:
+            self.listeners.remove(callback)
+
+    def _notify(self, event_type, table_name, delta=0):
+        if not self.listeners:
+            return
+        with self._events_lock:
+            if event_type == TABLE_CREATED:
+                self._row_counts[table_name] = 0
+            elif event_type == TABLE_DROPPED:
+                self._row_counts.pop(table_name, None)
+        event = {'type': event_type, 'table': table_name, 'delta': delta}
+        for callback in list(self.listeners):
+            callback(event)
+
+    def _notify_row_counts(self, table_names):
+        """与上次通知时比较各表的行数, 有变化时发出 ROWS_CHANGED"""
+        if not self.listeners:
+            return
+        changes = []
+        with self._events_lock:
+            for table_name in table_names:
+                table = self.tables.get(table_name)
+                if table is None:  # 已被删除
+                    continue
+                count = len(table['data'])
+                delta = count - self._row_counts.get(table_name, 0)
+                if delta:
+                    self._row_counts[table_name] = count
+                    changes.append((table_name, delta))
+        for table_name, delta in changes:
+            self._notify(ROWS_CHANGED, table_name, delta)
+
+    # ---------------------- 事务 ----------------------
+    def begin(self, session=None):
+        """开始显式事务"""
+        session = session or self.session
+        if session.txn is not None:
+            raise Exception("已在事务中, 不支持嵌套事务")
+        session.txn = Transaction(self.lock_timeout)
+
+    def commit(self, session=None):
+        """提交显式事务"""
+        session = session or self.session
+        if session.txn is None:
+            raise Exception("当前没有进行中的事务")
+        txn, session.txn = session.txn, None
+        txn.commit()
+
+    def rollback(self, session=None):
+        """回滚显式事务"""
+        session = session or self.session
+        if session.txn is None:
+            raise Exception("当前没有进行中的事务")
+        txn, session.txn = session.txn, None
+        table_names = txn.touched_tables()
+        txn.rollback()
+        self._notify_row_counts(table_names)
+
+    # ---------------------- 统计信息 ----------------------
+    def analyze(self, table_name=None, session=None):
+        """
+        根据当前数据重新计算统计信息(ANALYZE)
+        :param table_name: 为空时处理所有表
+        :return: 处理的表数
+        """
+        if table_name is not None and table_name not in self.tables:
+            raise Exception(f"表 '{table_name}' 不存在")
+        names = [table_name] if table_name is not None else list(self.tables)
+        txn = (session or self.session).txn
+        for name in names:
+            table = self.tables.get(name)
+            if table is not None:
+                table['stats'] = build_stats(table, take_snapshot(table, txn))
+        return len(names)
+
+    def get_table_stats(self, table_name):
+        """表的统计摘要: (行数, 每列统计列表)"""
+        if table_name not in self.tables:
+            raise Exception(f"表 '{table_name}' 不存在")
+        table = self.tables[table_name]
+        row_count = len(table['data'])
+        return row_count, table['stats'].summary(row_count)
+
+    @contextmanager
+    def _write_transaction(self, session):
+        """
+        写语句的执行上下文
+        在显式事务中: 语句失败时只撤销本语句的修改;
+        否则: 语句自成一个隐式事务, 成功即提交, 失败即回滚
+        """
+        txn = session.txn
+        if txn is not None:
+            savepoint = txn.savepoint()
+            try:
+                yield txn
+            except BaseException:
+                txn.rollback_to(savepoint)
+                raise
+            self._notify_row_counts(txn.touched_tables())
+        else:
+            txn = Transaction(self.lock_timeout)
+            try:
+                yield txn
+            except BaseException:
+                txn.rollback()
+                raise
+            table_names = txn.touched_tables()
+            txn.commit()
+            self._notify_row_counts(table_names)
+
+    def _check_no_transaction(self, session, statement_name='CREATE TABLE / DROP TABLE'):
+        if session.txn is not None:
+            raise Exception(f"事务中不支持 {statement_name} 语句")
+
+    def _check_not_view(self, table_name):
+        if table_name in self.views:
+            raise Exception(f"'{table_name}' 是物化视图, 不能直接修改, 请使用 REFRESH MATERIALIZED VIEW")
+
+    def _create_table(self, statement):
+        """
+        表创建实现
+        支持INT/VARCHAR数据类型
+        处理PRIMARY KEY/NOT NULL/UNIQUE约束
+        列级数据校验规则存储
+        :param statement: 语句create_table的语法树节点
+        """
+        table_name = statement['name']
+        # 确保表名唯一
+        if table_name in self.tables:
+            raise Exception(f"表 '{table_name}' 已存在")
+        if table_name in self.views:
+            raise Exception(f"已存在同名的物化视图 '{table_name}'")
+
+        # 初始化表的数据结构，包含列定义、主键信息和数据存储
+        table = {
+            'columns': {},
+            'primary_key': None,
+            'data': [],  # 行元组列表, 列顺序与 columns 一致
+            'offsets': {},  # 列名 -> 行元组中的下标
+            'dictionaries': {},  # 字典编码列: 列名 -> ColumnDictionary
+            'indexes': {},  # 列名 -> 哈希索引, 主键和 UNIQUE 列自动建立
+            'stats': None,  # 列统计信息, 供查询计划器估算代价
+            'views': [],  # 以此表为基表、需要增量维护的物化视图
+            'version': next_version(),  # 数据版本号, 每次修改时更新(见 transaction.py)
+            'lock': new_table_lock()  # 表级写锁
+        }
+        # 遍历语句中的每个列，提取列名、数据类型和约束
+        for column in statement['columns']:
+            col_name = column['name']
+            col_type = column['type']
+            constraints = column['constraints']  # 约束：如 PRIMARY KEY、NOT NULL、UNIQUE，存储在列表中。
+
+            table['columns'][col_name] = {
+                'type': col_type,
+                'constraints': constraints
+            }
+            # 字典编码只用于取值种类少的 VARCHAR 列, 主键/UNIQUE 列每行取值都不同
+            if DICTIONARY in constraints:
+                if 'VARCHAR' not in col_type:
+                    raise Exception(f"列 '{col_name}' 不是 VARCHAR 类型, 不能使用字典编码")
+                if 'PRIMARY KEY' in constraints or 'UNIQUE' in constraints:
+                    raise Exception(f"主键或 UNIQUE 列 '{col_name}' 不能使用字典编码")
+            # 处理主键约束
+            if 'PRIMARY KEY' in constraints:
+                if table['primary_key'] is not None:
+                    raise Exception(f"表 '{table_name}' 只能有一个主键")
+                table['primary_key'] = col_name  # 记录此表的主键
+        table['offsets'] = column_offsets(table['columns'])
+        table['dictionaries'] = build_dictionaries(table)
+        table['indexes'] = build_indexes(table)
+        table['stats'] = TableStats(table['columns'], table['dictionaries'])
+
+        with self._catalog_lock:
+            if table_name in self.tables or table_name in self.views:
+                raise Exception(f"表 '{table_name}' 已存在")
+            self.tables[table_name] = table  # 保存表
+
+    def _insert(self, statement, txn):
+        """
+        处理 INSERT 语句，将数据插入数据库表中，包含以下关键步骤
+        """
+        # 从 AST 中提取表名和插入值列表
+        table_name = statement['table']
+        values = statement['values']
+
+        self._check_not_view(table_name)
+        if table_name not in self.tables:
+            raise Exception(f"表 '{table_name}' 不存在")
+
+
+        table = self.tables[table_name]  # 获取对应表信息
+        columns = list(table['columns'].keys())  # 获取表中各列名称(关键字)
+        if len(values) != len(columns):  # 确保插入值的数量与表的列数严格一致
+            raise Exception(f"插入的值数量({len(values)})与表 '{table_name}' 的列数({len(columns)})不匹配")
+
+        txn.touch(table_name, table)  # 获取写锁, 之后的唯一性检查才可靠
+
+        # 按列顺序构建数据行
+        row = []
+        for i, value in enumerate(values):
+            col_name = columns[i]  # 列名
+            col_def = table['columns'][col_name]  # 此列的数据类型, 约束
+
+            # 类型检查, NULL 留给非空检查
+            if 'INT' in col_def['type'] and value is not None and not isinstance(value, int):
+                try:
+                    value = int(value)
+                except:
+                    raise Exception(f"列 '{col_name}' 要求整数类型，得到 '{type(value).__name__}'")
+
+            # 非空检查(主键也不能为 NULL)
+            if ('NOT NULL' in col_def['constraints'] or col_name == table['primary_key']) and value is None \
+                    or value == '':
+                raise Exception(f"列 '{col_name}' 不能为NULL")
+
+            # 主键唯一性检查
+            if col_name == table['primary_key'] and table['indexes'][col_name].conflicts(value):
+                raise Exception(f"主键 '{col_name}' 的值必须唯一")
+
+            # UNIQUE约束检查
+            if 'UNIQUE' in col_def['constraints'] and table['indexes'][col_name].conflicts(value):
+                raise Exception(f"列 '{col_name}' 的值必须唯一")
+
+            row.append(stored_value(table, col_name, value))
+
+        txn.append_row(table, tuple(row))
+
+    def _select(self, statement, session=None, control=None):
+        """
+        SELECT 查找语句实现（多表支持）
+        由查询计划器生成物理计划(见 planner.py), 再逐个算子流水线执行
+        """
+        txn = (session or self.session).txn
+        versions = self._cache_versions(statement, txn)
+        if versions is not None:
+            key = statement_key(statement)
+            rows = self.result_cache.lookup(key, versions)
+            if rows is not None:
+                return rows
+
+        tables = self._query_tables(statement, txn)
+        start = time.perf_counter()
+        root = plan_select(statement, tables)
+        if control is not None:
+            control.add_phase('plan', time.perf_counter() - start)
+            control.plan = root
+        ctx = ExecutionContext(tables, txn, control=control)
+        ctx.open(plan_tables(statement))
+        rows = execute_plan(root, ctx)
+        if versions is not None:
+            self.result_cache.store(key, versions, rows)
+        return rows
+
+    # ---------------------- 查询结果缓存 ----------------------
+    def enable_result_cache(self, max_bytes=DEFAULT_MAX_BYTES):
+        """开启 SELECT 结果缓存, 缓存的结果总量不超过 max_bytes 字节"""
+        self.result_cache = ResultCache(max_bytes)
+
+    def disable_result_cache(self):
+        self.result_cache = None
+
+    def _cache_versions(self, statement, txn):
+        """
+        查询读取的各表的版本号, 作为缓存项的标记; 不能使用缓存时返回 None:
+        缓存未开启、在显式事务中、读取物化视图、或有表正被其他事务修改
+        """
+        if self.result_cache is None or txn is not None:
+            return None
+        versions = []
+        for table_name in dict.fromkeys(plan_tables(statement)):
+            table = self.tables.get(table_name)
+            if table is None or table.get('committed') is not None:
+                return None
+            versions.append((table_name, table['version']))
+        return tuple(versions)
+
+    def _query_tables(self, statement, txn):
+        """查询可见的表; 引用了物化视图时加入视图保存的结果(只读表)"""
+        names = [name for name in plan_tables(statement) if name in self.views]
+        if not names:
+            return self.tables
+        tables = dict(self.tables)
+        for name in names:
+            tables[name] = self.views[name].table(txn)
+        return tables
+
+    def _delete(self, statement, txn, control=None):
+        """DELETE语句"""
+        table_name = statement['table']
+        where_clause = statement['where']
+
+        self._check_not_view(table_name)
+        if table_name not in self.tables:
+            raise Exception(f"表 '{table_name}' 不存在")
+
+        table = self.tables[table_name]
+        txn.touch(table_name, table)
+
+        positions = match_positions(table_name, table, where_clause, control)
+        if not positions:
+            raise Exception(f"删除失败, 未找到符合的记录 ")
+
+        # 构建新列表后整体替换, 正在读取旧列表的查询不受影响; 旧列表记入撤销日志
+        txn.delete_rows(table, positions)
+
+    def _update(self, statement, txn, control=None):
+        table_name = statement['table']
+        assignments = statement['assignments']
+        where_clause = statement['where']
+
+        self._check_not_view(table_name)
+        if table_name not in self.tables:
+            raise Exception(f"表 '{table_name}' 不存在")
+
+        table = self.tables[table_name]
+        columns = list(table['columns'].keys())
+
+        # 验证所有要更新的列都存在
+        for assignment in assignments:
+            col_name = assignment['column']
+            if col_name not in columns:
+                raise Exception(f"列 '{col_name}' 不存在于表 '{table_name}' 中")
+
+        txn.touch(table_name, table)
+
+        # 确定要更新的行(主键/UNIQUE 列的等值条件直接查索引)
+        positions = match_positions(table_name, table, where_clause, control)
+        if where_clause and not positions:
+            raise Exception(f"更新失败, 未找到符合的记录 ")
+
+        # 写时复制: 用新的行元组替换旧行, 旧行记入撤销日志;
+        # 中途失败时由调用方回滚, 其他会话在提交前看不到更新到一半的数据
+        data = txn.writable(table)
+        indexes = table['indexes']
+        offsets = table['offsets']
+
+        # 赋值表达式只编译一次, 作用于正在修改的值列表, 后面的赋值能看到前面赋值的结果;
+        # 每列的类型和约束也在循环之外取出
+        scope = Scope([{'name': table_name, 'alias': table_name}], {table_name: table})
+        compiled = []
+        for assignment in assignments:
+            col_name = assignment['column']
+            col_def = table['columns'][col_name]
+            compiled.append((col_name, compile_expression(assignment['expr'], scope, row_getter(table)),
+                             offsets[col_name], 'INT' in col_def['type'],
+                             'NOT NULL' in col_def['constraints'] or col_name == table['primary_key'],
+                             col_name == table['primary_key'], 'UNIQUE' in col_def['constraints']))
+
+        # 更新行
+        for pos in positions:
+            values = list(data[pos])
+            for col_name, evaluate, offset, is_int, not_null, is_key, unique in compiled:
+                new_value = evaluate(values)
+
+                # 类型检查, NULL 留给非空检查
+                if is_int and new_value is not None and not isinstance(new_value, int):
+                    try:
+                        new_value = int(new_value)
+                    except:
+                        raise Exception(f"列 '{col_name}' 要求整数类型，得到 '{type(new_value).__name__}'")
+
+                # 非空检查
+                if not_null and new_value is None:
+                    raise Exception(f"列 '{col_name}' 不能为NULL")
+
+                # 主键唯一性检查（如果更新主键）
+                if is_key and indexes[col_name].conflicts(new_value, pos):
+                    raise Exception(f"更新后的主键值 '{new_value}' 已存在")
+
+                # UNIQUE约束检查
+                if unique and indexes[col_name].conflicts(new_value, pos):
+                    raise Exception(f"更新后的列 '{col_name}' 值必须唯一")
+
+                values[offset] = stored_value(table, col_name, new_value)
+            txn.replace_row(table, pos, tuple(values))
+
+    def get_table_data(self, table_name, limit=100):
+        """获取表中的前 limit 行, 每行是可按列名访问的只读视图(RowView)"""
+        return self.get_table_page(table_name, 0, limit)
+
+    def get_table_page(self, table_name, offset=0, size=100):
+        """
+        按存储顺序读取表数据的一页, 供图形界面按需分页加载
+        行列表支持随机访问, 任意一页的代价都只与 size 有关, 与表的大小和 offset 无关
+        :return: RowView 列表, 超出末尾时返回空列表
+        """
+        table = self._table_for_read(table_name)
+        snapshot = take_snapshot(table, self.session.txn)
+        offsets, dictionaries = table['offsets'], table['dictionaries']
+        return [RowView(row, offsets, dictionaries) for row in snapshot[offset:offset + size]]
+
+    def get_table_row_count(self, table_name):
+        """表的行数(与 get_table_page 读取的数据一致)"""
+        return len(take_snapshot(self._table_for_read(table_name), self.session.txn))
+
+    def _table_for_read(self, table_name):
+        if table_name not in self.tables:
+            raise Exception(f"表 '{table_name}' 不存在")
+        return self.tables[table_name]
+
+    def insert_row(self, table_name, values):
+        """插入新行"""
+        table = self._table_for_write(table_name)
+        with self._write_transaction(self.session) as txn:
+            txn.touch(table_name, table)  # 唯一性检查与追加需在写锁内完成
+            return self._insert_values(table_name, table, values, txn)
+
+    def update_row(self, table_name, primary_key_value, updates):
+        """更新行"""
+        table = self._table_for_write(table_name)
+        primary_key_value = self._key_value(table_name, table, primary_key_value, "更新")
+        with self._write_transaction(self.session) as txn:
+            txn.touch(table_name, table)
+            self._update_by_key(table_name, table, primary_key_value, updates, txn)
+            return True
+
+    def delete_row(self, table_name, primary_key_value):
+        """删除行"""
+        table = self._table_for_write(table_name)
+        primary_key_value = self._key_value(table_name, table, primary_key_value, "删除")
+        with self._write_transaction(self.session) as txn:
+            txn.touch(table_name, table)
+            txn.delete_rows(table, [self._position_of(table, primary_key_value)])
+
+        return True
+
+    def apply_changes(self, table_name, deleted=(), updated=(), inserted=(), session=None):
+        """
+        在一个事务中批量应用图形界面编辑的结果, 全部成功或全部不生效
+        :param deleted: 要删除的行的主键值列表
+        :param updated: [(主键值, {列名: 新值})], 主键值是修改前的值
+        :param inserted: 新行的值列表(按列顺序)的列表
+        行通过主键索引定位, 所有删除合并为一次 delete_rows, 耗时只与修改的行数有关(删除另需重建一次行列表)
+        :return: (删除行数, 更新行数, 插入行数)
+        """
+        table = self._table_for_write(table_name)
+        deleted = [self._key_value(table_name, table, key, "删除") for key in deleted]
+        updated = [(self._key_value(table_name, table, key, "更新"), updates) for key, updates in updated]
+        with self._write_transaction(session or self.session) as txn:
+            txn.touch(table_name, table)
+            # 先删除, 用户可能把某行的主键改成了被删除行的主键
+            if deleted:
+                txn.delete_rows(table, {self._position_of(table, key) for key in deleted})
+            for key, updates in updated:
+                self._update_by_key(table_name, table, key, updates, txn)
+            for values in inserted:
+                self._insert_values(table_name, table, values, txn)
+        return len(deleted), len(updated), len(inserted)
+
+    def _table_for_write(self, table_name):
+        self._check_not_view(table_name)
+        if table_name not in self.tables:
+            raise Exception(f"表 '{table_name}' 不存在")
+        return self.tables[table_name]
+
+    def _key_value(self, table_name, table, primary_key_value, action):
+        """按主键列的类型转换图形界面传入的主键值"""
+        primary_key = table['primary_key']
+        if not primary_key:
+            raise Exception(f"表 '{table_name}' 没有主键，无法{action}")
+
+        # 获取主键列的数据类型
+        data_type = table['columns'][primary_key]['type']
+        # 根据数据类型转换主键值
+        try:
+            if 'INT' in data_type:
+                return int(primary_key_value)
+            elif 'VARCHAR' in data_type:
+                return str(primary_key_value)
+            # 可根据需要添加其他数据类型转换
+            return primary_key_value
+        except ValueError:
+            raise Exception(f"主键值 '{primary_key_value}' 无法转换为列 '{primary_key}' 的类型 {data_type}")
+
+    def _position_of(self, table, primary_key_value):
+        pos = table['indexes'][table['primary_key']].lookup(primary_key_value)  # 通过主键索引定位
+        if pos is None:
+            raise Exception(f"找不到主键值为 '{primary_key_value}' 的行")
+        return pos
+
+    def _insert_values(self, table_name, table, values, txn):
+        """校验并追加一行(调用方已持有写锁), 返回新行的 RowView"""
+        columns = list(table['columns'].keys())
+
+        if len(values) != len(columns):
+            raise Exception(f"插入的值数量({len(values)})与表 '{table_name}' 的列数({len(columns)})不匹配")
+
+        row = []
+        for i, value in enumerate(values):
+            col_name = columns[i]
+            col_def = table['columns'][col_name]
+
+            # 类型检查
+            if 'INT' in col_def['type'] and value is not None and value != '':
+                try:
+                    value = int(value)
+                except:
+                    raise Exception(f"列 '{col_name}' 要求整数类型，得到 '{type(value).__name__}'")
+
+            # 非空检查
+            if 'NOT NULL' in col_def['constraints'] and (value is None or value == ''):
+                raise Exception(f"列 '{col_name}' 不能为NULL")
+
+            # 主键唯一性检查
+            if col_name == table['primary_key'] and table['indexes'][col_name].conflicts(value):
+                raise Exception(f"主键 '{col_name}' 的值必须唯一")
+
+            # UNIQUE约束检查
+            if 'UNIQUE' in col_def['constraints'] and table['indexes'][col_name].conflicts(value):
+                raise Exception(f"列 '{col_name}' 的值必须唯一")
+
+            row.append(stored_value(table, col_name, value if value != '' else None))
+
+        row = tuple(row)
+        txn.append_row(table, row)
+        return row_view(table, row)
+
+    def _update_by_key(self, table_name, table, primary_key_value, updates, txn):
+        """按主键更新一行(调用方已持有写锁)"""
+        primary_key = table['primary_key']
+        indexes = table['indexes']
+        pos = self._position_of(table, primary_key_value)
+
+        offsets = table['offsets']
+        values = list(table['data'][pos])  # 写时复制, 不修改已发布的行
+        row = row_view(table, values)
+        for col_name, value in updates.items():
+            if col_name not in table['columns']:
+                raise Exception(f"列 '{col_name}' 不存在于表 '{table_name}' 中")
+
+            col_def = table['columns'][col_name]
+
+            # 类型检查
+            if 'INT' in col_def['type'] and value is not None and value != '':
+                try:
+                    value = int(value)
+                except:
+                    raise Exception(f"列 '{col_name}' 要求整数类型，得到 '{type(value).__name__}'")
+
+            # 非空检查
+            if 'NOT NULL' in col_def['constraints'] and (value is None or value == ''):
+                raise Exception(f"列 '{col_name}' 不能为NULL")
+
+            # 主键唯一性检查
+            if col_name == primary_key and value != primary_key_value:
+                if indexes[primary_key].conflicts(value, pos):
+                    raise Exception(f"更新后的主键值 '{value}' 已存在")
+
+            # UNIQUE约束检查
+            if 'UNIQUE' in col_def['constraints'] and value != row[col_name]:
+                if indexes[col_name].conflicts(value, pos):
+                    raise Exception(f"更新后的列 '{col_name}' 值必须唯一")
+
+            values[offsets[col_name]] = stored_value(table, col_name, value if value != '' else None)
+
+        txn.replace_row(table, pos, tuple(values))
+
+    def _drop_table(self, statement, session=None):
+        """表删除实现"""
+        table_name = statement['name']
+        if table_name not in self.tables:
+            raise Exception(f"表 '{table_name}' 不存在")
+        for view in self.views.values():
+            if table_name in view.tables:
+                raise Exception(f"表 '{table_name}' 被物化视图 '{view.name}' 引用, 请先删除该视图")
+        with self._write_transaction(session or self.session) as txn:
+            txn.touch(table_name, self.tables[table_name])  # 等待正在修改此表的事务结束
+            with self._catalog_lock:
+                self.tables.pop(table_name, None)
+
+    # ---------------------- 物化视图 ----------------------
+    def _create_view(self, statement, session=None):
+        """CREATE MATERIALIZED VIEW 视图名 AS SELECT ..."""
+        name = statement['name']
+        if name in self.tables or name in self.views:
+            raise Exception(f"表或视图 '{name}' 已存在")
+        view = MaterializedView(name, statement['query'], self.tables)
+        with self._write_transaction(session or self.session) as txn:
+            for table_name in view.tables:  # 等待修改基表的事务结束, 计算结果期间基表不会变化
+                txn.touch(table_name, self.tables[table_name])
+            view.refresh(self.tables, txn)
+            with self._catalog_lock:
+                if name in self.tables or name in self.views:
+                    raise Exception(f"表或视图 '{name}' 已存在")
+                self.views[name] = view
+                if view.incremental:  # 持有基表写锁时注册, 不会漏掉修改
+                    base = self.tables[view.tables[0]]
+                    base['views'] = base['views'] + [view]
+
+    def refresh_view(self, view_name, session=None):
+        """
+        REFRESH MATERIALIZED VIEW: 重新执行定义视图的查询
+        :return: 视图的行数
+        """
+        if view_name not in self.views:
+            raise Exception(f"物化视图 '{view_name}' 不存在")
+        view = self.views[view_name]
+        with self._write_transaction(session or self.session) as txn:
+            for table_name in view.tables:
+                txn.touch(table_name, self.tables[table_name])
+            return view.refresh(self.tables, txn)
+
+    def _drop_view(self, statement, session=None):
+        """DROP MATERIALIZED VIEW 视图名"""
+        view_name = statement['name']
+        if view_name not in self.views:
+            raise Exception(f"物化视图 '{view_name}' 不存在")
+        view = self.views[view_name]
+        with self._write_transaction(session or self.session) as txn:
+            for table_name in view.tables:
+                txn.touch(table_name, self.tables[table_name])
+            with self._catalog_lock:
+                self.views.pop(view_name, None)
+                if view.incremental:
+                    base = self.tables[view.tables[0]]
+                    base['views'] = [v for v in base['views'] if v is not view]
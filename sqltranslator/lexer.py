@@ -0,0 +1,301 @@
+"""SQL 词法分析器"""
+
+import re
+
+# ===== 词法分析器 =====
+# 读取器模式标志
+STR_READER = 0    # 字符流模式
+TOKEN_READER = 1  # Token列表模式
+
+
+# SQL常用关键字集合（部分）
+KEYWORDS = {
+    'SELECT', 'FROM', 'WHERE', 'CREATE', 'TABLE', 'INSERT', 'INTO',
+    'VALUES', 'DELETE', 'UPDATE', 'SET', 'INT', 'VARCHAR', 'PRIMARY',
+    'KEY', 'NOT', 'NULL', 'AND', 'OR', 'AS', 'DISTINCT', 'ORDER', 'BY',
+    'ASC', 'DESC', 'LIKE', 'IN', 'BETWEEN', 'LIMIT', 'COUNT', 'SUM',
+    'AVG', 'MIN', 'MAX', 'GROUP', 'HAVING', 'UNIQUE', 'DROP',
+    'BEGIN', 'COMMIT', 'ROLLBACK', 'TRANSACTION', 'EXPLAIN', 'ANALYZE',
+    'JOIN', 'INNER', 'LEFT', 'OUTER', 'CROSS', 'ON', 'USING', 'DICTIONARY',
+    'MATERIALIZED', 'VIEW', 'REFRESH', 'CASE', 'WHEN', 'THEN', 'ELSE', 'END'
+}
+KEYWORDS_AS_OPERATORS = {'LIKE', 'IN', 'BETWEEN'}  # 新增的关键字视为操作符
+# 操作符映射表
+OPERATORS = {
+    '=': 'EQ', '<>': 'NEQ', '!=': 'NEQ', '<': 'LT', '<=': 'LTE',
+    '=<': 'LTE', '>': 'GT', '>=': 'GTE', '=>': 'GTE',
+    '+': 'PLUS', '-': 'MINUS', '*': 'ASTERISK', '/': 'SLASH',
+    ',': 'COMMA', '(': 'LPAREN', ')': 'RPAREN', ';': 'SEMI',
+    '.': 'DOT', '[': 'LBRACKET', ']': 'RBRACKET'
+}
+
+
+def error(src, msg):
+    raise Exception(f'{src} : {msg}')
+
+
+def tk_tag(t):
+    return t[0]
+
+def mk_tk(tag, val=None):
+    return [tag, val]
+
+
+class BaseReader:
+    """SQL命令 字符串/token列表 读取器"""
+    def __init__(self, s, err, mod=STR_READER):
+        self.err = err
+        self.pos = -1  # 当前读取到的位置
+        self.current_val = None  # 当前读取到的值
+        self.current_str = s  # 输入的srt字符串/token
+        self.current_mod = mod  # 当前模式(读取str or 读取token)
+        self.next()
+
+    def peek(self, p=0):
+        """读取前方第p个字符"""
+        if self.pos + p >= len(self.current_str):
+            return 'eof'
+        elif self.current_mod == STR_READER:  # 读取字符串
+            return self.current_str[self.pos + p]
+        else:  # 读取token
+            return tk_tag(self.current_str[self.pos + p])
+
+    def is_eof(self):
+        """判断是否读完"""
+        return self.pos >= len(self.current_str)
+
+    def skip(self, n=1):
+        """跳过n个字符"""
+        self.pos += n
+
+    def next(self):
+        """读取下一个字符"""
+        old = self.current_val
+        self.pos = self.pos + 1
+        if self.pos >= len(self.current_str):
+            self.current_val = 'eof'
+        else:
+            self.current_val = self.current_str[self.pos]
+        return old
+
+    def match(self, t):
+        if self.current_mod == STR_READER and self.peek() != t:
+            self.err(f'期望 "{t}" , 实际为 "{self.current_val}"')
+        elif self.current_mod == TOKEN_READER and t not in self.current_val:
+            self.err(f'期望 "{t}" , 实际为 "{self.current_val}"')
+        return self.next()
+
+
+def sql_lexer(input_str):
+    """SQL命令词法解析器"""
+
+    def _error(msg):
+        # 专用报错
+        error('SQL lexer', msg)
+
+    reader = BaseReader(input_str, _error, 0)  # 初始化读取器, 设置为字符流模式
+    tokens = []  # 储存由 SQL命令字符 转化而成的 Token列表
+
+    def tokenize():
+        """主入口：生成Token列表"""
+        while not reader.is_eof():
+            c = reader.peek()
+
+            # 跳过空白字符 或 注释符
+            if c.isspace() or (reader.peek() == '-' and reader.peek(1) == '-') or (reader.peek() == '/' and reader.peek(1) == '*') :  # 跳过空白符 或 "--"注释 或 "/**/" 注释
+                _skip_whitespace()
+                continue
+
+            # 处理标识符和关键字
+            if c.isalpha() or c == '_':
+                _read_identifier()
+                continue
+
+            # 处理数字字面量
+            if c.isdigit():
+                _read_number()
+                continue
+
+            # 处理字符串字面量
+            if c == "'" or c == '"':
+                _read_string()
+                continue
+
+            # 处理操作符
+            if c in OPERATORS:
+                _read_operator()
+                continue
+
+            _error(f"无法识别的字符: {c}")
+
+        return tokens
+
+    def _skip_whitespace():
+        while True:
+            # 处理空白符
+            while reader.peek() in [' ', '\t', '\r', '\n']:
+                reader.next()
+            # 新增注释处理; 单个 '-' 和 '/' 是运算符
+            if reader.peek() == '-' and reader.peek(1) == '-':
+                while reader.peek() not in ['\n', '\r', 'eof']:
+                    reader.next()
+                continue
+            elif reader.peek() == '/' and reader.peek(1) == '*':
+                reader.next()  # 跳过'/'
+                reader.next()  # 跳过'*'
+                while True:
+                    if reader.peek() == '*' and reader.peek(1) == '/' :
+                        reader.next()  # 跳过'*'
+                        reader.next()  # 跳过'/'
+                        break
+                    elif reader.peek() == 'eof':
+                        _error("非法注释: 未匹配到 '*/'")
+                    reader.next()
+            else:
+                break
+
+    def _read_identifier():
+        """读取标识符或关键字"""
+        start_pos = reader.pos
+        while (c := reader.peek()) and (c.isalnum() or c == '_') and c != 'eof':
+            reader.next()
+
+        value = reader.current_str[start_pos:reader.pos]
+        upper_value = value.upper()
+
+        # 判断是否是关键字
+        if upper_value in KEYWORDS:
+            if upper_value in KEYWORDS_AS_OPERATORS:
+                # 将LIKE等关键字作为操作符处理
+                tokens.append(mk_tk(upper_value,'OPERATOR'))  # 标记类型为OPERATOR，值为LIKE
+            else:
+                tokens.append(mk_tk(upper_value, 'KEYWORD'))
+        else:
+            tokens.append(mk_tk('IDENTIFIER', value))
+            # tokens.append(('IDENTIFIER', value))
+
+    def _read_number():
+        """读取数字字面量（整数或浮点数）"""
+        start_pos = reader.pos
+        has_dot = False
+
+        while (c := reader.peek()) and (c.isdigit() or c == '.'):
+            if c == '.':
+                if has_dot:
+                    _error("数字包含多个小数点")
+                has_dot = True
+            reader.next()
+
+        value = reader.current_str[start_pos:reader.pos]
+        tokens.append(mk_tk('NUMBER', float(value) if has_dot else int(value)))
+        # tokens.append(('NUMBER', float(value) if has_dot else int(value)))
+
+    def _read_string():
+        """读取字符串字面量"""
+        start_quotation = reader.peek()  # 记录起始引号
+        reader.next()  # 跳过起始引号
+        start_pos = reader.pos
+        escaped = False
+
+        while True:
+            c = reader.peek()
+            if c is None:
+                _error("未闭合的字符串")
+
+            if escaped:
+                escaped = False
+            elif c == "\\":
+                escaped = True
+            elif c == "'" and start_quotation == c:
+                break
+            elif c == '"' and start_quotation == c:
+                break
+
+            reader.next()
+
+        value = reader.current_str[start_pos:reader.pos]
+        tokens.append(mk_tk('STRING', value))
+        # tokens.append(('STRING', value))
+        reader.next()  # 跳过结束引号
+
+    def _read_operator():
+        """读取操作符，处理组合操作符如>=, <=等"""
+        c = reader.next()
+        next_c = reader.peek()
+
+        # 优先处理双字符操作符
+        if next_c and (op := c + next_c) in OPERATORS:
+            reader.next()
+            tokens.append(mk_tk(OPERATORS[op], 'OPERATOR'))
+            # tokens.append(('OPERATOR', OPERATORS[op]))
+        elif c in OPERATORS:
+            tokens.append(mk_tk(OPERATORS[c],'OPERATOR' ))
+            # tokens.append(('OPERATOR', OPERATORS[c]))
+        else:
+            _error(f"无法识别的操作符: {c}")
+
+    return tokenize()  # 开始执行词法解析器程序, 最终返回SQL命令对应Token列表
+
+
+
+# 语句开头的空白和注释, 用于计算语句真正的起始行
+_LEADING_TRIVIA = re.compile(r'(?:\s+|--[^\n]*|/\*.*?\*/)*', re.S)
+
+
+def split_statements(chunks):
+    """
+    将 SQL 文本流按分号切分为单条语句（流式, 不需要一次读入整个文件）
+    正确跳过字符串、"--" 注释和 "/**/" 注释中的分号
+    :param chunks: 可迭代的文本块（如文件对象, 按行迭代）
+    :return: 生成器, 产出 (起始行号, 语句文本), 语句文本包含结尾的分号
+    """
+    buf = []  # 当前语句的字符
+    line_no = 1  # 当前行号
+    buf_line = 1  # buf 第一个字符所在行
+    quote = None  # 当前所在字符串的引号, None 表示不在字符串中
+    escaped = False
+    in_line_comment = False
+    in_block_comment = False
+    prev = ''
+
+    def flush():
+        text = ''.join(buf)
+        skipped = _LEADING_TRIVIA.match(text).group()
+        return buf_line + skipped.count('\n'), text
+
+    for chunk in chunks:
+        for c in chunk:
+            buf.append(c)
+            if c == '\n':
+                line_no += 1
+
+            if quote:  # 字符串内部
+                if escaped:
+                    escaped = False
+                elif c == '\\':
+                    escaped = True
+                elif c == quote:
+                    quote = None
+            elif in_line_comment:
+                if c == '\n' or c == '\r':
+                    in_line_comment = False
+            elif in_block_comment:
+                if prev == '*' and c == '/':
+                    in_block_comment = False
+                    c = ''  # 避免 "*/*" 被再次识别为注释开始
+            elif prev == '-' and c == '-':
+                in_line_comment = True
+            elif prev == '/' and c == '*':
+                in_block_comment = True
+                c = ''  # 避免 "/*/" 被识别为注释结束
+            elif c == "'" or c == '"':
+                quote = c
+            elif c == ';':
+                yield flush()
+                buf = []
+                buf_line = line_no
+            prev = c
+
+    # 文件末尾没有分号的剩余内容也交给调用方（由语法分析器报告缺少分号）
+    if ''.join(buf).strip():
+        yield flush()
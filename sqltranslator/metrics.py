@@ -0,0 +1,188 @@
+"""
+语句执行指标与性能分析钩子
+
+SQLInterpreter.add_hook(hook) 注册钩子后, 解释器为每条语句收集 StatementMetrics:
+- 各阶段耗时: plan(生成查询计划, 仅 SELECT)、execute(其余执行时间);
+  通过 SQLInterpreter.run_sql 执行时, 整批语句的 lex / parse 耗时记录在 BatchMetrics 中;
+- 扫描的行数、被扫描条件过滤掉的行数、返回的行数、索引查找次数(来自 ExecutionControl 的计数);
+- 可选: 内存分配峰值(tracemalloc)与 cProfile 报告, 见 SQLInterpreter.enable_profiling;
+- 通过 run_sql 执行时还有规范化的 SQL 文本(字面量替换为 ?), SELECT 语句有物理计划.
+每条语句结束后调用 hook.on_statement(metrics), 每批语句结束后调用 hook.on_batch(batch).
+钩子在执行语句的线程中调用, 需要在其他线程中显示的(如图形界面)自行转发.
+没有注册钩子时不收集任何指标, 不影响执行速度.
+"""
+
+import cProfile
+import io
+import pstats
+import threading
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+from .lexer import OPERATORS
+
+OPERATOR_SYMBOLS = {}  # Token 名 -> 运算符文本
+for _symbol, _name in OPERATORS.items():
+    OPERATOR_SYMBOLS.setdefault(_name, _symbol)
+CALL_KEYWORDS = {'COUNT', 'SUM', 'AVG', 'MIN', 'MAX', 'VARCHAR'}  # 后面紧跟括号的关键字
+
+
+class MetricsHook:
+    """钩子基类, 子类按需重写"""
+
+    def on_statement(self, metrics):
+        pass
+
+    def on_batch(self, batch):
+        pass
+
+
+class StatementMetrics:
+    __slots__ = ('index', 'statement_type', 'phases', 'total', 'rows_scanned', 'rows_filtered',
+                 'rows_returned', 'index_hits', 'peak_bytes', 'profile', 'error', 'statement', 'sql', 'plan')
+
+    def __init__(self, index, statement):
+        self.index = index  # 在本批语句中的序号
+        self.statement = statement  # 语法树
+        self.statement_type = statement['type']
+        self.phases = {}  # 阶段名 -> 秒
+        self.total = 0.0
+        self.rows_scanned = 0
+        self.rows_filtered = 0
+        self.rows_returned = 0
+        self.index_hits = 0
+        self.peak_bytes = None  # 开启内存跟踪时的分配峰值
+        self.profile = None  # 开启 cProfile 时的报告文本
+        self.error = None
+        self.sql = None  # 规范化的 SQL 文本, 只有 run_sql 执行时才有
+        self.plan = None  # SELECT 的物理计划根算子, 用 explain_lines 格式化
+
+    def as_dict(self):
+        return {
+            'index': self.index,
+            'type': self.statement_type,
+            'sql': self.sql,
+            'total_ms': round(self.total * 1000, 3),
+            'phases_ms': {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()},
+            'rows_scanned': self.rows_scanned,
+            'rows_filtered': self.rows_filtered,
+            'rows_returned': self.rows_returned,
+            'index_hits': self.index_hits,
+            'peak_bytes': self.peak_bytes,
+            'error': self.error,
+        }
+
+
+class BatchMetrics:
+    """一次 execute / run_sql 调用"""
+
+    def __init__(self, sql=None):
+        self.sql = sql  # run_sql 执行的原始文本
+        self.phases = {}  # lex / parse, 只有 run_sql 会记录
+        self.statement_sql = []  # 各语句规范化的 SQL 文本, 只有 run_sql 会记录
+        self.statements = []  # StatementMetrics 列表
+        self.total = 0.0
+
+    def as_dict(self):
+        return {
+            'total_ms': round(self.total * 1000, 3),
+            'phases_ms': {name: round(seconds * 1000, 3) for name, seconds in self.phases.items()},
+            'statements': [metrics.as_dict() for metrics in self.statements],
+        }
+
+
+def normalize_statements(tokens):
+    """
+    Token 列表 -> 每条语句规范化的 SQL 文本: 关键字大写, 字符串和数字字面量替换为 ?,
+    字面量不同的同一条语句得到相同的文本, 用于慢查询统计
+    """
+    statements = []
+    parts = []
+    previous = None
+    for tag, value in tokens:
+        if value == 'OPERATOR':
+            if tag == 'SEMI':
+                if parts:  # 语法分析器会丢弃空语句(;;), 这里也不产生文本, 保持与语句一一对应
+                    statements.append(''.join(parts).strip())
+                parts = []
+                previous = None
+                continue
+            text = OPERATOR_SYMBOLS.get(tag, tag)
+        elif tag in ('STRING', 'NUMBER'):
+            text = '?'
+        elif value == 'KEYWORD':
+            text = tag
+        else:
+            text = str(value)
+        tight = text in (',', ')', '.') or parts and parts[-1].endswith(('(', '.'))
+        if text == '(' and (previous == 'IDENTIFIER' or previous in CALL_KEYWORDS):
+            tight = True
+        parts.append(text if tight else ' ' + text)
+        previous = tag
+    if parts:
+        statements.append(''.join(parts).strip())
+    return statements
+
+
+def profile_report(profiler, limit=25):
+    """cProfile 结果按累计耗时排序的前 limit 项"""
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+    return out.getvalue()
+
+
+@contextmanager
+def capture(metrics, memory=False, cpu=False):
+    """执行期间跟踪内存分配峰值(相对开始时)和 cProfile, 结果写入 metrics"""
+    started = False
+    if memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started = True
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+    profiler = cProfile.Profile() if cpu else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            metrics.profile = profile_report(profiler)
+        if memory:
+            metrics.peak_bytes = max(0, tracemalloc.get_traced_memory()[1] - base)
+            if started:
+                tracemalloc.stop()
+
+
+class MetricsRecorder(MetricsHook):
+    """
+    保留最近 capacity 条语句的指标, 并按语句类型累计次数与耗时, 供命令行和图形界面查看
+    """
+
+    def __init__(self, capacity=200):
+        self.recent = deque(maxlen=capacity)
+        self.by_type = {}  # 语句类型 -> [次数, 总耗时秒, 扫描行数]
+        self._lock = threading.Lock()
+
+    def on_statement(self, metrics):
+        with self._lock:
+            self.recent.append(metrics)
+            totals = self.by_type.setdefault(metrics.statement_type, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += metrics.total
+            totals[2] += metrics.rows_scanned
+
+    def summary(self):
+        with self._lock:
+            return {
+                statement_type: {
+                    'count': count,
+                    'total_ms': round(total * 1000, 3),
+                    'mean_ms': round(total * 1000 / count, 3),
+                    'rows_scanned': scanned,
+                }
+                for statement_type, (count, total, scanned) in self.by_type.items()
+            }
@@ -0,0 +1,592 @@
+"""
+物理执行算子（迭代器模型）
+
+每个算子的 rows(ctx) 是一个生成器, 从子算子逐行拉取数据, 因此 LIMIT 等算子
+可以提前结束整条流水线.
+
+扫描和连接阶段的行是基表行(表中存储的行元组, 见 rows.py)引用组成的元组, 每张表占一个位置,
+连接只是拼接元组, 不复制任何列; 计划器为每个列引用生成从元组取值的函数(getter).
+直到投影(Project)或聚合(HashAggregate)才按 SELECT 列表生成结果字典, 只物化输出的列.
+左外连接中没有匹配的一侧用 NULL_ROW 占位, 从中按下标取任何列都得到 NULL.
+EXPLAIN ANALYZE 时 ExecutionContext 会包装每个算子的迭代, 统计实际输出行数与耗时.
+带 ExecutionControl(见 control.py)执行时, 扫描按批读取并在批之间检查是否已取消.
+"""
+
+import heapq
+import time
+from itertools import islice
+
+from .concurrency import take_snapshot
+from .index import ordered_rows, probe, sort_key
+
+class _NullRow:
+    """外连接中未匹配一侧的占位行, 任何列都是 NULL"""
+    __slots__ = ()
+
+    def __getitem__(self, offset):
+        return None
+
+
+NULL_ROW = _NullRow()
+
+
+class ExecutionContext:
+    """一次查询执行期间共享的状态"""
+
+    def __init__(self, tables, txn=None, analyze=False, control=None):
+        """
+        :param tables: 表字典(SQLInterpreter.tables)
+        :param txn: 执行查询的事务, 用于判断能否看到未提交的修改
+        :param analyze: 是否统计各算子的实际行数和耗时
+        :param control: ExecutionControl, 用于取消执行和报告进度
+        """
+        self.tables = tables
+        self.txn = txn
+        self.analyze = analyze
+        self.control = control
+        self.snapshots = {}
+
+    def open(self, table_names):
+        """语句开始时获取各表的快照, 之后并发提交的写操作对本次查询不可见"""
+        for table_name in table_names:
+            if table_name not in self.snapshots:
+                self.snapshots[table_name] = take_snapshot(self.tables[table_name], self.txn)
+
+    def iterate(self, op):
+        """迭代某个算子的输出"""
+        if not self.analyze:
+            return op.rows(self)
+        return self._instrumented(op)
+
+    def _instrumented(self, op):
+        op.loops += 1
+        perf = time.perf_counter
+        it = op.rows(self)
+        while True:
+            start = perf()
+            try:
+                row = next(it)
+            except StopIteration:
+                op.actual_time += perf() - start
+                return
+            op.actual_time += perf() - start
+            op.actual_rows += 1
+            yield row
+
+
+class Operator:
+    """算子基类"""
+    name = ''
+
+    def __init__(self, *children):
+        self.children = list(children)
+        self.estimated_rows = None  # 计划器估计的输出行数
+        self.actual_rows = 0  # 以下为 EXPLAIN ANALYZE 统计
+        self.actual_time = 0.0
+        self.loops = 0
+
+    def rows(self, ctx):
+        raise NotImplementedError
+
+    def detail(self):
+        """EXPLAIN 中算子名后面的说明"""
+        return ''
+
+    def label(self):
+        detail = self.detail()
+        return f"{self.name} {detail}" if detail else self.name
+
+
+class SeqScan(Operator):
+    """顺序扫描表快照, 可带下推到扫描的过滤条件; 输出只含一张表的行元组 (row,)"""
+    name = 'Seq Scan'
+
+    def __init__(self, table_name, alias, predicate=None, condition=None):
+        """
+        :param predicate: 作用在原始行上的过滤函数
+        :param condition: 过滤条件的文本, 用于 EXPLAIN
+        """
+        super().__init__()
+        self.table_name = table_name
+        self.alias = alias
+        self.predicate = predicate
+        self.condition = condition
+
+    def detail(self):
+        text = f"on {self.table_name}"
+        if self.alias != self.table_name:
+            text += f" {self.alias}"
+        if self.condition:
+            text += f" (filter: {self.condition})"
+        return text
+
+    def source_rows(self, ctx):
+        return ctx.snapshots[self.table_name]
+
+    def rows(self, ctx):
+        predicate = self.predicate
+        control = ctx.control
+        if control is None:
+            for row in self.source_rows(ctx):
+                if predicate is None or predicate(row):
+                    yield (row,)
+            return
+        matched = 0
+        try:
+            for row in control.batches(self.source_rows(ctx)):
+                if predicate is None or predicate(row):
+                    matched += 1
+                    yield (row,)
+        finally:
+            control.rows_matched += matched
+
+
+class IndexLookup(SeqScan):
+    """通过主键/UNIQUE 索引查找等值条件匹配的行"""
+    name = 'Index Lookup'
+
+    def __init__(self, table_name, alias, column, value, predicate=None, condition=None):
+        """
+        :param column: 索引列
+        :param value: 要查找的值
+        :param predicate: 完整的过滤条件(含索引条件), 对查找结果再次校验;
+                          快照无法使用索引时据此退化为扫描
+        """
+        super().__init__(table_name, alias, predicate, condition)
+        self.column = column
+        self.value = value
+
+    def detail(self):
+        text = f"on {self.table_name}"
+        if self.alias != self.table_name:
+            text += f" {self.alias}"
+        text += f" using {self.column} = {self.value!r}"
+        if self.condition:
+            text += f" (filter: {self.condition})"
+        return text
+
+    def source_rows(self, ctx):
+        snapshot = ctx.snapshots[self.table_name]
+        rows = probe(ctx.tables[self.table_name], snapshot, self.column, self.value)
+        if rows is None:
+            return snapshot
+        if ctx.control is not None:
+            ctx.control.index_hits += 1
+        return rows
+
+
+class IndexScan(SeqScan):
+    """按索引列的升序读取全表(不含该列为 NULL 的行), 为归并连接提供有序输入"""
+    name = 'Index Scan'
+
+    def __init__(self, table_name, alias, column, predicate=None, condition=None):
+        super().__init__(table_name, alias, predicate, condition)
+        self.column = column
+
+    def detail(self):
+        text = f"on {self.table_name}"
+        if self.alias != self.table_name:
+            text += f" {self.alias}"
+        text += f" ordered by {self.column}"
+        if self.condition:
+            text += f" (filter: {self.condition})"
+        return text
+
+    def source_rows(self, ctx):
+        snapshot = ctx.snapshots[self.table_name]
+        rows = ordered_rows(ctx.tables[self.table_name], snapshot, self.column)
+        if rows is None:  # 索引不对应该快照, 自行排序
+            offset = ctx.tables[self.table_name]['offsets'][self.column]
+            rows = sorted((row for row in snapshot if row[offset] is not None),
+                          key=lambda row: sort_key(row[offset]))
+        elif ctx.control is not None:
+            ctx.control.index_hits += 1
+        return rows
+
+
+def _join_name(name, kind):
+    return name.replace(' Join', ' Left Join') if kind == 'left' else name
+
+
+class NestedLoopJoin(Operator):
+    """
+    嵌套循环连接: 右侧输入物化一次, 对左侧每一行依次拼接, 并检查连接条件
+    kind 为 'left' 时是左外连接, 左侧没有匹配的行也输出一次, 右侧的列为 NULL
+    """
+    name = 'Nested Loop Join'
+
+    def __init__(self, left, right, predicate=None, condition=None, kind='inner', right_width=1):
+        """:param right_width: 右侧行元组的长度, 左外连接据此补齐 NULL"""
+        super().__init__(left, right)
+        self.predicate = predicate
+        self.condition = condition
+        self.kind = kind
+        self.right_width = right_width
+
+    def label(self):
+        name = _join_name(self.name, self.kind)
+        return f"{name} (join filter: {self.condition})" if self.condition else name
+
+    def rows(self, ctx):
+        inner = list(ctx.iterate(self.children[1]))
+        predicate = self.predicate
+        outer_join = self.kind == 'left'
+        padding = (NULL_ROW,) * self.right_width
+        control = ctx.control
+        for left_row in ctx.iterate(self.children[0]):
+            if control is not None:  # 每个左侧行都要遍历整个右侧, 逐行检查
+                control.check()
+            matched = False
+            for right_row in inner:
+                row = left_row + right_row
+                if predicate is None or predicate(row):
+                    matched = True
+                    yield row
+            if outer_join and not matched:
+                yield left_row + padding
+
+
+class HashJoin(Operator):
+    """
+    哈希连接: 用等值连接条件的键把构建侧(build)装入哈希表, 再逐行探测(probe)
+    children = [探测侧, 构建侧], 内连接时计划器把估计行数较少的一侧作为构建侧;
+    左外连接(kind='left')总是以保留侧探测, 没有匹配的探测行也输出一次.
+    连接键为 NULL 的行不与任何行匹配.
+    """
+    name = 'Hash Join'
+
+    def __init__(self, probe, build, probe_keys, build_keys, predicate=None, condition=None, kind='inner',
+                 build_width=1):
+        """
+        :param probe_keys/build_keys: 两侧一一对应的连接键 [(列名文本, 取值函数)]
+        :param predicate: 等值键之外的其余连接条件
+        :param build_width: 构建侧行元组的长度, 左外连接据此补齐 NULL
+        """
+        super().__init__(probe, build)
+        self.probe_keys = probe_keys
+        self.build_keys = build_keys
+        self.predicate = predicate
+        self.condition = condition
+        self.kind = kind
+        self.build_width = build_width
+
+    def label(self):
+        keys = ' AND '.join(f"{p} = {b}" for (p, _), (b, _) in zip(self.probe_keys, self.build_keys))
+        text = f"{_join_name(self.name, self.kind)} (hash cond: {keys}"
+        if self.condition:
+            text += f"; join filter: {self.condition}"
+        return text + ')'
+
+    def rows(self, ctx):
+        probe_keys = [getter for _, getter in self.probe_keys]
+        build_keys = [getter for _, getter in self.build_keys]
+        if len(build_keys) == 1:
+            build_key, probe_key = build_keys[0], probe_keys[0]
+        else:
+            build_key = lambda row: _null_free(tuple(getter(row) for getter in build_keys))
+            probe_key = lambda row: _null_free(tuple(getter(row) for getter in probe_keys))
+
+        buckets = {}
+        for row in ctx.iterate(self.children[1]):
+            key = build_key(row)
+            if key is not None:
+                buckets.setdefault(key, []).append(row)
+        outer_join = self.kind == 'left'
+        if not buckets and not outer_join:
+            return
+
+        predicate = self.predicate
+        padding = (NULL_ROW,) * self.build_width
+        for probe_row in ctx.iterate(self.children[0]):
+            key = probe_key(probe_row)
+            matches = buckets.get(key) if key is not None else None
+            matched = False
+            if matches:
+                for build_row in matches:
+                    row = probe_row + build_row
+                    if predicate is None or predicate(row):
+                        matched = True
+                        yield row
+            if outer_join and not matched:
+                yield probe_row + padding
+
+
+def _null_free(key):
+    """多列连接键中有 NULL 时整个键视为 NULL"""
+    return None if None in key else key
+
+
+class MergeJoin(Operator):
+    """
+    归并连接(内连接): 两侧输入都已按连接键升序排列(来自 IndexScan),
+    同时向前推进两侧, 键相等的两组行两两拼接; 不需要哈希表, 内存只占一组相同键的行
+    """
+    name = 'Merge Join'
+
+    def __init__(self, left, right, left_key, right_key, predicate=None, condition=None):
+        """:param left_key/right_key: 两侧的连接键 (列名文本, 取值函数)"""
+        super().__init__(left, right)
+        self.left_key = left_key
+        self.right_key = right_key
+        self.predicate = predicate
+        self.condition = condition
+
+    def detail(self):
+        text = f"(merge cond: {self.left_key[0]} = {self.right_key[0]}"
+        if self.condition:
+            text += f"; join filter: {self.condition}"
+        return text + ')'
+
+    def rows(self, ctx):
+        left_key = self.left_key[1]
+        right_groups = _key_groups(ctx.iterate(self.children[1]), self.right_key[1])
+        predicate = self.predicate
+        right = next(right_groups, None)
+        for left_row in ctx.iterate(self.children[0]):
+            value = left_key(left_row)
+            if value is None:
+                continue
+            value = sort_key(value)
+            while right is not None and right[0] < value:  # 右侧推进到不小于左侧键的组
+                right = next(right_groups, None)
+            if right is None:
+                return
+            if right[0] != value:
+                continue
+            for right_row in right[1]:  # 左侧键重复时复用同一组右侧行
+                row = left_row + right_row
+                if predicate is None or predicate(row):
+                    yield row
+
+
+def _key_groups(rows, key):
+    """把按 key(取值函数)有序的行分成 (排序键, [键相同的行]) 组, 跳过键为 NULL 的行"""
+    current, group = None, []
+    for row in rows:
+        value = key(row)
+        if value is None:
+            continue
+        value = sort_key(value)
+        if group and value == current:
+            group.append(row)
+            continue
+        if group:
+            yield current, group
+        current, group = value, [row]
+    if group:
+        yield current, group
+
+
+class Filter(Operator):
+    name = 'Filter'
+
+    def __init__(self, child, predicate, condition):
+        super().__init__(child)
+        self.predicate = predicate
+        self.condition = condition
+
+    def detail(self):
+        return f"({self.condition})"
+
+    def rows(self, ctx):
+        predicate = self.predicate
+        for row in ctx.iterate(self.children[0]):
+            if predicate(row):
+                yield row
+
+
+class HashAggregate(Operator):
+    """
+    哈希分组聚合, 输出以列名为键的结果字典
+    输出列由 items 描述, 每项为 (类型, 输出列名, 参数):
+    - ('group', name, getter):    分组列
+    - ('first', name, getter):    非聚合列, 取分组中第一行的值
+    - ('agg', name, (getter, factory, text)): 聚合函数, getter 为 None 表示 COUNT(*)
+    - ('expr', name, getter):     含聚合函数的表达式, getter 作用于分组 (第一行, 聚合结果列表)
+    having 是作用于分组的条件; 聚合结果列表依次为 items 中的聚合函数和 hidden
+    (只在表达式或 HAVING 中出现的聚合函数); 不满足 having 的分组在生成结果字典之前被丢弃
+    """
+    name = 'Hash Aggregate'
+
+    def __init__(self, child, group_keys, items, having=None, hidden=(), having_text=None):
+        super().__init__(child)
+        self.group_keys = group_keys  # [(列名文本, 取值函数)]
+        self.items = items
+        self.having = having
+        self.hidden = list(hidden)
+        self.having_text = having_text
+
+    def detail(self):
+        parts = []
+        if self.group_keys:
+            parts.append('group by: ' + ', '.join(text for text, _ in self.group_keys))
+        aggregates = [f"{param[2]} AS {name}" if param[2] != name else name
+                      for kind, name, param in self.items if kind == 'agg']
+        aggregates.extend(text for _, _, text in self.hidden)
+        if aggregates:
+            parts.append('aggregates: ' + ', '.join(aggregates))
+        if self.having_text:
+            parts.append('having: ' + self.having_text)
+        return f"({'; '.join(parts)})" if parts else ''
+
+    def rows(self, ctx):
+        keys = [getter for _, getter in self.group_keys]
+        agg_items = [param for kind, _, param in self.items if kind == 'agg'] + self.hidden
+        factories = [factory for _, factory, _ in agg_items]
+        sources = [getter for getter, _, _ in agg_items]
+
+        groups = {}
+        for row in ctx.iterate(self.children[0]):
+            group_key = tuple(getter(row) for getter in keys)
+            state = groups.get(group_key)
+            if state is None:
+                state = groups[group_key] = (row, [factory() for factory in factories])
+            for acc, getter in zip(state[1], sources):
+                acc.add(True if getter is None else getter(row))
+
+        if not groups and not keys:  # 没有 GROUP BY 的聚合查询: 空输入也输出一行
+            groups[()] = (None, [factory() for factory in factories])
+
+        having = self.having
+        for first_row, accumulators in groups.values():
+            results = [acc.result() for acc in accumulators]
+            group = (first_row, results)
+            if having is not None and not having(group):
+                continue
+            values = iter(results)
+            out = {}
+            for kind, name, param in self.items:
+                if kind == 'agg':
+                    out[name] = next(values)
+                elif kind == 'expr':
+                    out[name] = param(group)
+                else:
+                    out[name] = None if first_row is None else param(first_row)
+            yield out
+
+
+class Project(Operator):
+    """
+    投影: 按 SELECT 列表生成结果字典, 是行元组唯一被物化为字典的地方.
+    有表达式列(取值函数带 batch 属性, 见 expressions.compile_batch)时按批计算: 每批 PROJECT_BATCH 行,
+    每个输出列对整批行算出一列值
+    """
+    name = 'Project'
+    PROJECT_BATCH = 1024
+
+    def __init__(self, child, items):
+        """:param items: [(输出列名, 取值函数)]"""
+        super().__init__(child)
+        self.items = items
+
+    def detail(self):
+        return f"({', '.join(name for name, _ in self.items)})"
+
+    def rows(self, ctx):
+        items = self.items
+        source = ctx.iterate(self.children[0])
+        if not any(hasattr(getter, 'batch') for _, getter in items):
+            for row in source:
+                yield {name: getter(row) for name, getter in items}
+            return
+
+        names = [name for name, _ in items]
+        columns = [getattr(getter, 'batch', None) or (lambda rows, getter=getter: list(map(getter, rows)))
+                   for _, getter in items]
+        while True:
+            batch = list(islice(source, self.PROJECT_BATCH))
+            if not batch:
+                return
+            for values in zip(*[column(batch) for column in columns]):
+                yield dict(zip(names, values))
+
+
+class Distinct(Operator):
+    name = 'Distinct'
+
+    def rows(self, ctx):
+        seen = set()
+        for row in ctx.iterate(self.children[0]):
+            row_tuple = tuple(row.items())
+            if row_tuple not in seen:
+                seen.add(row_tuple)
+                yield row
+
+
+class Sort(Operator):
+    """排序; 带 limit 时只保留前 N 行(Top-N, 堆排序)"""
+    name = 'Sort'
+
+    def __init__(self, child, keys, limit=None):
+        """
+        :param keys: [(列名文本, 取值函数, 是否降序)]
+        """
+        super().__init__(child)
+        self.keys = keys
+        self.limit = limit
+
+    def label(self):
+        text = ', '.join(f"{text} DESC" if desc else text for text, _, desc in self.keys)
+        if self.limit is not None:
+            return f"Top-N Sort ({text}; limit {self.limit})"
+        return f"{self.name} ({text})"
+
+    def rows(self, ctx):
+        rows = ctx.iterate(self.children[0])
+        try:
+            yield from self._sorted(rows)
+        except TypeError:
+            raise Exception("ORDER BY 的列包含无法比较的值")
+
+    def _sorted(self, rows):
+        def sort_key(getter):
+            def key_fn(row):
+                value = getter(row)
+                return value is None, value  # NULL 排在升序末尾
+            return key_fn
+
+        directions = {desc for _, _, desc in self.keys}
+        if len(directions) == 1:
+            desc = directions.pop()
+            getters = [getter for _, getter, _ in self.keys]
+
+            def key_fn(row):
+                values = [getter(row) for getter in getters]
+                return tuple((value is None, value) for value in values)
+            if self.limit is not None:
+                pick = heapq.nlargest if desc else heapq.nsmallest
+                return pick(self.limit, rows, key=key_fn)
+            return sorted(rows, key=key_fn, reverse=desc)
+
+        # 升降序混合: 从最后一个排序键开始依次稳定排序
+        rows = list(rows)
+        for _, getter, desc in reversed(self.keys):
+            rows.sort(key=sort_key(getter), reverse=desc)
+        return rows if self.limit is None else rows[:self.limit]
+
+
+class Limit(Operator):
+    name = 'Limit'
+
+    def __init__(self, child, count):
+        super().__init__(child)
+        self.count = count
+
+    def detail(self):
+        return f"({self.count})"
+
+    def rows(self, ctx):
+        return islice(ctx.iterate(self.children[0]), self.count)
+
+
+def explain_lines(op, analyze=False, depth=0):
+    """把物理计划树格式化为 EXPLAIN 的文本行"""
+    text = op.label()
+    if op.estimated_rows is not None:
+        text += f" (estimated rows={op.estimated_rows})"
+    if analyze:
+        text += f" (actual rows={op.actual_rows} loops={op.loops} time={op.actual_time * 1000:.3f} ms)"
+    lines = [text if depth == 0 else '   ' * (depth - 1) + '-> ' + text]
+    for child in op.children:
+        lines.extend(explain_lines(child, analyze, depth + 1))
+    return lines
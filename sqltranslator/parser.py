@@ -0,0 +1,582 @@
+"""SQL 语法分析器"""
+
+from .aggregates import AGGREGATE_FUNCTIONS
+from .expressions import BINDING_POWER, UNARY_POWER, constant_value, literal
+from .lexer import BaseReader, TOKEN_READER, error
+
+# 出现在括号内时说明括号包住的是条件而不是算术表达式
+CONDITION_TOKENS = {'EQ', 'NEQ', 'LT', 'LTE', 'GT', 'GTE', 'LIKE', 'IN', 'BETWEEN', 'AND', 'OR'}
+
+
+def sql_parser(tokens):
+    """SQL 语法解析器"""
+    def _error(msg):
+        # 专用报错
+        error('SQL Parser', msg)
+
+    reader = BaseReader(tokens, _error, TOKEN_READER)  # 初始化读取器, 设置为Token模式
+    statements = []  # 存储解析后的语句
+
+    def parser():
+        """主入口, 生成语法树"""
+        while not reader.is_eof():
+            current_token = reader.current_val
+            if current_token[1] == 'KEYWORD':
+                keyword = reader.next()[0]
+                if keyword == 'CREATE':
+                    statements.append(parse_create())
+                elif keyword == 'INSERT':
+                    statements.append(parse_insert())
+                elif keyword == 'SELECT':
+                    statements.append(parse_select())
+                elif keyword == 'DELETE':
+                    statements.append(parse_delete())
+                elif keyword == 'UPDATE':
+                    statements.append(parse_update())
+                elif keyword == 'DROP':
+                    statements.append(parse_drop())
+                elif keyword in ('BEGIN', 'COMMIT', 'ROLLBACK'):
+                    statements.append(parse_transaction(keyword))
+                elif keyword == 'EXPLAIN':
+                    statements.append(parse_explain())
+                elif keyword == 'ANALYZE':
+                    statements.append(parse_analyze())
+                elif keyword == 'REFRESH':
+                    statements.append(parse_refresh())
+                else:
+                    _error(f"未实现的语句类型: {keyword}")
+            reader.match('SEMI')  # 吃掉语句结束符 ;
+
+        return statements
+
+    def parse_expression(min_power=0):
+        """
+        解析算术表达式(Pratt 解析), 语法树格式见 expressions.py
+        :param min_power: 只结合绑定强度大于它的二元运算符
+        """
+        left = parse_operand()
+        while BINDING_POWER.get(reader.peek(), 0) > min_power:
+            op = reader.next()[0]
+            right = parse_expression(BINDING_POWER[op])  # 同级运算符留给外层, 即左结合
+            left = {'type': 'binary', 'op': op, 'left': left, 'right': right}
+        return left
+
+    def parse_operand():
+        """表达式的操作数: 字面量、NULL、(带表别名的)列名、函数调用、聚合函数、CASE、括号表达式、一元负号"""
+        token = reader.peek()
+        if token == 'CASE':
+            return parse_case()
+        if token in AGGREGATE_FUNCTIONS:  # 只能用于 SELECT 列表和 HAVING, 见 planner._aggregate
+            return parse_aggregate_function()
+        if token == 'IDENTIFIER' and reader.peek(1) == 'LPAREN':
+            return parse_call()
+        if token == 'LPAREN':
+            reader.next()
+            expr = parse_expression()
+            reader.match('RPAREN')
+            return expr
+        if token in ('MINUS', 'PLUS'):
+            reader.next()
+            operand = parse_expression(UNARY_POWER)
+            if token == 'PLUS':
+                return operand
+            if operand['type'] == 'literal' and isinstance(operand['value'], (int, float)):
+                return literal(-operand['value'])  # 负数字面量, 以便走索引和统计信息
+            return {'type': 'unary', 'op': 'MINUS', 'operand': operand}
+        if token in ('NUMBER', 'STRING'):
+            return literal(reader.next()[1])
+        if token == 'NULL':
+            reader.next()
+            return literal(None)
+        if token == 'IDENTIFIER':
+            name = reader.next()[1]
+            if reader.peek() == 'DOT':
+                reader.next()
+                name = f"{name}.{reader.match('IDENTIFIER')[1]}"
+            return {'type': 'column', 'name': name}
+        _error(f"期望值、列名或表达式，得到 {reader.peek()}")
+
+    def parse_call():
+        """函数调用: 名称(参数, ...), 函数名和参数个数在编译表达式时检查(见 functions.lookup)"""
+        name = reader.next()[1].upper()
+        reader.match('LPAREN')
+        args = []
+        while reader.peek() != 'RPAREN':
+            args.append(parse_expression())
+            if reader.peek() != 'COMMA':
+                break
+            reader.next()
+        reader.match('RPAREN')
+        return {'type': 'call', 'name': name, 'args': args}
+
+    def parse_case():
+        """CASE WHEN 条件 THEN 表达式 ... [ELSE 表达式] END, 或 CASE x WHEN 值 THEN ... END"""
+        reader.match('CASE')
+        subject = None
+        if reader.peek() != 'WHEN':
+            subject = condition_operand(parse_expression())
+        whens = []
+        while reader.peek() == 'WHEN':
+            reader.next()
+            if subject is None:
+                when = parse_logical_expression()
+            else:
+                when = {'left': subject, 'op': 'EQ', 'right': condition_operand(parse_expression(), True)}
+            reader.match('THEN')
+            whens.append({'when': when, 'then': parse_expression()})
+        if not whens:
+            _error("CASE 至少需要一个 WHEN 分支")
+        otherwise = None
+        if reader.peek() == 'ELSE':
+            reader.next()
+            otherwise = parse_expression()
+        reader.match('END')
+        return {'type': 'case', 'whens': whens, 'else': otherwise}
+
+    def condition_operand(expr, right=False):
+        """条件的操作数: 列名保存为字符串, 右侧的字面量保存为值, 其他保存为表达式语法树"""
+        if expr['type'] == 'column':
+            return expr['name']
+        if right and expr['type'] == 'literal':
+            return expr['value']
+        return expr
+
+    def parse_column_definitions():
+        """解析列定义列表"""
+        columns = []
+        reader.match('LPAREN')  # 吃掉 (
+        while reader.peek() != 'RPAREN':
+            # 解析列名
+            col_name = reader.match('IDENTIFIER')[1]
+            # 解析数据类型
+            data_type = reader.match('KEYWORD')[0]
+            size = None
+            if reader.peek() == 'LPAREN':  # 处理类似 VARCHAR(255)
+                reader.next()
+                size = int(reader.match('NUMBER')[1])
+                reader.match('RPAREN')
+            # 解析约束
+            constraints = []
+            while reader.current_val[1] == 'KEYWORD':
+                if reader.peek() == 'PRIMARY':
+                    reader.next()
+                    reader.match('KEY')  # 吃掉 KEY
+                    constraints.append('PRIMARY KEY')
+                elif reader.peek() == 'NOT':
+                    reader.next()
+                    reader.match('NULL')  # 吃掉 NULL
+                    constraints.append('NOT NULL')
+                else:
+                    constraints.append(reader.next()[0])
+            # 添加到列定义
+            columns.append({
+                'name': col_name,
+                'type': data_type + (f'({size})' if size else ''),
+                'constraints': constraints
+            })
+            if reader.peek() == 'COMMA':
+                reader.next()  # 吃掉逗号
+        reader.match('RPAREN')  # 吃掉 )
+        return columns
+
+    # ---------------------- 语句解析 ----------------------
+    def parse_create():
+        """解析CREATE TABLE语句"""
+        if reader.peek() == 'MATERIALIZED':
+            return parse_create_view()
+        reader.match('TABLE')  # 吃掉 TABLE
+        table_name = reader.match('IDENTIFIER')[1]
+        columns = parse_column_definitions()
+        return {'type': 'create_table', 'name': table_name, 'columns': columns}
+
+    def parse_insert():
+        """解析INSERT INTO语句"""
+        reader.match('INTO')  # 吃掉 INTO
+        table_name = reader.match('IDENTIFIER')[1]
+        reader.match('VALUES')  # 吃掉 VALUES
+        reader.match('LPAREN')  # 吃掉 (
+        values = []
+        while reader.peek() != 'RPAREN':
+            values.append(constant_value(parse_expression()))  # 常量表达式(如负数)在解析时求值
+            if reader.peek() != 'COMMA':
+                break
+            reader.next()  # 吃掉逗号
+        reader.match('RPAREN')  # 吃掉 )
+        return {'type': 'insert', 'table': table_name, 'values': values}
+
+    def parse_select():
+        """解析SELECT语句"""
+        select_clause = {'columns': [], 'distinct': False}
+
+        # 处理DISTINCT关键字
+        if reader.peek() == 'DISTINCT':
+            select_clause['distinct'] = True
+            reader.next()
+
+        # 解析选择的列
+        while reader.peek() not in ('FROM', 'eof'):
+            # 处理通配符
+            if reader.peek() == 'ASTERISK':
+                select_clause['columns'].append('*')
+                reader.next()
+            # 处理列名、聚合函数和表达式
+            else:
+                expr = parse_expression()
+                alias = None
+                if reader.peek() == 'AS':
+                    reader.next()
+                    alias = reader.match('IDENTIFIER')[1]
+                if expr['type'] == 'aggregate':  # 单独的聚合函数
+                    select_clause['columns'].append({
+                        'name': expr['name'],
+                        'arg': expr['arg'],
+                        'alias': alias,
+                        'distinct': expr['distinct']  # 保留在聚合函数中的distinct字段
+                    })
+                elif expr['type'] != 'column':
+                    select_clause['columns'].append({'expr': expr, 'alias': alias})
+                elif alias or '.' in expr['name']:  # 带别名或表名前缀的列
+                    select_clause['columns'].append({'name': expr['name'], 'alias': alias})
+                else:
+                    select_clause['columns'].append(expr['name'])
+
+            # 处理逗号分隔
+            if reader.peek() == 'COMMA':
+                reader.next()
+            elif reader.peek() != 'FROM':
+                _error(f"SELECT 列表中期望 ',' 或 FROM，得到 {reader.peek()}")
+
+        reader.match('FROM')
+
+        # 解析多表（逗号分隔或 JOIN）
+        tables = [parse_table_reference()]
+        while True:
+            if reader.peek() == 'COMMA':
+                reader.next()  # 跳过逗号
+                tables.append(parse_table_reference())
+            elif reader.peek() in ('JOIN', 'INNER', 'LEFT', 'CROSS'):
+                tables.append(parse_join())
+            else:
+                break
+
+        # 解析WHERE子句
+        where_clause = None
+        if reader.peek() == 'WHERE':
+            reader.next()
+            where_clause = parse_where_expression()
+
+        # 解析GROUP BY子句
+        group_by = None
+        if reader.peek() == 'GROUP':
+            reader.next()  # 吃掉GROUP
+            reader.match('BY')  # 吃掉BY
+            group_by = []
+            while reader.peek() not in ('HAVING', 'ORDER', 'LIMIT', 'SEMI', 'eof'):
+                # 处理带表名前缀的列名
+                if reader.peek() == 'IDENTIFIER' and reader.peek(1) == 'DOT':
+                    table_name = reader.next()[1]  # 表名
+                    reader.match('DOT')  # 吃掉点
+                    column_name = reader.match('IDENTIFIER')[1]  # 列名
+                    group_by.append(f"{table_name}.{column_name}")
+                else:
+                    col = reader.match('IDENTIFIER')[1]
+                    group_by.append(col)
+                if reader.peek() == 'COMMA':
+                    reader.next()
+
+        # 解析HAVING子句, 条件中可以使用聚合函数和 SELECT 列表中的别名
+        having = None
+        if reader.peek() == 'HAVING':
+            reader.next()
+            having = parse_logical_expression()
+
+        # 解析ORDER BY子句
+        order_by = None
+        if reader.peek() == 'ORDER':
+            reader.next()
+            reader.match('BY')
+            order_by = []
+            while reader.peek() not in ('LIMIT', 'SEMI', 'eof'):
+                # 处理带表名前缀的列名
+                if reader.peek() == 'IDENTIFIER' and reader.peek(1) == 'DOT':
+                    table_name = reader.next()[1]  # 表名
+                    reader.match('DOT')  # 吃掉点
+                    column_name = reader.match('IDENTIFIER')[1]  # 列名
+                    col = f"{table_name}.{column_name}"
+                else:
+                    col = reader.match('IDENTIFIER')[1]
+
+                direction = 'ASC'
+                if reader.peek() in ('ASC', 'DESC'):
+                    direction = reader.next()[0]
+                order_by.append({'column': col, 'direction': direction})
+                if reader.peek() == 'COMMA':
+                    reader.next()
+
+        # 解析LIMIT子句
+        limit = None
+        if reader.peek() == 'LIMIT':
+            reader.next()
+            limit = int(reader.match('NUMBER')[1])
+
+        return {
+            'type': 'select',
+            'select': select_clause,
+            'tables': tables,  # 多表信息
+            'where': where_clause,
+            'group_by': group_by,
+            'having': having,
+            'order_by': order_by,
+            'limit': limit
+        }
+
+    def parse_table_reference():
+        """解析 FROM 中的表名及可选的别名"""
+        table_name = reader.match('IDENTIFIER')[1]
+        alias = None
+
+        # 检查是否有别名
+        if reader.peek() == 'AS':
+            reader.next()  # 跳过AS
+            alias = reader.match('IDENTIFIER')[1]
+        elif reader.peek() == 'IDENTIFIER':  # AS关键字可选
+            alias = reader.match('IDENTIFIER')[1]
+
+        return {
+            'name': table_name,
+            'alias': alias or table_name  # 如果没有别名，使用表名
+        }
+
+    def parse_join():
+        """
+        解析 [INNER] JOIN / LEFT [OUTER] JOIN / CROSS JOIN
+        连接信息记录在右侧表的 'join' 字段中: {'type': 'inner'|'left'|'cross', 'on': 条件, 'using': 列名列表}
+        """
+        join_type = 'inner'
+        if reader.peek() == 'INNER':
+            reader.next()
+        elif reader.peek() == 'LEFT':
+            reader.next()
+            join_type = 'left'
+            if reader.peek() == 'OUTER':
+                reader.next()
+        elif reader.peek() == 'CROSS':
+            reader.next()
+            join_type = 'cross'
+        reader.match('JOIN')
+
+        table = parse_table_reference()
+        on, using = None, None
+        if join_type != 'cross':
+            if reader.peek() == 'ON':
+                reader.next()
+                on = parse_logical_expression()
+            elif reader.peek() == 'USING':
+                reader.next()
+                reader.match('LPAREN')
+                using = [reader.match('IDENTIFIER')[1]]
+                while reader.peek() == 'COMMA':
+                    reader.next()
+                    using.append(reader.match('IDENTIFIER')[1])
+                reader.match('RPAREN')
+            else:
+                _error(f"JOIN 需要 ON 或 USING 子句, 得到 {reader.peek()}")
+        table['join'] = {'type': join_type, 'on': on, 'using': using}
+        return table
+
+    def parse_where_expression():
+        """解析WHERE子句的复合条件"""
+        # left = reader.match('IDENTIFIER')[1]
+        # op = reader.match('OPERATOR')[0]
+        # right = None
+        # if reader.peek() in ('NUMBER', 'STRING'):
+        #     right = reader.next()[1]
+        # elif reader.peek() == 'IDENTIFIER':
+        #     right = reader.next()[1]
+        # else:
+        #     _error(f"期望值，得到 {reader.peek()}")
+        # return [left, op, right]
+        return parse_logical_expression()
+
+    def parse_logical_expression():
+        """解析由AND/OR连接的逻辑表达式"""
+        left = parse_primary_condition()
+        while reader.peek() in ('AND', 'OR'):
+            op = reader.next()[0]  # 获取逻辑运算符
+            right = parse_primary_condition()
+            left = {'logical_op': op, 'left': left, 'right': right}
+        return left
+
+    def parse_primary_condition():
+        """
+        解析基础条件或括号内的条件; 比较运算符两侧是表达式.
+        两侧只是列名或字面量时与原来一样保存为字符串/值(计划器据此使用索引和统计信息), 否则保存表达式语法树
+        """
+        if reader.peek() == 'LPAREN' and parenthesized_condition():
+            reader.next()  # 吃掉 '('
+            expr = parse_logical_expression()
+            reader.match('RPAREN')  # 吃掉 ')'
+            return expr
+
+        left = condition_operand(parse_expression())
+
+        # 读取操作符
+        op_token = reader.current_val
+        op = None
+        if op_token[1] == 'OPERATOR':
+            op = op_token[0]
+            reader.next()  # 吃掉操作符
+        else:
+            _error(f"期望操作符，得到 {op_token[0]}")
+
+        right = condition_operand(parse_expression(), True)
+        return {'left': left, 'op': op, 'right': right}
+
+    def parenthesized_condition():
+        """当前的 '(' 包住的是条件(含比较运算符或 AND/OR), 还是算术表达式; CASE ... END 中的条件不算"""
+        depth, cases, p = 0, 0, 0
+        while (tag := reader.peek(p)) != 'eof':
+            if tag == 'LPAREN':
+                depth += 1
+            elif tag == 'RPAREN':
+                depth -= 1
+                if depth == 0:
+                    return False
+            elif tag == 'CASE':
+                cases += 1
+            elif tag == 'END':
+                cases -= 1
+            elif tag in CONDITION_TOKENS and not cases:
+                return True
+            p += 1
+        return False
+
+    def parse_aggregate_function():
+        """聚合函数解析, 返回表达式节点 {'type': 'aggregate', ...}"""
+        func_name = reader.next()[0]
+        reader.match('LPAREN')  # 吃掉 (
+
+        # 处理可能存在的DISTINCT关键字
+        distinct = False
+        if reader.peek() == 'DISTINCT':
+            distinct = True
+            reader.next()  # 吃掉DISTINCT
+
+        # 解析参数（列名或*）
+        if reader.peek() == 'ASTERISK':
+            arg = '*'
+            reader.next()
+        else:
+            arg = reader.match('IDENTIFIER')[1]
+
+        reader.match('RPAREN')  # 吃掉 )
+        return {'type': 'aggregate', 'name': func_name, 'arg': arg, 'distinct': distinct}
+
+    def parse_delete():
+        """解析DELETE FROM语句"""
+        reader.match('FROM')  # 吃掉 FROM
+        table_name = reader.match('IDENTIFIER')[1]
+        # 解析WHERE条件
+        where_clause = None
+        if reader.peek() == 'WHERE':
+            reader.next()  # 吃掉 WHERE
+            where_clause = parse_where_expression()
+            #where_clause = parse_expression()
+        return {'type': 'delete', 'table': table_name, 'where': where_clause}
+
+    def parse_update():
+        """UPDATE语句"""
+        table_name = reader.match('IDENTIFIER')[1]
+        reader.match('SET')
+
+        # 解析赋值列表
+        assignments = []
+        while reader.peek() not in ('WHERE', 'SEMI', 'eof'):
+            column = reader.match('IDENTIFIER')[1]
+            reader.match('EQ')
+            expr = parse_expression()  # 解析表达式
+            assignments.append({'column': column, 'expr': expr})
+            if reader.peek() == 'COMMA':
+                reader.next()  # 跳过逗号
+            else:
+                break  # 无逗号则结束
+
+        # 解析WHERE子句
+        where_clause = None
+        if reader.peek() == 'WHERE':
+            reader.next()
+            where_clause = parse_where_expression()
+
+        return {
+            'type': 'update',
+            'table': table_name,
+            'assignments': assignments,
+            'where': where_clause
+        }
+
+    def parse_create_view():
+        """解析 CREATE MATERIALIZED VIEW 视图名 AS SELECT ... 语句"""
+        reader.match('MATERIALIZED')
+        reader.match('VIEW')
+        view_name = reader.match('IDENTIFIER')[1]
+        reader.match('AS')
+        reader.match('SELECT')
+        return {'type': 'create_view', 'name': view_name, 'query': parse_select()}
+
+    def parse_drop():
+        """解析DROP TABLE / DROP MATERIALIZED VIEW语句"""
+        if reader.peek() == 'MATERIALIZED':
+            reader.next()
+            reader.match('VIEW')
+            return {'type': 'drop_view', 'name': reader.match('IDENTIFIER')[1]}
+        reader.match('TABLE')  # 吃掉 TABLE
+        table_name = reader.match('IDENTIFIER')[1]
+        return {'type': 'drop_table', 'name': table_name}
+
+    def parse_refresh():
+        """解析 REFRESH MATERIALIZED VIEW 视图名 语句"""
+        reader.match('MATERIALIZED')
+        reader.match('VIEW')
+        return {'type': 'refresh_view', 'name': reader.match('IDENTIFIER')[1]}
+
+    def parse_transaction(keyword):
+        """解析 BEGIN / COMMIT / ROLLBACK [TRANSACTION] 语句"""
+        if reader.peek() == 'TRANSACTION':
+            reader.next()  # 吃掉可选的 TRANSACTION
+        return {'type': keyword.lower()}
+
+    def parse_explain():
+        """解析 EXPLAIN [ANALYZE] SELECT ... 语句"""
+        analyze = False
+        if reader.peek() == 'ANALYZE':
+            analyze = True
+            reader.next()
+        reader.match('SELECT')
+        return {'type': 'explain', 'analyze': analyze, 'statement': parse_select()}
+
+    def parse_analyze():
+        """解析 ANALYZE [表名] 语句"""
+        table_name = None
+        if reader.peek() == 'IDENTIFIER':
+            table_name = reader.next()[1]
+        return {'type': 'analyze', 'table': table_name}
+
+    return parser()  # 开始执行
+
+
+if __name__ == '__main__':
+    # 简单自测: python -m sqltranslator.parser
+    from .lexer import sql_lexer
+
+    sql = """
+        SELECT *
+        FROM users
+        WHERE age > 25 AND (name LIKE 'A%' OR email LIKE '%example.com');
+    """
+
+    test_tokens = sql_lexer(sql)
+    print(f"Token列表:\n{test_tokens}")
+
+    test_ast = sql_parser(test_tokens)
+    print("")
+    print(f"AST:\n{test_ast}")
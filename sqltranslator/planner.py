@@ -0,0 +1,952 @@
+"""
+查询计划器
+
+SELECT 语法树 -> 逻辑计划 -> 物理计划(operators.py 中的算子树).
+- 逻辑计划(LogicalPlan): 解析出每个列名属于哪张表, 把 WHERE 拆成以 AND 连接的合取项,
+  记录分组、聚合、投影、排序等要求, 与执行方式无关.
+- 物理计划: 决定每张表用顺序扫描还是索引查找, 把只涉及一张表的条件下推到扫描,
+  把涉及多张表的条件放到最早能计算它的连接上, 选择连接顺序和连接算法(哈希、归并、嵌套循环),
+  以及排序放在投影之前还是之后等.
+INNER JOIN ... ON 的条件与 WHERE 条件等价, 一起参与下推和连接顺序的选择;
+LEFT JOIN 的右侧表按书写顺序连接, 其 ON 条件只作用于连接本身, 不会过滤左侧的行.
+连接阶段的行是基表行的元组(见 operators.py), 每个子计划记录元组中各位置对应的表别名(layout),
+列引用和条件据此编译为直接从元组取值的函数.
+EXPLAIN 输出物理计划, EXPLAIN ANALYZE 同时执行查询并统计每个算子的实际行数和耗时.
+"""
+
+import math
+import operator
+import re
+import time
+from itertools import combinations
+from operator import itemgetter
+
+from .aggregates import accumulator_factory, aggregate_name, is_aggregate
+from .encoding import decoding_getter
+from .expressions import (compile_batch, compile_expression, contains_aggregate, expression_columns,
+                          format_expression, is_expression)
+from .operators import (Distinct, ExecutionContext, Filter, HashAggregate, HashJoin, IndexLookup, IndexScan,
+                        Limit, MergeJoin, NestedLoopJoin, Project, SeqScan, Sort, explain_lines)
+
+OP_SYMBOLS = {'EQ': '=', 'NEQ': '<>', 'LT': '<', 'LTE': '<=', 'GT': '>', 'GTE': '>=', 'LIKE': 'LIKE'}
+_COMPARE = {'LT': operator.lt, 'LTE': operator.le, 'GT': operator.gt, 'GTE': operator.ge}
+
+
+# ---------------------- 列名解析 ----------------------
+class Scope:
+    """查询中可见的表及其列, 用于把列名解析为 (别名, 列名)"""
+
+    def __init__(self, tables_info, tables):
+        self.relations = []  # [(别名, 表名, 列名列表)]
+        self.alias_tables = {}  # 别名 -> 表名
+        for table_info in tables_info:
+            table_name = table_info['name']
+            if table_name not in tables:
+                raise Exception(f"表 '{table_name}' 不存在")
+            alias = table_info['alias'] or table_name
+            if alias in self.alias_tables:
+                raise Exception(f"表别名 '{alias}' 重复, 同一张表多次出现时请使用不同的别名")
+            self.alias_tables[alias] = table_name
+            self.relations.append((alias, table_name, list(tables[table_name]['columns'])))
+
+    def table_of(self, alias):
+        return self.alias_tables[alias]
+
+    def resolve(self, name):
+        """
+        解析列名; 不带前缀的列名属于第一张包含该列的表
+        :return: (别名, 列名), 不是列名时返回 None
+        """
+        if not isinstance(name, str):
+            return None
+        if '.' in name:
+            alias, col_name = name.split('.', 1)
+            for rel_alias, _, columns in self.relations:
+                if rel_alias == alias and col_name in columns:
+                    return alias, col_name
+            return None
+        for alias, _, columns in self.relations:
+            if name in columns:
+                return alias, name
+        return None
+
+
+def prefixed_key(alias, col_name):
+    """列在 EXPLAIN 和 SELECT * 结果中的名字: '别名.列名'"""
+    return f"{alias}.{col_name}"
+
+
+class _Access:
+    """
+    (别名, 列名) -> 取值函数 的工厂
+    调用时返回取列值(字典编码列已解码)的函数;
+    encoded() 对字典编码列返回 (取编码的函数, 列字典), 其他列返回 None
+    """
+
+    def __call__(self, alias, col_name):
+        return decoding_getter(self.raw(alias, col_name), self.dictionary(alias, col_name))
+
+    def encoded(self, alias, col_name):
+        dictionary = self.dictionary(alias, col_name)
+        return None if dictionary is None else (self.raw(alias, col_name), dictionary)
+
+
+class _TableAccess(_Access):
+    """作用于一张表中存储的行元组"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def raw(self, alias, col_name):
+        return itemgetter(self.table['offsets'][col_name])
+
+    def dictionary(self, alias, col_name):
+        return self.table['dictionaries'].get(col_name)
+
+
+class _LayoutAccess(_Access):
+    """作用于按 layout(别名元组)排列的连接行, 连接行的每个位置是一张表的行元组"""
+
+    def __init__(self, plan, layout):
+        self.plan = plan
+        self.slots = {alias: pos for pos, alias in enumerate(layout)}
+
+    def _table(self, alias):
+        return self.plan.tables[self.plan.scope.table_of(alias)]
+
+    def raw(self, alias, col_name):
+        slot = self.slots[alias]
+        offset = self._table(alias)['offsets'][col_name]
+        return lambda row: row[slot][offset]
+
+    def dictionary(self, alias, col_name):
+        return self._table(alias)['dictionaries'].get(col_name)
+
+
+def row_getter(table):
+    """表中原始行元组的取值函数工厂"""
+    return _TableAccess(table)
+
+
+def layout_getter(plan, layout):
+    """连接行的取值函数工厂"""
+    return _LayoutAccess(plan, layout)
+
+
+def _null_value(row):
+    """不存在的列取值为 NULL"""
+    return None
+
+
+# ---------------------- 条件 ----------------------
+def split_conjuncts(condition):
+    """把以 AND 连接的条件拆成合取项列表"""
+    if condition is None:
+        return []
+    if condition.get('logical_op') == 'AND':
+        return split_conjuncts(condition['left']) + split_conjuncts(condition['right'])
+    return [condition]
+
+
+def join_conjuncts(conjuncts):
+    """split_conjuncts 的逆操作"""
+    condition = None
+    for conjunct in conjuncts:
+        condition = conjunct if condition is None else {'logical_op': 'AND', 'left': condition, 'right': conjunct}
+    return condition
+
+
+def condition_aliases(condition, scope):
+    """条件引用到的表别名集合"""
+    if 'logical_op' in condition:
+        return condition_aliases(condition['left'], scope) | condition_aliases(condition['right'], scope)
+    aliases = set()
+    for operand in (condition['left'], condition['right']):
+        names = expression_columns(operand) if is_expression(operand) else [operand]
+        for name in names:
+            resolved = scope.resolve(name)
+            if resolved:
+                aliases.add(resolved[0])
+    return aliases
+
+
+def format_condition(condition, scope):
+    """条件的文本形式, 用于 EXPLAIN; 字符串字面量加引号"""
+    if condition is None:
+        return ''
+    if 'logical_op' in condition:
+        parts = []
+        for side in (condition['left'], condition['right']):
+            text = format_condition(side, scope)
+            if 'logical_op' in side and side['logical_op'] != condition['logical_op']:
+                text = f"({text})"
+            parts.append(text)
+        return f" {condition['logical_op']} ".join(parts)
+    left, right = condition['left'], condition['right']
+    left = format_expression(left) if is_expression(left) else left
+    if is_expression(right):
+        right = format_expression(right)
+    else:
+        right = repr(right) if isinstance(right, str) and scope.resolve(right) is None else str(right)
+    return f"{left} {OP_SYMBOLS.get(condition['op'], condition['op'])} {right}"
+
+
+def _operand(value, scope, getter_of, is_left):
+    """
+    返回从行中取操作数值的函数
+    左值是列名(找不到时为 NULL)或表达式; 右值是表达式, 或能解析为列名时取列值, 否则视为字面量
+    """
+    if is_expression(value):
+        return compile_expression(value, scope, getter_of), False
+    resolved = scope.resolve(value)
+    if resolved is not None:
+        return getter_of(*resolved), False
+    if is_left:
+        return _null_value, False
+    return lambda row: value, True
+
+
+def compile_condition(condition, scope, getter_of):
+    """
+    把 WHERE 条件编译为 row -> bool 的函数
+    :param getter_of: (别名, 列名) -> 从行中取值的函数, 见 row_getter / layout_getter
+    """
+    if 'logical_op' in condition:
+        left = compile_condition(condition['left'], scope, getter_of)
+        right = compile_condition(condition['right'], scope, getter_of)
+        if condition['logical_op'] == 'AND':
+            return lambda row: left(row) and right(row)
+        elif condition['logical_op'] == 'OR':
+            return lambda row: left(row) or right(row)
+        raise Exception(f"未知逻辑运算符: {condition['logical_op']}")
+
+    op = condition['op']
+    get_left, _ = _operand(condition['left'], scope, getter_of, True)
+    get_right, right_is_literal = _operand(condition['right'], scope, getter_of, False)
+
+    left = scope.resolve(condition['left'])
+    if left is not None and right_is_literal and op in ('EQ', 'NEQ', 'LIKE'):
+        encoded = getter_of.encoded(*left)
+        if encoded is not None:
+            predicate = _encoded_predicate(op, encoded[0], encoded[1], condition['right'])
+            if predicate is not None:
+                return predicate
+
+    if op in ('EQ', 'NEQ'):
+        equal = op == 'EQ'
+
+        def predicate(row):
+            a, b = get_left(row), get_right(row)
+            if a is None or b is None:  # 与 NULL 比较结果为假, 与哈希/归并连接的语义一致
+                return False
+            return (a == b) == equal
+        return predicate
+    elif op in _COMPARE:
+        compare = _COMPARE[op]
+
+        def to_number(a, b):
+            try:
+                return float(a), float(b)
+            except (TypeError, ValueError):
+                raise Exception(f"操作符 {op} 要求数字类型, 但得到 {type(a)} 和 {type(b)}")
+
+        def predicate(row):
+            a, b = get_left(row), get_right(row)
+            if a is None or b is None:  # 与 NULL 比较结果为假
+                return False
+            a, b = to_number(a, b)
+            return compare(a, b)
+        return predicate
+    elif op == 'LIKE':
+        if right_is_literal:
+            regex = _like_regex(condition['right'])  # 字面量模式只编译一次
+
+            def predicate(row):
+                value = get_left(row)
+                return value is not None and regex.match(str(value)) is not None
+            return predicate
+
+        def predicate(row):
+            value, pattern = get_left(row), get_right(row)
+            return value is not None and _like_regex(pattern).match(str(value)) is not None
+        return predicate
+    raise Exception(f"不支持的操作符: {op}")
+
+
+def _like_regex(pattern):
+    # 将 SQL LIKE 模式转换为正则表达式
+    pattern = re.escape(str(pattern)).replace('%', '.*').replace('_', '.')
+    return re.compile(f"^{pattern}$", re.IGNORECASE)
+
+
+def _encoded_predicate(op, get_code, dictionary, literal):
+    """
+    字典编码列与字面量比较: 等值/不等比较编码, LIKE 对每个编码只匹配一次
+    字面量不在字典中时返回 None, 由调用方按解码后的值比较(计划之后才插入的值也能匹配)
+    """
+    if op == 'LIKE':
+        regex = _like_regex(literal)
+        values = dictionary.values
+        matches = {}  # 编码 -> 是否匹配
+
+        def predicate(row):
+            code = get_code(row)
+            if code is None:
+                return False
+            matched = matches.get(code)
+            if matched is None:
+                matched = matches[code] = regex.match(str(values[code])) is not None
+            return matched
+        return predicate
+
+    code = dictionary.lookup(literal)
+    if code is None:
+        return None
+    if op == 'EQ':
+        return lambda row: get_code(row) == code
+
+    def predicate(row):
+        value = get_code(row)
+        return value is not None and value != code
+    return predicate
+
+
+def index_condition(conjuncts, scope, table):
+    """
+    在单表的合取项中寻找能走索引的等值条件 col = 字面量
+    :return: (列名, 值) 或 None
+    """
+    for conjunct in conjuncts:
+        if conjunct.get('op') != 'EQ':
+            continue
+        left = scope.resolve(conjunct['left'])
+        right = conjunct['right']
+        if left is None or right is None or is_expression(right) or scope.resolve(right) is not None:
+            continue
+        if left[1] in table['indexes']:
+            return left[1], right
+    return None
+
+
+# ---------------------- 逻辑计划 ----------------------
+class LogicalPlan:
+    """解析、规范化后的 SELECT 语句"""
+
+    def __init__(self, statement, tables):
+        self.scope = Scope(statement['tables'], tables)
+        self.tables = tables
+        select_clause = statement['select']
+        self.columns = select_clause['columns']
+        self.distinct = select_clause.get('distinct', False)
+        conjuncts = split_conjuncts(statement['where'])
+        self.outer_joins = {}  # LEFT JOIN 右侧表别名 -> ON 条件的合取项 [(条件, 别名集合)]
+        for pos, table_info in enumerate(statement['tables']):
+            join = table_info.get('join')
+            if not join or join['type'] == 'cross':
+                continue
+            alias = self.scope.relations[pos][0]
+            condition = join['on'] if join['using'] is None else self._using_condition(pos, join['using'])
+            if join['type'] == 'left':
+                visible = {rel_alias for rel_alias, _, _ in self.scope.relations[:pos + 1]}
+                on = [(c, condition_aliases(c, self.scope)) for c in split_conjuncts(condition)]
+                if any(not c_aliases <= visible for _, c_aliases in on):
+                    raise Exception(f"LEFT JOIN {alias} 的 ON 条件只能引用它之前的表")
+                self.outer_joins[alias] = on
+            else:  # 内连接的 ON 条件等价于 WHERE 条件
+                conjuncts.extend(split_conjuncts(condition))
+        self.conjuncts = [(c, condition_aliases(c, self.scope)) for c in conjuncts]
+        self.group_by = statement.get('group_by') or []
+        self.having = statement.get('having')
+        self.order_by = statement.get('order_by') or []
+        self.limit = statement.get('limit')
+        self.aggregate = (bool(self.group_by) or self.having is not None
+                          or any(is_aggregate(col) or isinstance(col, dict) and 'expr' in col
+                                 and contains_aggregate(col['expr']) for col in self.columns))
+
+    def _using_condition(self, pos, columns):
+        """JOIN ... USING (列, ...) 转换为等值条件: 左侧第一张包含该列的表.列 = 右侧表.列"""
+        alias, _, right_columns = self.scope.relations[pos]
+        conjuncts = []
+        for col_name in columns:
+            left = next((rel_alias for rel_alias, _, rel_columns in self.scope.relations[:pos]
+                         if col_name in rel_columns), None)
+            if left is None or col_name not in right_columns:
+                raise Exception(f"USING 的列 '{col_name}' 必须同时存在于连接的两侧")
+            conjuncts.append({'left': f"{left}.{col_name}", 'op': 'EQ', 'right': f"{alias}.{col_name}"})
+        return join_conjuncts(conjuncts)
+
+    def getter(self, name, getter_of):
+        """列名的取值函数; 不存在的列取值为 NULL"""
+        resolved = self.scope.resolve(name)
+        return getter_of(*resolved) if resolved else _null_value
+
+    def output_items(self, getter_of):
+        """
+        SELECT 列表展开后的输出列: [(类型, 输出列名, 参数)], 类型为 'first'、'agg' 或 'expr',
+        'expr' 是含聚合函数的表达式, 参数为语法树, 由 _aggregate 编译
+        :param getter_of: 连接结果行的取值函数工厂, 见 layout_getter
+        """
+        items = []
+        for col in self.columns:
+            if col == '*':  # 处理通配符
+                for alias, _, columns in self.scope.relations:
+                    for col_name in columns:
+                        items.append(('first', prefixed_key(alias, col_name), getter_of(alias, col_name)))
+            elif is_aggregate(col):
+                getter = None if col['arg'] == '*' else self.getter(col['arg'], getter_of)
+                text = aggregate_name({**col, 'alias': None})
+                items.append(('agg', aggregate_name(col), (getter, accumulator_factory(col), text)))
+            elif isinstance(col, dict) and 'expr' in col and contains_aggregate(col['expr']):
+                items.append(('expr', col.get('alias') or format_expression(col['expr']), col['expr']))
+            elif isinstance(col, dict) and 'expr' in col:  # 表达式列, 没有别名时以表达式文本为列名
+                getter = compile_expression(col['expr'], self.scope, getter_of)
+                getter.batch = compile_batch(col['expr'], self.scope, getter_of)  # Project 按批计算
+                items.append(('first', col.get('alias') or format_expression(col['expr']), getter))
+            elif isinstance(col, dict):  # 带别名的列
+                items.append(('first', col.get('alias') or col['name'], self.getter(col['name'], getter_of)))
+            else:  # 简单列名
+                items.append(('first', col, self.getter(col, getter_of)))
+        return items
+
+
+# ---------------------- 代价估计 ----------------------
+DEFAULT_SELECTIVITY = 1 / 3  # 无法估计的比较条件
+LIKE_SELECTIVITY = 0.1  # 含通配符的 LIKE
+INDEX_PROBE_COST = 2.0  # 一次索引查找的代价, 以扫描一行为单位
+HASH_BUILD_COST = 1.0  # 哈希连接中每个构建行的额外代价(归并连接没有这部分)
+MAX_DP_RELATIONS = 8  # 超过该表数时不再枚举连接顺序, 按 FROM 中的顺序连接
+
+
+def _estimate(rows):
+    """EXPLAIN 中显示的估计行数"""
+    return int(math.ceil(rows))
+
+
+class Estimator:
+    """根据表统计信息(见 stats.py)估计行数和条件的选择率"""
+
+    def __init__(self, plan):
+        self.plan = plan
+
+    def row_count(self, alias):
+        return len(self.plan.tables[self.plan.scope.table_of(alias)]['data'])
+
+    def distinct(self, resolved):
+        """列的不同值个数; 主键/UNIQUE 列等于行数"""
+        alias, col_name = resolved
+        table = self.plan.tables[self.plan.scope.table_of(alias)]
+        rows = len(table['data'])
+        if col_name in table['indexes']:
+            return max(1, rows)
+        distinct = table['stats'].distinct(col_name, rows)
+        if col_name in table['dictionaries']:  # 字典项数是不同值个数的上界
+            distinct = max(1, min(distinct, len(table['dictionaries'][col_name])))
+        return distinct
+
+    def _column(self, resolved):
+        alias, col_name = resolved
+        stats = self.plan.tables[self.plan.scope.table_of(alias)]['stats']
+        return self.distinct(resolved), stats.null_fraction(col_name), stats.columns[col_name]
+
+    def selectivity(self, condition):
+        """满足条件的行所占比例"""
+        if 'logical_op' in condition:
+            left = self.selectivity(condition['left'])
+            right = self.selectivity(condition['right'])
+            if condition['logical_op'] == 'AND':
+                return left * right
+            return left + right - left * right
+
+        scope = self.plan.scope
+        left = scope.resolve(condition['left'])
+        if left is None:
+            return DEFAULT_SELECTIVITY
+        op, value = condition['op'], condition['right']
+        right = scope.resolve(value)
+        distinct, null_frac, col_stats = self._column(left)
+
+        if op in ('EQ', 'NEQ'):
+            if right is not None:  # 列 = 列: 1 / 较大的不同值个数
+                distinct = max(distinct, self.distinct(right))
+            eq = (1 - null_frac) / distinct
+            return eq if op == 'EQ' else max(0.0, 1 - null_frac - eq)
+        if op == 'LIKE':
+            if right is None and '%' not in str(value) and '_' not in str(value):
+                return (1 - null_frac) / distinct  # 不含通配符, 相当于等值比较
+            return LIKE_SELECTIVITY
+        if right is None:  # 范围比较: 在 [min, max] 内线性插值
+            fraction = _range_fraction(col_stats.min, col_stats.max, value, op)
+            if fraction is not None:
+                return (1 - null_frac) * fraction
+        return DEFAULT_SELECTIVITY
+
+
+def _range_fraction(low, high, value, op):
+    try:
+        low, high, value = float(low), float(high), float(value)
+    except (TypeError, ValueError):
+        return None
+    if high <= low:
+        return 1.0 if _COMPARE[op](low, value) else 0.0
+    fraction = min(1.0, max(0.0, (value - low) / (high - low)))
+    return fraction if op in ('LT', 'LTE') else 1.0 - fraction
+
+
+# ---------------------- 物理计划 ----------------------
+class _SubPlan:
+    """
+    连接顺序枚举中的候选子计划: 覆盖的表别名、输出行元组的布局、算子树、估计行数和累计代价
+    """
+    __slots__ = ('aliases', 'layout', 'op', 'rows', 'cost')
+
+    def __init__(self, layout, op, rows, cost):
+        self.aliases = frozenset(layout)
+        self.layout = layout
+        self.op = op
+        self.rows = rows
+        self.cost = cost
+        op.estimated_rows = _estimate(rows)
+
+
+def _scan(plan, est, alias, table_name, conjuncts):
+    """为一张表选择访问方式(顺序扫描或索引查找), 只涉及该表的条件下推到扫描"""
+    table = plan.tables[table_name]
+    row_count = len(table['data'])
+    if not conjuncts:
+        return _SubPlan((alias,), SeqScan(table_name, alias), row_count, row_count)
+
+    condition = join_conjuncts(conjuncts)
+    predicate = compile_condition(condition, plan.scope, row_getter(table))
+    text = format_condition(condition, plan.scope)
+    rows = row_count * est.selectivity(condition)
+
+    single = Scope([{'name': table_name, 'alias': alias}], plan.tables)
+    lookup = index_condition(conjuncts, single, table)
+    if lookup is not None and INDEX_PROBE_COST < row_count:
+        op = IndexLookup(table_name, alias, lookup[0], lookup[1], predicate, text)
+        return _SubPlan((alias,), op, min(rows, 1), INDEX_PROBE_COST)
+    return _SubPlan((alias,), SeqScan(table_name, alias, predicate, text), rows, row_count)
+
+
+def _equi_keys(conjuncts, left_aliases, right_aliases, scope):
+    """
+    从连接条件中分离出 左列 = 右列 形式的等值键
+    :return: ([((左侧别名, 列名), (右侧别名, 列名))], 其余条件)
+    """
+    keys, residual = [], []
+    for conjunct in conjuncts:
+        if conjunct.get('op') == 'EQ':
+            left, right = scope.resolve(conjunct['left']), scope.resolve(conjunct['right'])
+            if left and right:
+                if left[0] in left_aliases and right[0] in right_aliases:
+                    keys.append((left, right))
+                    continue
+                if right[0] in left_aliases and left[0] in right_aliases:
+                    keys.append((right, left))
+                    continue
+        residual.append(conjunct)
+    return keys, residual
+
+
+def _residual(plan, conjuncts, layout):
+    """等值键之外的连接条件: (作用于 layout 行元组的判断函数, 文本), 没有时为 (None, None)"""
+    condition = join_conjuncts(conjuncts)
+    if condition is None:
+        return None, None
+    predicate = compile_condition(condition, plan.scope, layout_getter(plan, layout))
+    return predicate, format_condition(condition, plan.scope)
+
+
+def _key_refs(plan, keys, layout):
+    """连接键 [(别名, 列名)] -> [(列名文本, 作用于 layout 连接行的取值函数)]"""
+    getter_of = layout_getter(plan, layout)
+    return [(prefixed_key(*resolved), getter_of(*resolved)) for resolved in keys]
+
+
+def _join_rows(est, left, right, conjuncts):
+    selectivity = 1.0
+    for conjunct in conjuncts:
+        selectivity *= est.selectivity(conjunct)
+    return left.rows * right.rows * selectivity
+
+
+def _ordered_scan(plan, sub, resolved):
+    """
+    子计划是单表的顺序扫描且连接列上有索引时, 返回按该列有序读取的 IndexScan, 否则返回 None
+    """
+    op = sub.op
+    alias, col_name = resolved
+    if type(op) is not SeqScan or sub.aliases != {alias}:
+        return None
+    if col_name not in plan.tables[op.table_name]['indexes']:
+        return None
+    ordered = IndexScan(op.table_name, alias, col_name, op.predicate, op.condition)
+    ordered.estimated_rows = op.estimated_rows
+    return ordered
+
+
+def _join(plan, est, left, right, conjuncts):
+    """
+    连接两个子计划(内连接)
+    - 单个等值键且两侧都能按索引有序读取时使用归并连接;
+    - 其他有等值连接条件的情况使用哈希连接, 估计行数较少的一侧作为构建侧;
+    - 否则使用嵌套循环连接
+    """
+    rows = _join_rows(est, left, right, conjuncts)
+
+    keys, residual = _equi_keys(conjuncts, left.aliases, right.aliases, plan.scope)
+    if keys:
+        cost = left.cost + right.cost + left.rows + right.rows + rows
+        left_keys = _key_refs(plan, [k for k, _ in keys], left.layout)
+        right_keys = _key_refs(plan, [k for _, k in keys], right.layout)
+        if len(keys) == 1:
+            left_ordered = _ordered_scan(plan, left, keys[0][0])
+            right_ordered = _ordered_scan(plan, right, keys[0][1])
+            if left_ordered is not None and right_ordered is not None:
+                layout = left.layout + right.layout
+                predicate, text = _residual(plan, residual, layout)
+                op = MergeJoin(left_ordered, right_ordered, left_keys[0], right_keys[0], predicate, text)
+                return _SubPlan(layout, op, rows, cost)
+
+        probe, build = (right, left) if left.rows <= right.rows else (left, right)
+        probe_keys, build_keys = (right_keys, left_keys) if probe is right else (left_keys, right_keys)
+        layout = probe.layout + build.layout
+        predicate, text = _residual(plan, residual, layout)
+        op = HashJoin(probe.op, build.op, probe_keys, build_keys, predicate, text)
+        return _SubPlan(layout, op, rows, cost + HASH_BUILD_COST * build.rows)
+
+    outer, inner = (left, right) if left.rows >= right.rows else (right, left)  # 较小的一侧物化
+    layout = outer.layout + inner.layout
+    predicate, text = _residual(plan, conjuncts, layout)
+    op = NestedLoopJoin(outer.op, inner.op, predicate, text)
+    cost = left.cost + right.cost + left.rows * right.rows
+    return _SubPlan(layout, op, rows, cost)
+
+
+def _outer_join(plan, est, left, right, conjuncts):
+    """
+    左外连接: 左侧是保留侧, 连接顺序不能交换
+    有等值条件时以左侧探测、右侧构建哈希表, 否则物化右侧后嵌套循环
+    """
+    rows = max(left.rows, _join_rows(est, left, right, conjuncts))
+    layout = left.layout + right.layout
+    width = len(right.layout)
+
+    keys, residual = _equi_keys(conjuncts, left.aliases, right.aliases, plan.scope)
+    if keys:
+        predicate, text = _residual(plan, residual, layout)
+        op = HashJoin(left.op, right.op, _key_refs(plan, [k for k, _ in keys], left.layout),
+                      _key_refs(plan, [k for _, k in keys], right.layout), predicate, text, kind='left',
+                      build_width=width)
+        cost = left.cost + right.cost + left.rows + (1 + HASH_BUILD_COST) * right.rows + rows
+        return _SubPlan(layout, op, rows, cost)
+
+    predicate, text = _residual(plan, conjuncts, layout)
+    op = NestedLoopJoin(left.op, right.op, predicate, text, kind='left', right_width=width)
+    cost = left.cost + right.cost + left.rows * right.rows
+    return _SubPlan(layout, op, rows, cost)
+
+
+def _filter(plan, est, sub, conjuncts):
+    condition = join_conjuncts(conjuncts)
+    predicate = compile_condition(condition, plan.scope, layout_getter(plan, sub.layout))
+    op = Filter(sub.op, predicate, format_condition(condition, plan.scope))
+    return _SubPlan(sub.layout, op, sub.rows * est.selectivity(condition), sub.cost + sub.rows)
+
+
+def _join_order(plan, est, aliases, scans, conjuncts):
+    """
+    动态规划枚举 aliases 中各表的左深连接树, 返回估计代价最小的计划
+    每一步优先加入与已连接的表之间有连接条件的表, 尽量避免笛卡尔积
+    """
+    if len(aliases) > MAX_DP_RELATIONS:
+        current = scans[aliases[0]]
+        for alias in aliases[1:]:
+            joined = current.aliases | {alias}
+            ready = [c for c, c_aliases in conjuncts if alias in c_aliases and c_aliases <= joined]
+            current = _join(plan, est, current, scans[alias], ready)
+        return current
+
+    best = {frozenset([alias]): scans[alias] for alias in aliases}
+    for size in range(2, len(aliases) + 1):
+        for subset in combinations(aliases, size):
+            subset = frozenset(subset)
+            options = []
+            for alias in aliases:
+                left = best.get(subset - {alias}) if alias in subset else None
+                if left is None:
+                    continue
+                ready = [c for c, c_aliases in conjuncts if alias in c_aliases and c_aliases <= subset]
+                options.append((left, alias, ready))
+            for left, alias, ready in [o for o in options if o[2]] or options:
+                candidate = _join(plan, est, left, scans[alias], ready)
+                if subset not in best or candidate.cost < best[subset].cost:
+                    best[subset] = candidate
+    return best[frozenset(aliases)]
+
+
+def _join_tree(plan, est):
+    """
+    构建连接树
+    - 第一个 LEFT JOIN 之前的表按估计代价选择连接顺序, 之后的表按书写顺序依次连接;
+    - 只涉及一张表的条件下推到扫描; 但 WHERE 中关于 LEFT JOIN 右侧表的条件必须在外连接之后过滤,
+      而该表 ON 条件中只涉及它自己的部分可以下推;
+    - 多表条件放在最早能计算它的连接上, 不引用任何表列的条件放在最上层
+    """
+    pushed, pending, constant = {}, [], []
+    for conjunct, aliases in plan.conjuncts:
+        if len(aliases) == 1 and not aliases & plan.outer_joins.keys():
+            pushed.setdefault(next(iter(aliases)), []).append(conjunct)
+        elif aliases:
+            pending.append((conjunct, aliases))
+        else:
+            constant.append(conjunct)
+    for alias, on in plan.outer_joins.items():
+        pushed.setdefault(alias, []).extend(c for c, aliases in on if aliases == {alias})
+
+    scans = {alias: _scan(plan, est, alias, table_name, pushed.get(alias, []))
+             for alias, table_name, _ in plan.scope.relations}
+    order = [alias for alias, _, _ in plan.scope.relations]
+    first_outer = next((pos for pos, alias in enumerate(order) if alias in plan.outer_joins), len(order))
+
+    inner = set(order[:first_outer])
+    root = _join_order(plan, est, order[:first_outer], scans, [(c, a) for c, a in pending if a <= inner])
+    pending = [(c, a) for c, a in pending if not a <= inner]
+    for alias in order[first_outer:]:
+        joined = root.aliases | {alias}
+        ready = [c for c, aliases in pending if aliases <= joined]
+        pending = [(c, aliases) for c, aliases in pending if not aliases <= joined]
+        if alias in plan.outer_joins:
+            on = [c for c, aliases in plan.outer_joins[alias] if aliases != {alias}]
+            root = _outer_join(plan, est, root, scans[alias], on)
+            if ready:
+                root = _filter(plan, est, root, ready)
+        else:
+            root = _join(plan, est, root, scans[alias], ready)
+
+    if constant:
+        root = _filter(plan, est, root, constant)
+    return root
+
+
+class _GroupAccess:
+    """
+    含聚合函数的 SELECT 表达式和 HAVING 条件中的列名解析与取值, 同时用作编译时的 scope 和 getter_of.
+    表达式和条件作用于分组 (第一行, 聚合结果列表), 见 HashAggregate:
+    - 聚合函数取对应累加器的结果, SELECT 列表中没有的聚合函数追加为隐藏的累加器(hidden);
+    - 列名解析为表列, 取分组中第一行的值; add_outputs 之后(编译 HAVING 时)优先解析为 SELECT 列表中的输出列名
+    """
+    OUTPUT = ''  # 输出列的"表别名"
+
+    def __init__(self, plan, getter_of, items):
+        self.plan = plan
+        self.getter_of = getter_of
+        self.outputs = {}  # 输出列名 -> 取值函数
+        self.aggregates = {}  # 聚合函数文本 -> 累加器下标
+        self.hidden = []  # [(取值函数, 累加器工厂, 文本)]
+        self.count = 0  # SELECT 列表中的聚合函数个数
+        for kind, _, param in items:
+            if kind == 'agg':
+                self.aggregates.setdefault(param[2], self.count)
+                self.count += 1
+
+    def add_outputs(self, items):
+        """:param items: 已编译的输出列, 'expr' 的参数是作用于分组的取值函数"""
+        index = 0
+        for kind, name, param in items:
+            if kind == 'agg':
+                self.outputs[name] = _aggregate_result(index)
+                index += 1
+            else:
+                self.outputs[name] = param if kind == 'expr' else _first_row(param)
+
+    def resolve(self, name):
+        if isinstance(name, str) and name in self.outputs:
+            return self.OUTPUT, name
+        return self.plan.scope.resolve(name)
+
+    def __call__(self, alias, col_name):
+        if alias == self.OUTPUT:
+            return self.outputs[col_name]
+        return _first_row(self.getter_of(alias, col_name))
+
+    def encoded(self, alias, col_name):
+        return None
+
+    def aggregate(self, expr):
+        text = aggregate_name(expr)
+        index = self.aggregates.get(text)
+        if index is None:
+            getter = None if expr['arg'] == '*' else self.plan.getter(expr['arg'], self.getter_of)
+            index = self.aggregates[text] = self.count + len(self.hidden)
+            self.hidden.append((getter, accumulator_factory(expr), text))
+        return _aggregate_result(index)
+
+
+def _aggregate_result(index):
+    return lambda group: group[1][index]
+
+
+def _first_row(getter):
+    return lambda group: None if group[0] is None else getter(group[0])
+
+
+def _aggregate(plan, est, root, rows, getter_of):
+    """:return: (算子, 估计分组数)"""
+    group_keys, group_items = [], []
+    groups = 1
+    items = plan.output_items(getter_of)
+    names = {name for _, name, _ in items}
+    for col in plan.group_by:
+        resolved = plan.scope.resolve(col)
+        if resolved is None:
+            raise Exception(f"GROUP BY 的列 '{col}' 不存在")
+        encoded = getter_of.encoded(*resolved)  # 字典编码列按整数编码分组
+        group_keys.append((col, encoded[0] if encoded else getter_of(*resolved)))
+        if col not in names:  # 未出现在 SELECT 列表中的分组列排在最前面
+            group_items.append(('group', col, getter_of(*resolved)))
+        groups *= est.distinct(resolved)
+    groups = min(groups, rows) if group_keys else 1
+
+    access = _GroupAccess(plan, getter_of, items)
+    items = [(kind, name, compile_expression(param, access, access) if kind == 'expr' else param)
+             for kind, name, param in items]
+    having, text = None, None
+    if plan.having is not None:  # 在累加器的结果上计算, 不满足的分组不生成结果行
+        access.add_outputs(items)
+        having = compile_condition(plan.having, access, access)
+        text = format_condition(plan.having, access)
+        groups *= DEFAULT_SELECTIVITY
+    return HashAggregate(root, group_keys, group_items + items, having, access.hidden, text), groups
+
+
+def _output_sort_keys(plan, names):
+    """在投影/聚合之后排序: ORDER BY 列对应到输出列名, 从结果字典中取值"""
+    keys = []
+    for order in plan.order_by:
+        col = order['column']
+        key = col
+        if col not in names:
+            resolved = plan.scope.resolve(col)
+            for candidate in (prefixed_key(*resolved) if resolved else None,
+                              resolved[1] if resolved else None):
+                if candidate in names:
+                    key = candidate
+                    break
+        keys.append((col, lambda row, key=key: row.get(key), order['direction'] == 'DESC'))
+    return keys
+
+
+def _source_sort_keys(plan, items, getter_of):
+    """在投影之前排序: ORDER BY 可以引用输出列别名或任意表列"""
+    aliases = {name: getter for _, name, getter in items}
+    return [(order['column'], aliases.get(order['column']) or plan.getter(order['column'], getter_of),
+             order['direction'] == 'DESC') for order in plan.order_by]
+
+
+def build_physical_plan(plan):
+    est = Estimator(plan)
+    joined = _join_tree(plan, est)
+    root, rows = joined.op, joined.rows
+    getter_of = layout_getter(plan, joined.layout)
+    limited = rows if plan.limit is None else min(rows, plan.limit)
+    sorted_early = False
+
+    if plan.aggregate:
+        root, rows = _aggregate(plan, est, root, rows, getter_of)
+        limited = rows if plan.limit is None else min(rows, plan.limit)
+        root.estimated_rows = _estimate(rows)
+        names = [name for _, name, _ in root.items]
+    else:
+        items = plan.output_items(getter_of)
+        if plan.order_by and not plan.distinct:
+            # 投影前排序, ORDER BY 可以引用未被选择的列; 投影是一对一的, 可以直接取前 N 行
+            root = Sort(root, _source_sort_keys(plan, items, getter_of), plan.limit)
+            root.estimated_rows = _estimate(limited)
+            sorted_early = True
+        root = Project(root, [(name, key) for _, name, key in items])
+        root.estimated_rows = _estimate(limited if sorted_early else rows)
+        names = [name for name, _ in root.items]
+
+    if plan.distinct:
+        root = Distinct(root)
+        root.estimated_rows = _estimate(rows)
+    if plan.order_by and not sorted_early:
+        root = Sort(root, _output_sort_keys(plan, names), plan.limit)
+        root.estimated_rows = _estimate(limited)
+    if plan.limit is not None and not plan.order_by:
+        root = Limit(root, plan.limit)
+        root.estimated_rows = _estimate(limited)
+    return root
+
+
+def plan_select(statement, tables):
+    """SELECT 语句 -> 物理计划"""
+    return build_physical_plan(LogicalPlan(statement, tables))
+
+
+def plan_tables(statement):
+    """查询涉及的表名"""
+    return [table_info['name'] for table_info in statement['tables']]
+
+
+def output_columns(root):
+    """物理计划输出的列名(结果字典的键), 按 SELECT 列表的顺序"""
+    while not hasattr(root, 'items'):  # 跳过 Distinct/Sort/Limit
+        root = root.children[0]
+    if isinstance(root, HashAggregate):
+        return [name for _, name, _ in root.items]
+    return [name for name, _ in root.items]
+
+
+def execute_plan(root, ctx):
+    return list(ctx.iterate(root))
+
+
+def explain(statement, tables, txn=None, analyze=False, control=None):
+    """
+    EXPLAIN [ANALYZE] 的结果行, 每行一个 'QUERY PLAN' 列
+    """
+    root = plan_select(statement, tables)
+    lines = []
+    if analyze:
+        ctx = ExecutionContext(tables, txn, analyze=True, control=control)
+        start = time.perf_counter()
+        ctx.open(plan_tables(statement))
+        rows = execute_plan(root, ctx)
+        elapsed = time.perf_counter() - start
+        lines = explain_lines(root, analyze=True)
+        lines.append(f"Rows: {len(rows)}")
+        lines.append(f"Execution Time: {elapsed * 1000:.3f} ms")
+    else:
+        lines = explain_lines(root)
+    return [{'QUERY PLAN': line} for line in lines]
+
+
+# ---------------------- 写语句定位目标行 ----------------------
+def match_positions(table_name, table, where, control=None):
+    """
+    UPDATE/DELETE 定位满足 WHERE 的行, 返回其在 table['data'] 中的位置列表
+    调用方持有该表写锁, 索引与 table['data'] 一致; 主键/UNIQUE 列的等值条件直接查索引
+    :param control: ExecutionControl, 扫描时按批检查是否已取消
+    """
+    data = table['data']
+    if not where:
+        return list(range(len(data)))
+    scope = Scope([{'name': table_name, 'alias': table_name}], {table_name: table})
+    predicate = compile_condition(where, scope, row_getter(table))
+    lookup = index_condition(split_conjuncts(where), scope, table)
+    if lookup is not None:
+        pos = table['indexes'][lookup[0]].lookup(lookup[1])
+        candidates = [] if pos is None else [pos]
+        if control is not None:
+            control.index_hits += 1
+            control.rows_scanned += len(candidates)
+    else:
+        candidates = range(len(data))
+        if control is not None:
+            candidates = control.batches(candidates)
+    positions = [pos for pos in candidates if predicate(data[pos])]
+    if control is not None:
+        control.rows_matched += len(positions)
+    return positions
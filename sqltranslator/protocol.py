@@ -0,0 +1,78 @@
+"""
+查询服务器的帧协议
+
+每一帧 = 4 字节大端无符号长度 + UTF-8 编码的 JSON 正文.
+
+客户端 -> 服务器:
+    {"sql": "SELECT ...; ..."}
+
+服务器 -> 客户端（一个请求对应多帧, 以 done 结束）:
+    {"type": "rows", "statement": i, "rows": [...]}     查询结果, 按批次分多帧发送
+    {"type": "end", "statement": i, "count": n}         查询结果发送完毕
+    {"type": "message", "statement": i, "message": s}   非查询语句的执行结果
+    {"type": "error", "statement": i, "message": s}     语句执行失败
+    {"type": "done", "in_transaction": b}               本次请求处理完毕, b 表示会话中是否还有未结束的事务
+
+每个连接有独立的会话, 显式事务(BEGIN ... COMMIT/ROLLBACK)可以跨越同一连接上的多次请求,
+连接断开时服务器回滚未结束的事务.
+连接池(client.ConnectionPool)归还连接时, 若 done 帧表明事务未结束则先发送 ROLLBACK, 回滚失败时丢弃连接,
+因此使用连接池时事务必须在一次借用(pool.connection())内提交; 通过 pool.execute 开始而未提交的事务会被回滚.
+"""
+
+import asyncio
+import json
+import struct
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 15432
+HEADER = struct.Struct('!I')
+MAX_FRAME_SIZE = 64 * 1024 * 1024  # 单帧上限 64MB
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def encode_frame(obj):
+    """对象 -> 带长度头的字节串"""
+    payload = json.dumps(obj, ensure_ascii=False, default=str).encode('utf-8')
+    if len(payload) > MAX_FRAME_SIZE:
+        raise ProtocolError(f"帧长度 {len(payload)} 超过上限 {MAX_FRAME_SIZE}")
+    return HEADER.pack(len(payload)) + payload
+
+
+def decode_payload(payload):
+    return json.loads(payload.decode('utf-8'))
+
+
+def _check_length(length):
+    if length > MAX_FRAME_SIZE:
+        raise ProtocolError(f"帧长度 {length} 超过上限 {MAX_FRAME_SIZE}")
+    return length
+
+
+async def read_frame(reader):
+    """从 asyncio.StreamReader 读取一帧, 对端关闭连接时返回 None"""
+    try:
+        header = await reader.readexactly(HEADER.size)
+    except asyncio.IncompleteReadError:
+        return None
+    length = _check_length(HEADER.unpack(header)[0])
+    return decode_payload(await reader.readexactly(length))
+
+
+def _recv_exactly(sock, n):
+    chunks = []
+    while n:
+        chunk = sock.recv(min(n, 1024 * 1024))
+        if not chunk:
+            raise ConnectionError("服务器已关闭连接")
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b''.join(chunks)
+
+
+def recv_frame(sock):
+    """从阻塞 socket 读取一帧"""
+    length = _check_length(HEADER.unpack(_recv_exactly(sock, HEADER.size))[0])
+    return decode_payload(_recv_exactly(sock, length))
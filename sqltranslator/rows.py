@@ -0,0 +1,52 @@
+"""
+紧凑的行存储
+
+table['data'] 中的每一行是按列定义顺序排列的元组, 不再在每行里重复保存列名;
+列在元组中的下标记录在 table['offsets'](列名 -> 下标), 由建表时根据列定义生成,
+按列取值就是一次下标访问. 字典编码的列(见 encoding.py)在行元组中保存整数编码.
+需要按列名访问行的调用方(图形界面、表达式求值等)使用 RowView, 它是行元组的只读字典视图,
+读取时自动解码.
+"""
+
+from collections.abc import Mapping
+
+
+def column_offsets(columns):
+    """列名 -> 行元组中的下标"""
+    return {col_name: offset for offset, col_name in enumerate(columns)}
+
+
+class RowView(Mapping):
+    """按列名访问行元组(或列表)的只读字典视图, 不复制行数据"""
+    __slots__ = ('row', 'offsets', 'dictionaries')
+
+    def __init__(self, row, offsets, dictionaries=None):
+        """:param dictionaries: 字典编码列的 列名 -> ColumnDictionary"""
+        self.row = row
+        self.offsets = offsets
+        self.dictionaries = dictionaries
+
+    def __getitem__(self, col_name):
+        value = self.row[self.offsets[col_name]]
+        if self.dictionaries and value is not None and col_name in self.dictionaries:
+            value = self.dictionaries[col_name].values[value]
+        return value
+
+    def __iter__(self):
+        return iter(self.offsets)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+def row_view(table, row):
+    return RowView(row, table['offsets'], table['dictionaries'])
+
+
+def stored_value(table, col_name, value):
+    """列值在行元组中的存储形式: 字典编码列返回编码, 其他列原样返回"""
+    dictionary = table['dictionaries'].get(col_name)
+    return value if dictionary is None else dictionary.encode(value)
@@ -0,0 +1,122 @@
+"""
+本地查询服务器（asyncio）
+
+多个进程通过本地 Unix socket 或 localhost TCP 共享同一个 SQLInterpreter 实例.
+协议格式见 protocol.py.
+
+每个连接由一个协程处理, 语句在线程池中执行, 因此某个客户端的长查询不会阻塞
+其他连接的网络读写. 解释器的表级写锁与快照读(见 concurrency.py)保证多个
+工作线程可以同时执行查询和写入.
+查询结果按 batch_size 行一帧分批发送, 并在每帧之后等待发送缓冲区排空（背压）,
+大结果集不会在发送端堆积.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from .lexer import sql_lexer
+from .parser import sql_parser
+from .interpreter import SQLInterpreter
+from .metrics import BatchMetrics, normalize_statements
+from .protocol import DEFAULT_HOST, DEFAULT_PORT, ProtocolError, encode_frame, read_frame
+from .transaction import Session
+
+
+class SQLServer:
+    def __init__(self, db=None, batch_size=500, workers=4):
+        """
+        :param db: 共享的 SQLInterpreter 实例, 为空时新建
+        :param batch_size: 每帧最多发送的结果行数
+        :param workers: 执行语句的线程数
+        """
+        self.db = db or SQLInterpreter()
+        self.batch_size = batch_size
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='sql-worker')
+        self.active_connections = 0
+        self.requests_served = 0
+        self._server = None
+
+    def _execute_statement(self, statement, session, sql=None):
+        """:param sql: 语句规范化的 SQL 文本, 注册了钩子(如慢查询日志)时记入执行指标"""
+        batch = None
+        if sql is not None:
+            batch = BatchMetrics()
+            batch.statement_sql = [sql]
+        return self.db.execute([statement], session, batch=batch)[0]
+
+    async def _send(self, writer, obj):
+        writer.write(encode_frame(obj))
+        await writer.drain()
+
+    async def _handle_request(self, request, writer, session):
+        """执行一次请求中的全部语句, 每条语句执行完立即返回结果"""
+        loop = asyncio.get_running_loop()
+        try:
+            tokens = sql_lexer(request['sql'])
+            ast = sql_parser(tokens)
+        except Exception as e:  # 词法/语法错误
+            await self._send(writer, {'type': 'error', 'statement': 0, 'message': str(e)})
+            return
+
+        statement_sql = normalize_statements(tokens) if self.db.hooks else []
+        for i, statement in enumerate(ast):
+            sql = statement_sql[i] if i < len(statement_sql) else None
+            result = await loop.run_in_executor(self.executor, self._execute_statement, statement, session, sql)
+            if isinstance(result, tuple) and result[0] == 'select':
+                rows = result[1]
+                for start in range(0, len(rows), self.batch_size):
+                    await self._send(writer, {'type': 'rows', 'statement': i,
+                                              'rows': rows[start:start + self.batch_size]})
+                await self._send(writer, {'type': 'end', 'statement': i, 'count': len(rows)})
+            elif isinstance(result, tuple) and result[0] == 'error':
+                await self._send(writer, {'type': 'error', 'statement': i, 'message': result[1]})
+            else:
+                await self._send(writer, {'type': 'message', 'statement': i, 'message': str(result)})
+
+    async def handle_client(self, reader, writer):
+        """单个客户端连接的处理协程, 每个连接拥有独立的会话(事务)"""
+        session = Session()
+        self.active_connections += 1
+        try:
+            while True:
+                request = await read_frame(reader)
+                if request is None:  # 客户端断开
+                    break
+                if not isinstance(request, dict) or not isinstance(request.get('sql'), str):
+                    raise ProtocolError("请求格式错误, 应为 {\"sql\": \"...\"}")
+                await self._handle_request(request, writer, session)
+                await self._send(writer, {'type': 'done', 'in_transaction': session.txn is not None})
+                self.requests_served += 1
+        except (ConnectionError, ProtocolError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            if session.txn is not None:  # 连接断开时回滚未提交的事务, 释放表锁
+                self.db.rollback(session)
+            self.active_connections -= 1
+            writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+        """开始监听; 指定 path 时使用 Unix socket, 否则使用 TCP"""
+        if path:
+            if os.path.exists(path):
+                os.unlink(path)  # 清理上次遗留的 socket 文件
+            self._server = await asyncio.start_unix_server(self.handle_client, path=path)
+        else:
+            self._server = await asyncio.start_server(self.handle_client, host=host, port=port)
+        return self._server
+
+    @property
+    def addresses(self):
+        return [sock.getsockname() for sock in self._server.sockets] if self._server else []
+
+    async def serve_forever(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+        server = await self.start(host, port, path)
+        async with server:
+            await server.serve_forever()
+
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        self.executor.shutdown(wait=False)
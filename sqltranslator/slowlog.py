@@ -0,0 +1,128 @@
+"""
+慢查询日志(可选, 见 SQLInterpreter.enable_slow_log)
+
+作为执行指标钩子(见 metrics.py)注册到解释器, 耗时不低于 threshold_ms 的语句:
+- 按规范化的 SQL 文本(字面量替换为 ?)累计次数和耗时, top() 返回总耗时最多的前 N 条;
+- 按 sample_rate 抽样写入日志文件, 每行一个 JSON 对象: 时间、SQL、执行计划、各阶段耗时、行数等,
+  文件超过 max_bytes 后轮转, 保留 backup_count 个旧文件(logging.handlers.RotatingFileHandler).
+抽样只影响写文件, 汇总统计包含所有慢语句.
+SQL 文本只有通过 run_sql 执行时才有, 直接调用 execute 时以语句类型代替.
+"""
+
+import json
+import logging
+import random
+import threading
+import time
+from logging.handlers import RotatingFileHandler
+
+from .metrics import MetricsHook
+from .operators import explain_lines
+
+DEFAULT_THRESHOLD_MS = 100.0
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUP_COUNT = 3
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+class SlowQueryLog(MetricsHook):
+    def __init__(self, path=None, threshold_ms=DEFAULT_THRESHOLD_MS, sample_rate=1.0,
+                 max_bytes=DEFAULT_MAX_BYTES, backup_count=DEFAULT_BACKUP_COUNT, top_n=20):
+        """
+        :param path: 日志文件路径, 为 None 时只做内存中的汇总
+        :param sample_rate: 慢语句写入文件的比例(0~1)
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise Exception(f"抽样比例必须在 0 到 1 之间, 得到 {sample_rate}")
+        self.path = path
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.top_n = top_n
+        self.slow = 0  # 慢语句数
+        self.written = 0  # 写入文件的条数
+        self._stats = {}  # SQL 文本 -> [次数, 总耗时秒, 最大耗时秒, 扫描行数, 最近一次的日志项]
+        self._lock = threading.Lock()
+        self._random = random.Random()
+        self._handler = None
+        self._logger = None
+        if path is not None:
+            self._handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count,
+                                                encoding='utf-8')
+            self._handler.setFormatter(logging.Formatter('%(message)s'))
+            # 独立的记录器, 不经过 logging 的全局配置
+            self._logger = logging.Logger('sqltranslator.slowlog')
+            self._logger.addHandler(self._handler)
+
+    def on_statement(self, metrics):
+        if metrics.total * 1000 < self.threshold_ms:
+            return
+        entry = self.entry(metrics)
+        with self._lock:
+            self.slow += 1
+            stats = self._stats.setdefault(entry['sql'], [0, 0.0, 0.0, 0, None])
+            stats[0] += 1
+            stats[1] += metrics.total
+            stats[2] = max(stats[2], metrics.total)
+            stats[3] += metrics.rows_scanned
+            stats[4] = entry
+            logger = self._logger
+            if logger is not None and self.sample_rate < 1.0 and self._random.random() >= self.sample_rate:
+                logger = None
+            if logger is not None:
+                self.written += 1
+        if logger is not None:
+            logger.warning(json.dumps(entry, ensure_ascii=False, default=str))
+
+    @staticmethod
+    def entry(metrics):
+        """一条慢语句的日志项"""
+        return {
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'sql': metrics.sql or f"<{metrics.statement_type}>",
+            'type': metrics.statement_type,
+            'total_ms': _ms(metrics.total),
+            'phases_ms': {name: _ms(seconds) for name, seconds in metrics.phases.items()},
+            'plan': explain_lines(metrics.plan) if metrics.plan is not None else None,
+            'rows_scanned': metrics.rows_scanned,
+            'rows_filtered': metrics.rows_filtered,
+            'rows_returned': metrics.rows_returned,
+            'index_hits': metrics.index_hits,
+            'peak_bytes': metrics.peak_bytes,
+            'error': metrics.error,
+        }
+
+    def top(self, n=None):
+        """总耗时最多的前 n 条(默认 top_n)慢语句"""
+        with self._lock:
+            items = sorted(((sql, tuple(stats)) for sql, stats in self._stats.items()),
+                           key=lambda item: item[1][1], reverse=True)
+        return [
+            {
+                'sql': sql,
+                'count': count,
+                'total_ms': _ms(total),
+                'mean_ms': _ms(total / count),
+                'max_ms': _ms(longest),
+                'rows_scanned': scanned,
+                'last': last,
+            }
+            for sql, (count, total, longest, scanned, last) in items[:n or self.top_n]
+        ]
+
+    def clear(self):
+        """清空汇总统计, 不影响日志文件"""
+        with self._lock:
+            self._stats.clear()
+            self.slow = 0
+            self.written = 0
+
+    def close(self):
+        with self._lock:
+            handler, logger = self._handler, self._logger
+            self._handler = self._logger = None
+        if handler is not None:
+            logger.removeHandler(handler)
+            handler.close()
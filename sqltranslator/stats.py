@@ -0,0 +1,130 @@
+"""
+表与列的统计信息, 供查询计划器估算代价
+
+每张表的 table['stats'] 记录每一列的:
+- 不同值个数的估计(HyperLogLog, 内存固定, 与行数无关)
+- 最小值/最大值
+- NULL 值个数
+行数直接取 len(table['data']), 总是准确的.
+
+写操作在事务中逐行更新统计信息(见 transaction.py): 插入和更新时把新值加入统计,
+删除和回滚不会减少不同值个数或收缩最小/最大值, 估计值可能偏大;
+执行 ANALYZE 会根据当前数据重新计算.
+"""
+
+import math
+
+_MASK64 = (1 << 64) - 1
+HLL_PRECISION = 10  # 2^10 个寄存器, 标准误差约 3%
+
+
+def _hash64(value):
+    """把 Python 的 hash 打散为均匀分布的 64 位整数(整数的 hash 是其自身)"""
+    x = (hash(value) * 0x9E3779B97F4A7C15) & _MASK64
+    x ^= x >> 32
+    return (x * 0xBF58476D1CE4E5B9) & _MASK64
+
+
+class HyperLogLog:
+    """不同值个数的概率估计"""
+    __slots__ = ('registers', '_estimate')
+
+    def __init__(self):
+        self.registers = bytearray(1 << HLL_PRECISION)
+        self._estimate = 0
+
+    def add(self, value):
+        x = _hash64(value)
+        index = x >> (64 - HLL_PRECISION)
+        rest = x & ((1 << (64 - HLL_PRECISION)) - 1)
+        rank = (64 - HLL_PRECISION) - rest.bit_length() + 1  # 前导零个数 + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+            self._estimate = None
+
+    def estimate(self):
+        if self._estimate is None:
+            m = len(self.registers)
+            total = sum(2.0 ** -r for r in self.registers)
+            estimate = 0.7213 / (1 + 1.079 / m) * m * m / total
+            zeros = self.registers.count(0)
+            if estimate <= 2.5 * m and zeros:  # 小基数时使用线性计数
+                estimate = m * math.log(m / zeros)
+            self._estimate = int(round(estimate))
+        return self._estimate
+
+
+class ColumnStats:
+    __slots__ = ('distinct', 'min', 'max', 'nulls')
+
+    def __init__(self):
+        self.distinct = HyperLogLog()
+        self.min = None
+        self.max = None
+        self.nulls = 0
+
+    def add(self, value):
+        if value is None:
+            self.nulls += 1
+            return
+        self.distinct.add(value)
+        try:
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+        except TypeError:  # 类型不同的值无法比较, 忽略
+            pass
+
+
+class TableStats:
+    def __init__(self, columns, dictionaries=None):
+        """
+        :param columns: 按行元组顺序排列的列名
+        :param dictionaries: 字典编码列的 列名 -> ColumnDictionary, 统计解码后的字符串
+        """
+        dictionaries = dictionaries or {}
+        self.columns = {col_name: ColumnStats() for col_name in columns}
+        # 与行元组一一对应的 (列统计, 解码用的编码表或 None)
+        self._ordered = [(col_stats, dictionaries[col_name].values if col_name in dictionaries else None)
+                         for col_name, col_stats in self.columns.items()]
+        self.rows_seen = 0  # 计入统计的行数(NULL 比例的分母)
+
+    def add_row(self, row):
+        self.rows_seen += 1
+        for (col_stats, values), value in zip(self._ordered, row):
+            col_stats.add(value if values is None or value is None else values[value])
+
+    def replace_row(self, old_row, new_row):
+        for (col_stats, values), old_value, new_value in zip(self._ordered, old_row, new_row):
+            if new_value != old_value:
+                if old_value is None and col_stats.nulls:
+                    col_stats.nulls -= 1
+                col_stats.add(new_value if values is None or new_value is None else values[new_value])
+
+    def null_fraction(self, col_name):
+        if not self.rows_seen:
+            return 0.0
+        return min(1.0, self.columns[col_name].nulls / self.rows_seen)
+
+    def distinct(self, col_name, row_count):
+        """不同值个数的估计, 不超过行数且至少为 1"""
+        return max(1, min(self.columns[col_name].distinct.estimate(), row_count))
+
+    def summary(self, row_count):
+        """每列一行的统计摘要"""
+        return [{
+            'column': col_name,
+            'distinct': self.distinct(col_name, row_count) if row_count else 0,
+            'null_frac': round(self.null_fraction(col_name), 4),
+            'min': col_stats.min,
+            'max': col_stats.max,
+        } for col_name, col_stats in self.columns.items()]
+
+
+def build_stats(table, rows):
+    """根据给定的行(快照)重新计算表的统计信息"""
+    stats = TableStats(table['columns'], table['dictionaries'])
+    for row in rows:
+        stats.add_row(row)
+    return stats
@@ -0,0 +1,176 @@
+"""
+事务: BEGIN / COMMIT / ROLLBACK 与撤销日志(undo log)
+
+写操作不复制整张表, 而是把每一处修改的"前像"记入撤销日志:
+- UNDO_INSERT: 追加了一行, 回滚时删除该位置的行
+- UNDO_ROW:    替换了某个位置的行, 记录被替换的旧行对象
+- UNDO_DATA:   整体替换了 table['data'] 列表(DELETE 或首次原地修改前的私有化), 记录旧列表、旧索引和删除的行
+回滚按相反顺序应用日志, 耗时只与实际修改的行数成正比.
+主键/UNIQUE 列上的哈希索引(见 index.py)在这些操作中同步维护, 回滚时一并恢复;
+以该表为基表的增量物化视图(见 views.py)收到每一行的修改, 回滚时按相反方向再收到一次;
+列统计信息(见 stats.py)只是估计值, 随插入和更新累加, 回滚时不撤销.
+每次修改都为表取一个新的版本号(table['version'], 供查询结果缓存判断是否失效, 见 cache.py);
+回滚不恢复旧版本号, 只会让缓存多失效一次.
+
+不在显式事务中的写语句会被包装成只包含一条语句的隐式事务, 因此每条语句都是原子的:
+执行到一半失败时回滚到语句开始前的状态. 显式事务中某条语句失败时,
+只撤销该语句本身的修改, 事务仍然保持打开.
+
+并发约定见 concurrency.py: 事务首次修改某张表时获取该表写锁并发布修改前快照
+table['committed'], 其他事务(包括同一会话在其他线程中的隐式事务和查询)在提交前只能读到该快照.
+"""
+
+from .concurrency import TableSnapshot, next_version
+from .index import build_indexes
+
+UNDO_INSERT = 0
+UNDO_ROW = 1
+UNDO_DATA = 2
+
+
+class Session:
+    """一个客户端会话（GUI/命令行各一个, 查询服务器每个连接一个）"""
+
+    def __init__(self):
+        self.txn = None  # 当前显式事务
+
+
+class Transaction:
+    def __init__(self, lock_timeout=None):
+        self.lock_timeout = lock_timeout
+        self.undo = []  # 撤销日志
+        self._touched = {}  # 表名 -> 表, 已获取写锁的表
+        self._private = {}  # id -> 行列表, 本事务私有(其他事务不可见)的行列表
+
+    # ---------------------- 加锁 ----------------------
+    def touch(self, table_name, table):
+        """首次修改某张表前调用: 获取写锁并发布修改前快照"""
+        if self._touched.get(table_name) is table:
+            return
+        if not table['lock'].acquire(self, self.lock_timeout):
+            raise Exception(f"等待表 '{table_name}' 的写锁超时")
+        table['committed'] = TableSnapshot(table['data'])
+        for view in table['views']:
+            view.publish(self)
+        self._touched[table_name] = table
+
+    def touched_tables(self):
+        """本事务修改过(持有写锁)的表名"""
+        return list(self._touched)
+
+    def _release_all(self):
+        for table in self._touched.values():
+            table.pop('committed', None)
+            for view in table['views']:
+                view.release(self)
+            table['lock'].release(self)
+        self._touched = {}
+        self._private = {}
+        self.undo = []
+
+    # ---------------------- 记录修改 ----------------------
+    def append_row(self, table, row):
+        """追加一行"""
+        for view in table['views']:  # 视图先检查条件, 出错时本行不会被插入
+            view.apply(None, row)
+        data = table['data']
+        pos = len(data)
+        self.undo.append((UNDO_INSERT, table, pos))
+        table['version'] = next_version()
+        data.append(row)
+        for index in table['indexes'].values():
+            index.add(row[index.offset], pos)
+        table['stats'].add_row(row)
+
+    def replace_row(self, table, pos, row):
+        """替换某个位置的行（旧行对象保留在撤销日志中）"""
+        data = self.writable(table)
+        old_row = data[pos]
+        for view in table['views']:
+            view.apply(old_row, row)
+        self.undo.append((UNDO_ROW, table, pos, old_row))
+        table['version'] = next_version()
+        data[pos] = row
+        _reindex_row(table, pos, old_row, row)
+        table['stats'].replace_row(old_row, row)
+
+    def delete_rows(self, table, positions):
+        """删除若干位置的行: 构建新列表后整体替换, 正在读取旧列表的查询不受影响"""
+        deleted = set(positions)
+        data = table['data']
+        removed = [data[pos] for pos in sorted(deleted)] if table['views'] else ()
+        self.replace_data(table, [row for pos, row in enumerate(data) if pos not in deleted], removed=removed)
+        for view in table['views']:
+            for row in removed:
+                view.apply(row, None)
+
+    def replace_data(self, table, new_data, reindex=True, removed=()):
+        """
+        整体替换行列表
+        :param reindex: 行的位置发生了变化, 需要为新列表重建索引
+        :param removed: 被删除的行, 回滚时重新通知物化视图
+        """
+        self.undo.append((UNDO_DATA, table, table['data'], table['indexes'], removed))
+        table['version'] = next_version()
+        table['data'] = new_data
+        if reindex:
+            table['indexes'] = build_indexes(table, new_data)
+        self._private[id(new_data)] = new_data
+
+    def writable(self, table):
+        """
+        返回可以原地修改的行列表
+        已发布的列表可能正被其他查询读取, 本事务第一次原地修改前先复制一份(仅复制行引用),
+        之后同一事务内的修改都直接作用于这份私有列表
+        """
+        data = table['data']
+        if id(data) not in self._private:
+            data = list(data)
+            self.replace_data(table, data, reindex=False)
+        return data
+
+    # ---------------------- 提交/回滚 ----------------------
+    def savepoint(self):
+        return len(self.undo)
+
+    def rollback_to(self, savepoint):
+        """撤销 savepoint 之后的全部修改"""
+        undo = self.undo
+        while len(undo) > savepoint:
+            entry = undo.pop()
+            kind, table = entry[0], entry[1]
+            if kind == UNDO_INSERT:
+                pos = entry[2]
+                row = table['data'].pop(pos)
+                for index in table['indexes'].values():
+                    index.remove(row[index.offset], pos)
+                for view in table['views']:
+                    view.apply(row, None)
+            elif kind == UNDO_ROW:
+                pos, old_row = entry[2], entry[3]
+                row = table['data'][pos]
+                table['data'][pos] = old_row
+                _reindex_row(table, pos, row, old_row)
+                for view in table['views']:
+                    view.apply(row, old_row)
+            else:
+                table['data'], table['indexes'] = entry[2], entry[3]
+                for view in table['views']:
+                    for row in entry[4]:
+                        view.apply(None, row)
+
+    def commit(self):
+        self._release_all()
+
+    def rollback(self):
+        self.rollback_to(0)
+        self._release_all()
+
+
+def _reindex_row(table, pos, old_row, new_row):
+    """某个位置的行被替换后更新索引"""
+    for index in table['indexes'].values():
+        old_value, new_value = old_row[index.offset], new_row[index.offset]
+        if old_value != new_value:
+            index.remove(old_value, pos)
+            index.add(new_value, pos)
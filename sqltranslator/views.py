@@ -0,0 +1,365 @@
+"""
+物化视图: CREATE MATERIALIZED VIEW 名称 AS SELECT ...
+
+视图保存定义它的查询的结果, 查询视图(SELECT ... FROM 视图名)时读取保存的结果, 不重新执行该查询.
+- 单表上的分组聚合查询(SELECT 列表只含分组列和 COUNT/SUM/AVG/MIN/MAX, 没有 DISTINCT、
+  ORDER BY、LIMIT)可以增量维护: 视图为每个分组保存可撤销的累加器, 基表的每次插入、更新、删除
+  (见 transaction.py)只更新受影响分组的累加器和结果行, 回滚时按相反方向再应用一次;
+  读取的代价只与分组数有关.
+- 其他查询(多表连接、非聚合查询等)只在创建视图和 REFRESH MATERIALIZED VIEW 时重新执行.
+并发约定与表相同(见 concurrency.py): 基表正被其他事务修改时, 其他会话读到的是该事务开始修改前的结果.
+"""
+
+import threading
+
+from .aggregates import aggregate_name, is_aggregate
+from .concurrency import new_table_lock, take_snapshot
+from .expressions import format_expression
+from .index import sort_key
+from .operators import ExecutionContext
+from .planner import LogicalPlan, compile_condition, execute_plan, output_columns, plan_select, plan_tables, \
+    prefixed_key, row_getter
+from .rows import column_offsets
+from .stats import build_stats
+
+
+# ---------------------- 可撤销的累加器 ----------------------
+# 与 aggregates.py 中的累加器结果相同, update(value, sign) 中 sign 为 1 表示加入, -1 表示移除
+
+def _to_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _CountState:
+    """COUNT(列); COUNT(*) 的值恒为 True"""
+    __slots__ = ('count',)
+
+    def __init__(self):
+        self.count = 0
+
+    def update(self, value, sign):
+        if value is not None:
+            self.count += sign
+
+    def result(self):
+        return self.count
+
+
+class _SumState:
+    __slots__ = ('total', 'count', 'invalid')
+
+    def __init__(self):
+        self.total = 0.0
+        self.count = 0
+        self.invalid = 0  # 无法转换为数字的值的个数
+
+    def update(self, value, sign):
+        if value is None:
+            return
+        number = _to_number(value)
+        if number is None:
+            self.invalid += sign
+            return
+        self.count += sign
+        self.total = self.total + sign * number if self.count else 0.0  # 清空时消除浮点累计误差
+
+    def result(self):
+        if self.invalid or not self.count:
+            return None
+        return self.total
+
+
+class _AvgState(_SumState):
+    __slots__ = ()
+
+    def result(self):
+        if self.invalid or not self.count:
+            return None
+        return self.total / self.count
+
+
+class _ExtremeState:
+    """
+    MIN/MAX: 记录每个值的出现次数, 移除当前最值后才重新计算
+    所有值都能转换为数字时按数值比较, 否则按 sort_key 比较并返回原值
+    """
+    __slots__ = ('counts', 'invalid', 'pick', 'best', 'stale')
+
+    def __init__(self, pick):
+        self.counts = {}  # 值 -> 出现次数
+        self.invalid = 0  # 无法转换为数字的值的个数
+        self.pick = pick  # min 或 max
+        self.best = None  # (比较键, 值)
+        self.stale = False
+
+    def _key(self, value):
+        return float(value) if not self.invalid else sort_key(value)
+
+    def update(self, value, sign):
+        if value is None:
+            return
+        count = self.counts.get(value, 0) + sign
+        if count:
+            self.counts[value] = count
+        else:
+            del self.counts[value]
+        if _to_number(value) is None:
+            self.invalid += sign
+            if self.invalid == (1 if sign > 0 else 0):  # 比较方式改变
+                self.stale = True
+        if self.stale:
+            return
+        key = self._key(value)
+        if sign > 0:
+            if self.best is None or self.pick(key, self.best[0]) != self.best[0]:
+                self.best = (key, value)
+        elif not count and key == self.best[0]:
+            self.stale = True
+
+    def result(self):
+        if self.stale:
+            self.stale = False
+            if self.counts:
+                value = self.pick(self.counts, key=self._key)
+                self.best = (self._key(value), value)
+            else:
+                self.best = None
+        if self.best is None:
+            return None
+        return self.best[1] if self.invalid else self.best[0]
+
+
+_STATES = {'COUNT': _CountState, 'SUM': _SumState, 'AVG': _AvgState,
+           'MIN': lambda: _ExtremeState(min), 'MAX': lambda: _ExtremeState(max)}
+
+
+# ---------------------- 视图定义 ----------------------
+def _output_types(plan):
+    """输出列名 -> 类型(只用于显示表结构); SUM/AVG 以及数值列的 MIN/MAX 结果为浮点数"""
+    def column_type(name):
+        resolved = plan.scope.resolve(name)
+        if resolved is None:
+            return None
+        return plan.tables[plan.scope.table_of(resolved[0])]['columns'][resolved[1]]['type']
+
+    types = {col: column_type(col) for col in plan.group_by}
+    for col in plan.columns:
+        if col == '*':
+            for alias, table_name, columns in plan.scope.relations:
+                for col_name in columns:
+                    types[prefixed_key(alias, col_name)] = plan.tables[table_name]['columns'][col_name]['type']
+        elif is_aggregate(col):
+            arg_type = column_type(col['arg']) or ''
+            if col['name'] == 'COUNT':
+                types[aggregate_name(col)] = 'INT'
+            elif col['name'] in ('MIN', 'MAX') and 'VARCHAR' in arg_type:
+                types[aggregate_name(col)] = arg_type
+            else:
+                types[aggregate_name(col)] = 'FLOAT'
+        elif isinstance(col, dict) and 'expr' in col:  # 表达式列的类型按默认的 VARCHAR 显示
+            types[col.get('alias') or format_expression(col['expr'])] = None
+        elif isinstance(col, dict):
+            types[col.get('alias') or col['name']] = column_type(col['name'])
+        else:
+            types[col] = column_type(col)
+    return types
+
+
+def _view_column_names(names):
+    """视图的列名: 去掉 '表别名.' 前缀, 去掉后有重名时保留原名"""
+    bare = [name.split('.', 1)[1] if '.' in name else name for name in names]
+    return bare if len(set(bare)) == len(bare) else list(names)
+
+
+def _incremental_items(plan):
+    """
+    能增量维护时返回 (分组列列表, 输出项列表), 输出项为 ('key', 分组列下标) 或 ('agg', 聚合函数);
+    否则返回 None
+    """
+    if (len(plan.scope.relations) != 1 or not plan.aggregate or plan.distinct or plan.having is not None
+            or plan.order_by or plan.limit is not None):
+        return None
+    keys = [plan.scope.resolve(col) for col in plan.group_by]
+    items, names = [], []
+    for col in plan.columns:
+        if is_aggregate(col):
+            if col.get('distinct'):
+                return None
+            items.append(('agg', col))
+            names.append(aggregate_name(col))
+            continue
+        if col == '*' or isinstance(col, dict) and 'expr' in col:
+            return None
+        name = col['name'] if isinstance(col, dict) else col
+        resolved = plan.scope.resolve(name)
+        if resolved not in keys:  # 非分组列取分组中第一行的值, 删除后无法维护
+            return None
+        items.append(('key', keys.index(resolved)))
+        names.append(col.get('alias') or name if isinstance(col, dict) else col)
+    # 未出现在 SELECT 列表中的分组列排在最前面, 与查询结果一致(见 planner._aggregate)
+    group_items = [('key', i) for i, col in enumerate(plan.group_by) if col not in names]
+    return keys, group_items + items
+
+
+class MaterializedView:
+    def __init__(self, name, statement, tables):
+        """
+        :param statement: 定义视图的 SELECT 语法树
+        :param tables: 表字典(SQLInterpreter.tables), 用于解析列名和检查查询是否合法
+        """
+        self.name = name
+        self.statement = statement
+        self.tables = list(dict.fromkeys(plan_tables(statement)))  # 引用的表名
+        plan = LogicalPlan(statement, tables)
+        result_names = output_columns(plan_select(statement, tables))
+        types = _output_types(plan)
+        self._result_names = result_names  # 查询结果字典的键, 与视图列一一对应
+        names = _view_column_names(result_names)
+        self.columns = {col_name: {'type': types.get(result_name) or 'VARCHAR', 'constraints': []}
+                        for col_name, result_name in zip(names, result_names)}
+        self.offsets = column_offsets(self.columns)
+
+        self._lock = threading.Lock()  # 保护下面的结果数据
+        self.version = 0  # 每次修改结果时加一
+        self._cache = None  # (版本, 只读表)
+        self.writer = None  # 正在修改基表的事务
+        self._before = None  # 分组键 -> writer 修改前该分组的结果行(None 表示当时不存在)
+        self.rows = []  # 非增量视图的结果行
+        self.groups = {}  # 增量视图: 分组键 -> [行数, 累加器列表, 结果行]
+
+        incremental = _incremental_items(plan)
+        self.incremental = incremental is not None
+        if not self.incremental:
+            return
+        keys, items = incremental
+        getter_of = row_getter(tables[self.tables[0]])
+        where = statement['where']
+        self._predicate = compile_condition(where, plan.scope, getter_of) if where else None
+        self._keys = [getter_of(*resolved) for resolved in keys]
+        self._sources = []  # 每个聚合函数的 (取值函数, 累加器类), 取值函数为 None 表示 COUNT(*)
+        self._items = []  # ('key', 分组列下标) 或 ('agg', 累加器下标)
+        for kind, param in items:
+            if kind == 'agg':
+                getter = None if param['arg'] == '*' else plan.getter(param['arg'], getter_of)
+                self._items.append(('agg', len(self._sources)))
+                self._sources.append((getter, _STATES[param['name']]))
+            else:
+                self._items.append((kind, param))
+
+    # ---------------------- 增量维护 ----------------------
+    def _change(self, row, sign):
+        """基表行对视图的影响: (分组键, 各聚合函数的参数值, sign), 不满足 WHERE 时返回 None"""
+        if row is None or (self._predicate is not None and not self._predicate(row)):
+            return None
+        key = tuple(getter(row) for getter in self._keys)
+        values = [True if getter is None else getter(row) for getter, _ in self._sources]
+        return key, values, sign
+
+    def _update(self, groups, change, before=None):
+        key, values, sign = change
+        group = groups.get(key)
+        if before is not None and key not in before:
+            before[key] = None if group is None else group[2]
+        if group is None:
+            group = groups[key] = [0, [state() for _, state in self._sources], None]
+        group[0] += sign
+        for acc, value in zip(group[1], values):
+            acc.update(value, sign)
+        if group[0] == 0 and self._keys:  # 分组已没有行; 没有 GROUP BY 时始终输出一行
+            del groups[key]
+        else:
+            group[2] = tuple(key[i] if kind == 'key' else group[1][i].result() for kind, i in self._items)
+
+    def apply(self, old_row, new_row):
+        """
+        基表中 old_row 被替换为 new_row(插入时 old_row 为 None, 删除时 new_row 为 None)
+        由持有基表写锁的事务调用; 先计算条件和分组键, 出错时视图不会被修改
+        """
+        changes = [change for change in (self._change(old_row, -1), self._change(new_row, 1)) if change]
+        if not changes:
+            return
+        with self._lock:
+            for change in changes:
+                self._update(self.groups, change, self._before)
+            self.version += 1
+
+    def publish(self, txn):
+        """事务首次修改基表前调用(见 Transaction.touch), 之后记录各分组修改前的结果"""
+        with self._lock:
+            self.writer, self._before = txn, {}
+
+    def release(self, txn):
+        """事务提交或回滚后调用"""
+        with self._lock:
+            if self.writer is txn:
+                self.writer, self._before = None, None
+
+    # ---------------------- 刷新与读取 ----------------------
+    def refresh(self, tables, txn=None):
+        """
+        重新执行定义视图的查询, 替换保存的结果
+        调用方持有所有基表的写锁, 期间基表不会变化
+        """
+        if self.incremental:
+            groups = {}
+            for row in take_snapshot(tables[self.tables[0]], txn):
+                change = self._change(row, 1)
+                if change:
+                    self._update(groups, change)
+            if not self._keys and () not in groups:
+                self._update(groups, ((), [None] * len(self._sources), 0))
+            with self._lock:
+                self.groups = groups
+                self.version += 1
+            return len(groups)
+
+        root = plan_select(self.statement, tables)
+        ctx = ExecutionContext(tables, txn)
+        ctx.open(self.tables)
+        names = self._result_names
+        rows = [tuple(row[name] for name in names) for row in execute_plan(root, ctx)]
+        with self._lock:
+            self.rows = rows
+            self.version += 1
+        return len(rows)
+
+    def _committed_rows(self):
+        """writer 修改之前的结果行"""
+        rows = []
+        for key, group in self.groups.items():
+            row = self._before[key] if key in self._before else group[2]
+            if row is not None:
+                rows.append(row)
+        rows.extend(row for key, row in self._before.items() if key not in self.groups and row is not None)
+        return rows
+
+    def _build_table(self, rows):
+        table = {
+            'columns': self.columns,
+            'primary_key': None,
+            'data': rows,
+            'offsets': self.offsets,
+            'dictionaries': {},
+            'indexes': {},
+            'views': [],
+            'stats': None,
+            'lock': new_table_lock()
+        }
+        table['stats'] = build_stats(table, rows)
+        return table
+
+    def table(self, txn=None):
+        """
+        查询视图时使用的只读表, 结构与 SQLInterpreter.tables 中的表相同
+        :param txn: 读取方所在的事务
+        """
+        with self._lock:
+            if self.writer is not None and self.writer is not txn and self._before:
+                return self._build_table(self._committed_rows())
+            if self._cache is None or self._cache[0] != self.version:
+                rows = [group[2] for group in self.groups.values()] if self.incremental else self.rows
+                self._cache = (self.version, self._build_table(rows))
+            return self._cache[1]